@@ -61,11 +61,33 @@ mensajes_argumentos_tarea = (
 
 ESTADOS_VALIDOS = ["No iniciado", "Detenido", "En progreso", "Completado"]
 
-def leer_id(consola, mensaje):
-    "Solicita un ID al usuario."
+# Coincidencias que se muestran al buscar por un prefijo ambiguo
+MAX_COINCIDENCIAS = 20
+
+def buscar_por_prefijo(prefijo, buscar_por_nombre):
+    "Busca un objeto por el prefijo de su nombre."
+    " Devuelve un resultado de error si no hay uno solo."
+    coincidencias = list(buscar_por_nombre(prefijo, MAX_COINCIDENCIAS + 1))
+    if len(coincidencias) == 1:
+        return coincidencias[0]
+    if len(coincidencias) == 0:
+        return Resultado("Error: ningún nombre empieza con: " + prefijo,
+                         None, tipo_error="Valor")
+    texto = "Error: varios nombres empiezan con: " + prefijo
+    for coincidencia in coincidencias[:MAX_COINCIDENCIAS]:
+        texto += "\n" + str(coincidencia)
+    if len(coincidencias) > MAX_COINCIDENCIAS:
+        texto += "\n..."
+    return Resultado(texto, None, tipo_error="Valor")
+
+def leer_id(consola, mensaje, buscar_por_nombre=None):
+    "Solicita un ID al usuario, o un prefijo de nombre terminado en '*'"
+    " si se da 'buscar_por_nombre'; en ese caso devuelve el objeto."
     " Devuelve un resultado de error si aplica."
     id_ = consola.leer_argumentos( ("id",),
         (mensaje,) )["id"]
+    if buscar_por_nombre is not None and id_.endswith("*"):
+        return buscar_por_prefijo(id_[:-1], buscar_por_nombre)
     try:
         id_ = int(id_)
     except ValueError:
@@ -81,10 +103,10 @@ _MSG_ERROR_PROYECTO_NO_ID = ("Error: "
                              + Gestor._MSG_ERROR_PROYECTO_NO_ID[1:] )
 
 def id_a_empresa(consola, mensaje):
-    "Solicita un ID de empresa al usuario."
+    "Solicita un ID, o prefijo de nombre, de empresa al usuario."
     " Devuelve un resultado de error si aplica."
-    id_empresa = leer_id(consola, mensaje)
-    if isinstance(id_empresa, Resultado): return id_empresa
+    id_empresa = leer_id(consola, mensaje, gestor.buscar_empresas_por_nombre)
+    if not isinstance(id_empresa, int): return id_empresa
     empresa = gestor.buscar_empresa("id", id_empresa)
     if empresa is None:
         return Resultado(_MSG_ERROR_EMPRESA_NO_ID + str(id_empresa),
@@ -92,10 +114,10 @@ def id_a_empresa(consola, mensaje):
     return empresa
 
 def id_a_proyecto(consola, mensaje):
-    "Solicita un ID de proyecto al usuario."
+    "Solicita un ID, o prefijo de nombre, de proyecto al usuario."
     " Devuelve un resultado de error si aplica."
-    id_proyecto = leer_id(consola, mensaje)
-    if isinstance(id_proyecto, Resultado): return id_proyecto
+    id_proyecto = leer_id(consola, mensaje, gestor.empresa.buscar_proyectos_por_nombre)
+    if not isinstance(id_proyecto, int): return id_proyecto
     proyecto = gestor.empresa.buscar_proyecto_por_id(id_proyecto)
     if proyecto is None:
         return Resultado(_MSG_ERROR_PROYECTO_NO_ID + str(id_proyecto),
@@ -103,10 +125,10 @@ def id_a_proyecto(consola, mensaje):
     return proyecto
 
 def id_a_tarea(consola, mensaje):
-    "Solicita un ID de tarea al usuario."
+    "Solicita un ID, o prefijo de nombre, de tarea al usuario."
     " Devuelve un resultado de error si aplica."
-    id_tarea = leer_id(consola, mensaje)
-    if isinstance(id_tarea, Resultado): return id_tarea
+    id_tarea = leer_id(consola, mensaje, gestor.buscar_tareas_por_nombre)
+    if not isinstance(id_tarea, int): return id_tarea
     tarea = gestor.buscar_tarea("id", id_tarea)
     if tarea is None:
         if len(gestor.tareas) == 0:
@@ -313,8 +335,7 @@ def fn_enumerar_proyectos(consola, linea_comando):
     "Enumera los proyectos registrados"
     if len(gestor.empresa.proyectos) == 0:
         return Resultado("No hay proyectos para mostrar.", fn_enumerar_proyectos)
-    resultado = "\n\n".join(map(str,
-        (par.valor for par in gestor.empresa.proyectos) ))
+    resultado = "\n\n".join(map(str, gestor.empresa.proyectos))
     return Resultado(resultado, fn_enumerar_proyectos)
 contextos["proyectos"]["mostrar"] = Comando(fn_enumerar_proyectos, "mostrar")
 
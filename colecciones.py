@@ -8,6 +8,41 @@
 #     * Funciones de búsqueda
 #     * Conversiones a 'str'
 #     * NodoArbolBinario
+#   v3
+#     * Árbol AVL
+#     * Recorridos de árboles sin recursión
+#     * Tamaños de subárboles y estadísticos de orden en ArbolBinario
+#     * Modo de mapa ordenado en ArbolBinario (claves separadas de valores)
+#     * Consultas por rango, piso, techo, sucesor y predecesor
+#     * Construcción balanceada en tiempo lineal desde datos ordenados
+#     * Manejadores de nodos en ListaEnlazada
+#     * Lista de saltos indexable como soporte alternativo de Secuencia
+#     * Arreglo circular como soporte de Pila y Cola
+#     * Nodos con '__slots__' para reducir la memoria por elemento
+#     * Lista enlazada compacta en arreglos paralelos
+#     * Índice hash opcional de los hijos en NodoArbolNario
+#     * Pertenencia en tiempo constante y etiquetas de ancestros en ArbolNario
+#     * Agregados de subárbol en ArbolNario
+#     * Ancestro común, camino y profundidad en ArbolNario
+#     * Instantáneas persistentes de ArbolBinario y ArbolNario
+#     * Cola de prioridad con montículo binario y manejadores
+#     * Árbol de intervalos sobre el árbol AVL
+#     * Árbol de prefijos (Trie) para búsquedas por nombre
+#     * Rebanadas perezosas de ListaEnlazada y Vista; vistas mapeadas y
+#       filtradas
+#     * Ordenamiento por mezcla de listas enlazadas y fusión de ordenadas
+#     * Cola concurrente con capacidad, esperas y cierre
+#     * Árbol biselado (splay) que sube a la raíz las claves accedidas
+#     * Árbol rojinegro y fábrica de árboles ordenados por nombre
+#     * Recorridos de ArbolNario con profundidad máxima y poda; filtrar
+
+import array
+import heapq
+import itertools
+import random
+import reprlib
+import threading
+import weakref
 
 import utilidades as util
 
@@ -47,10 +82,21 @@ class ClaveValor:
         return not self < otro
 
 class Vista:
-    "Vista de solo lectura de una colección."
+    """Vista de solo lectura de una colección.
 
-    def __init__(self, coleccion, funcion_obtener=None, funcion_tamano=None):
+    Las vistas no copian los elementos: las rebanadas, 'mapear' y
+    'filtrar' devuelven otras vistas que se calculan al leerlas, así que
+    se pueden componer, por ejemplo para mostrar una página de resultados:
+
+        vista.filtrar(condicion).mapear(str)[inicio:inicio + tamano]
+
+    'funcion_iterar', si se da, recibe la colección y devuelve un iterador
+    sobre los elementos; si no, se itera con 'funcion_obtener' por índice."""
+
+    def __init__(self, coleccion, funcion_obtener=None, funcion_tamano=None,
+                 funcion_iterar=None):
         self.__coleccion = coleccion
+        self.__iterar = funcion_iterar
         self.__obtener = self.__tamano = None
         if funcion_obtener is not None:
             self.__obtener = funcion_obtener
@@ -78,11 +124,50 @@ class Vista:
             self.__tamano = len
 
     def __getitem__(self, clave):
+        if isinstance(clave, slice):
+            return self.__rebanar(clave)
         return self.__obtener(self.__coleccion, clave)
 
     def __len__(self):
         return self.__tamano(self.__coleccion)
 
+    def __iter__(self):
+        if self.__iterar is not None:
+            return self.__iterar(self.__coleccion)
+        return (self[i] for i in range(len(self)))
+
+    def __reversed__(self):
+        return (self[i] for i in reversed(range(len(self))))
+
+    def __rebanar(self, rebanada):
+        "Ventana perezosa de las posiciones de la rebanada, fijadas al crearla."
+        rango = range(*rebanada.indices(len(self)))
+        if rango.step > 0:
+            # Recorre la vista una vez en lugar de acceder por índice
+            iterar = lambda vista: itertools.islice(
+                vista, rango.start, rango.stop, rango.step)
+        else:
+            iterar = lambda vista: map(vista.__getitem__, rango)
+        return Vista(self, lambda vista, i: vista[rango[i]],
+                     lambda vista: len(rango), iterar)
+
+    def mapear(self, funcion):
+        "Devuelve una vista de 'funcion' aplicada a cada elemento."
+        return Vista(self, lambda vista, i: funcion(vista[i]), len,
+                     lambda vista: map(funcion, vista))
+
+    map = mapear
+
+    def filtrar(self, condicion):
+        """Devuelve una vista de los elementos que cumplen la condición.
+
+        Como no se sabe de antemano dónde están, la vista filtrada es una
+        VistaSecuencial: obtener su elemento i o su largo recorre la vista
+        original."""
+        return VistaSecuencial(self, lambda vista: filter(condicion, vista))
+
+    filter = filtrar
+
     @property
     def tipo(self):
         return type(self.__coleccion)
@@ -91,14 +176,69 @@ class Vista:
         return "Vista(%r)" % self.tipo
 
 
+class VistaSecuencial(Vista):
+    """Vista de solo lectura que solo se puede recorrer en orden.
+
+    'funcion_iterar' recibe la colección y devuelve un iterador nuevo cada
+    vez.  No hay acceso directo: vista[i] recorre i elementos y len(vista)
+    la recorre completa.  Las rebanadas con índices no negativos, 'mapear'
+    y 'filtrar' siguen siendo perezosas; las demás rebanadas copian."""
+
+    def __init__(self, coleccion, funcion_iterar):
+        # Sin Vista.__init__, que calcularía el largo
+        self.__coleccion = coleccion
+        self.__iterar = funcion_iterar
+
+    def __iter__(self):
+        return self.__iterar(self.__coleccion)
+
+    def __len__(self):
+        return sum(1 for elemento in self)
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __getitem__(self, clave):
+        if isinstance(clave, slice):
+            inicio, fin, paso = clave.start, clave.stop, clave.step
+            if (inicio or 0) >= 0 and (fin is None or fin >= 0) \
+                and (paso or 1) > 0:
+                return VistaSecuencial(self, lambda vista: itertools.islice(
+                    vista, inicio, fin, paso))
+            elementos = list(self)[clave]
+            return Vista(elementos, list.__getitem__)
+        if clave < 0:
+            return list(self)[clave]
+        for elemento in itertools.islice(self, clave, None):
+            return elemento
+        raise IndexError(str(clave))
+
+    def mapear(self, funcion):
+        return VistaSecuencial(self, lambda vista: map(funcion, vista))
+
+    map = mapear
+
+    @property
+    def tipo(self):
+        return type(self.__coleccion)
+
+    def __repr__(self):
+        return "VistaSecuencial(%r)" % self.tipo
+
+
+# Los nodos usan '__slots__' para no reservar un diccionario por instancia,
+# y 'reprlib.recursive_repr' para protegerse de llamadas recursivas de
+# __repr__ sin guardar una bandera en cada nodo.
+
 class NodoLista:
     "Nodo doblemente enlazado conteniendo un valor cualquiera."
 
+    __slots__ = ("valor", "__nodo_anterior", "__nodo_siguiente")
+
     def __init__(self, valor=None):
         self.valor = valor
         self.__nodo_anterior = None
         self.__nodo_siguiente = None
-        self.__repr = False  # Para __repr__
 
     def anterior(self):
         return self.__nodo_anterior
@@ -122,19 +262,21 @@ class NodoLista:
         if anterior is not None:
             anterior.__nodo_siguiente = self
 
+    @reprlib.recursive_repr("...")
     def __repr__(self):
-        if self.__repr:
-            return "..."
-        else:
-            self.__repr = True
-            resultado = "NodoLista(%r)" % self.valor
-            self.__repr = False
-            return resultado
+        return "NodoLista(%r)" % (self.valor,)
 
 class ListaEnlazada:
-    "Lista doblemente enlazada heterogénea."
+    """Lista doblemente enlazada heterogénea.
 
-    __ERROR_NO_SLICE = NotImplementedError("sin soporte para 'slice'")
+    anexar, insertar e insertar_despues devuelven el 'NodoLista' creado.
+    Ese nodo sirve de manejador para remover_nodo e insertar_despues, que
+    toman tiempo constante.  Un manejador deja de ser válido cuando su
+    elemento se remueve de la lista.
+
+    lista[inicio:fin:paso] devuelve una Vista perezosa, sin copiar, de
+    esas posiciones, que se fijan al crearla.  Recorrerla toma tiempo
+    O(inicio + k) para k elementos.  No se puede asignar a rebanadas."""
 
     def __init__(self, iterable=None):
         "Se copian los elementos de 'iterable' si se proporciona."
@@ -164,20 +306,44 @@ class ListaEnlazada:
                 nodo = nodo.siguiente()
         else:
             nodo = self.__cola
-            for i in range(indice):
+            for i in range(self.__longitud - 1 - indice):
                 nodo = nodo.anterior()
         return nodo
 
     def __getitem__(self, indice):
         if isinstance(indice, slice):
-            raise __ERROR_NO_SLICE
+            rango = range(*indice.indices(self.__longitud))
+            return Vista(self, lambda lista, i: lista[rango[i]],
+                         lambda lista: len(rango),
+                         lambda lista: lista.__recorrer(rango))
         return self.__obtener_nodo(indice).valor
 
     obtener = __getitem__
 
+    def __recorrer(self, rango):
+        "Itera los valores en las posiciones del rango siguiendo los enlaces."
+        restantes = len(rango)
+        if restantes == 0:
+            return
+        nodo = self.__obtener_nodo(rango[0])
+        if rango.step > 0:
+            avanzar = NodoLista.siguiente
+        else:
+            avanzar = NodoLista.anterior
+        saltos = abs(rango.step) - 1
+        while True:
+            yield nodo.valor
+            restantes -= 1
+            if restantes == 0:
+                return
+            nodo = avanzar(nodo)
+            if saltos:
+                for i in range(saltos):
+                    nodo = avanzar(nodo)
+
     def __setitem__(self, indice, valor):
         if isinstance(indice, slice):
-            raise __ERROR_NO_SLICE
+            raise NotImplementedError("sin soporte para asignar a 'slice'")
         self.__obtener_nodo(indice).valor = valor
 
     cambiar = __setitem__
@@ -189,6 +355,7 @@ class ListaEnlazada:
         if self.__cabeza is None:
             self.__cabeza = nuevo
         self.__longitud += 1
+        return nuevo
 
     append = anexar
 
@@ -204,8 +371,7 @@ class ListaEnlazada:
             valor = indice
             indice = 0
         if indice == self.__longitud:
-            self.anexar(valor)
-            return
+            return self.anexar(valor)
         nuevo = NodoLista(valor)
         if indice == 0:
             nuevo.enlazar_a(self.__cabeza)
@@ -218,21 +384,62 @@ class ListaEnlazada:
             nuevo.enlazar_a(anterior.siguiente())
             anterior.enlazar_a(nuevo)
         self.__longitud += 1
+        return nuevo
+
+    def __validar_nodo(self, nodo):
+        "Comprueba, en lo posible, que el manejador sea de esta lista."
+        util.comprobar_tipos("nodo", nodo, NodoLista)
+        if nodo.anterior() is None and nodo is not self.__cabeza \
+            or nodo.siguiente() is None and nodo is not self.__cola:
+            raise ValueError("El nodo no pertenece a la lista")
+
+    def insertar_despues(self, nodo, valor):
+        """Inserta 'valor' justo después del nodo dado en tiempo constante.
+
+        'nodo' debe ser un manejador de esta lista.  Devuelve el nuevo nodo."""
+        self.__validar_nodo(nodo)
+        if nodo is self.__cola:
+            return self.anexar(valor)
+        nuevo = NodoLista(valor)
+        nuevo.enlazar_a(nodo.siguiente())
+        nodo.enlazar_a(nuevo)
+        self.__longitud += 1
+        return nuevo
+
+    def remover_nodo(self, nodo):
+        """Remueve de la lista el nodo dado en tiempo constante.
+
+        'nodo' debe ser un manejador de esta lista.  Devuelve su valor."""
+        self.__validar_nodo(nodo)
+        anterior, siguiente = nodo.anterior(), nodo.siguiente()
+        if anterior is None:
+            self.__cabeza = siguiente
+            if siguiente is not None:
+                siguiente.enlazar_desde(None)
+        else:
+            anterior.enlazar_a(siguiente)
+        if siguiente is None:
+            self.__cola = anterior
+        # Así el manejador queda inválido y no se puede remover dos veces
+        nodo.enlazar_a(None)
+        nodo.enlazar_desde(None)
+        self.__longitud -= 1
+        return nodo.valor
 
     def insert(self, indice, valor):
         "Evita un comportamiento indeseado con None, para asemejarse más a Python."
         if valor is None:
             raise TypeError("valor no puede ser 'None'")
 
-    # Los enlaces a None comentados no son estrictamente necesarios,
-    # siempre y cuando la ListaEnlazada no comparta sus nodos con nadie
+    # Los nodos extraídos se desenlazan para que sus manejadores queden
+    # inválidos (véase __validar_nodo)
     def extraer_ultimo(self):
         if self.__cola is None:
             raise IndexError("la lista está vacía")
         a_extraer = self.__cola
         self.__cola = self.__cola.anterior()
         if self.__cola is not None:
-            #a_extraer.enlazar_desde(None)
+            a_extraer.enlazar_desde(None)
             self.__cola.enlazar_a(None)
         else:
             self.__cabeza = None
@@ -250,7 +457,7 @@ class ListaEnlazada:
             a_extraer = self.__cabeza
             self.__cabeza = self.__cabeza.siguiente()
             if self.__cabeza is not None:
-                #a_extraer.enlazar_a(None)
+                a_extraer.enlazar_a(None)
                 self.__cabeza.enlazar_desde(None)
             else:
                 self.__cola = None
@@ -259,8 +466,8 @@ class ListaEnlazada:
             anterior = self.__obtener_nodo(indice - 1)
             a_extraer = anterior.siguiente()
             anterior.enlazar_a(a_extraer.siguiente())
-            #a_extraer.enlazar_desde(None)
-            #a_extraer.enlazar_a(None)
+            a_extraer.enlazar_desde(None)
+            a_extraer.enlazar_a(None)
         self.__longitud -= 1
         return a_extraer.valor
 
@@ -275,13 +482,7 @@ class ListaEnlazada:
         if nodo is None:
             raise ValueError("El valor no se encuentra en la lista: "
                              + str(valor))
-        if nodo.anterior() is None:
-            self.extraer(0)
-        elif nodo.siguiente() is None:
-            self.extraer_ultimo()
-        else:
-            nodo.anterior().enlazar_a(nodo.siguiente())
-            self.__longitud -= 1
+        self.remover_nodo(nodo)
 
     remove = remover
 
@@ -294,7 +495,7 @@ class ListaEnlazada:
             try:
                 nuevo = NodoLista(next(iterable))
             except StopIteration:
-                return
+                return self
             self.__cabeza = self.__cola = nuevo
             self.__longitud += 1
         for valor in iterable:
@@ -324,7 +525,13 @@ class ListaEnlazada:
     buscar_por_atributo = util.buscar_por_atributo
 
     def vaciar(self):
-        "Vacía la lista"
+        "Vacía la lista e invalida los manejadores de sus nodos"
+        nodo = self.__cabeza
+        while nodo is not None:
+            siguiente = nodo.siguiente()
+            nodo.enlazar_desde(None)
+            nodo.enlazar_a(None)
+            nodo = siguiente
         self.__cabeza = self.__cola = None
         self.__longitud = 0
 
@@ -340,6 +547,60 @@ class ListaEnlazada:
 
     copy = copiar
 
+    def ordenar(self, clave=None, inverso=False):
+        """Ordena la lista en su lugar, de forma estable, como list.sort.
+
+        Es un ordenamiento por mezcla de abajo hacia arriba que reenlaza
+        los nodos existentes sin reservar memoria, por lo que los
+        manejadores siguen siendo válidos.  'clave' se llama en cada
+        comparación en lugar de guardarse."""
+        if self.__longitud < 2:
+            return
+        if clave is None:
+            clave = lambda valor: valor
+        cabeza = self.__cabeza
+        ancho = 1
+        while True:
+            # Mezcla pares de tramos ordenados de 'ancho' nodos
+            izquierdo, cabeza, cola, mezclas = cabeza, None, None, 0
+            while izquierdo is not None:
+                mezclas += 1
+                derecho, largo_izquierdo = izquierdo, 0
+                while largo_izquierdo < ancho and derecho is not None:
+                    derecho = derecho.siguiente()
+                    largo_izquierdo += 1
+                largo_derecho = ancho
+                while largo_izquierdo > 0 \
+                    or largo_derecho > 0 and derecho is not None:
+                    if largo_izquierdo == 0:
+                        tomar_derecho = True
+                    elif largo_derecho == 0 or derecho is None:
+                        tomar_derecho = False
+                    elif inverso:
+                        tomar_derecho = clave(izquierdo.valor) \
+                                        < clave(derecho.valor)
+                    else:
+                        tomar_derecho = clave(derecho.valor) \
+                                        < clave(izquierdo.valor)
+                    if tomar_derecho:
+                        nodo, derecho = derecho, derecho.siguiente()
+                        largo_derecho -= 1
+                    else:
+                        nodo, izquierdo = izquierdo, izquierdo.siguiente()
+                        largo_izquierdo -= 1
+                    if cola is None:
+                        cabeza = nodo
+                    else:
+                        cola.enlazar_a(nodo)
+                    cola = nodo
+                izquierdo = derecho
+            cola.enlazar_a(None)
+            if mezclas == 1:
+                break
+            ancho *= 2
+        cabeza.enlazar_desde(None)
+        self.__cabeza, self.__cola = cabeza, cola
+
     class IteradorL2E:
         "Iterador de lista doblemente enlazada"
 
@@ -387,214 +648,1230 @@ class ListaEnlazada:
         return "ListaEnlazada(%s)" % self
 
 
-class NodoArbolBinario():
-    "Nodo de un árbol binario."
+class ListaEnlazadaCompacta:
+    """Lista doblemente enlazada heterogénea guardada en arreglos paralelos.
 
-    def __init__(self, valor=None):
-        self.valor = valor
-        self.__nodo_padre = None
-        self.__nodo_izquierdo = None
-        self.__nodo_derecho = None
-        self.__repr = False  # Para __repr__
+    Ofrece la interfaz de ListaEnlazada, pero no crea un objeto por nodo:
+    cada elemento ocupa una casilla, con su valor en una lista y sus
+    enlaces en dos 'array' de enteros.  Las casillas liberadas se
+    encadenan en una lista libre y se reutilizan al insertar.
 
-    def padre(self):
-        return self.__nodo_padre
+    Los manejadores son los números de casilla que devuelven anexar,
+    insertar e insertar_despues; su valor se obtiene con valor_en.
+    Como las casillas se reutilizan, un manejador viejo puede terminar
+    apuntando a otro elemento.
 
-    def izquierdo(self):
-        return self.__nodo_izquierdo
+    Las rebanadas son Vistas perezosas como en ListaEnlazada."""
 
-    def derecho(self):
-        return self.__nodo_derecho
+    NULO = -1   # Enlace vacío
+    LIBRE = -2  # Marca de casilla libre en los enlaces anteriores
 
-    def enlazar_a_izquierdo(self, izquierdo):
-        "Enlaza al 'NodoArbolBinario' como el izquierdo"
-        if izquierdo is not None:
-            util.comprobar_tipos("izquierdo", izquierdo, NodoArbolBinario)
-        self.__nodo_izquierdo = izquierdo
-        if izquierdo is not None:
-            izquierdo.__nodo_padre = self
+    def __init__(self, iterable=None):
+        "Se copian los elementos de 'iterable' si se proporciona."
+        self.__valores = []
+        self.__siguientes = array.array("i")
+        self.__anteriores = array.array("i")
+        self.__libre = self.NULO  # Primera casilla libre
+        self.__cabeza = self.__cola = self.NULO
+        self.__longitud = 0
+        if iterable is not None:
+            self.extender(iterable)
+        self.__str = False  # Para __str__
 
-    def enlazar_a_derecho(self, derecho):
-        "Enlaza al 'NodoArbolBinario' como el derecho"
-        if derecho is not None:
-            util.comprobar_tipos("derecho", derecho, NodoArbolBinario)
-        self.__nodo_derecho = derecho
-        if derecho is not None:
-            derecho.__nodo_padre = self
+    def __len__(self): return self.__longitud
 
-    def desenlazar_padre(self):
-        "Desenlaza el 'NodoArbolBinario' padre."
-        " También desenlaza este nodo en el padre."
-        if self.__nodo_padre is not None:
-            if self == self.__nodo_padre.__nodo_izquierdo:
-                self.__nodo_padre.__nodo_izquierdo = None
-            elif self == self.__nodo_padre.__nodo_derecho:
-                self.__nodo_padre.__nodo_derecho = None
-            self.__nodo_padre = None
+    largo = __len__
 
-    def __repr__(self):
-        if self.__repr:
-            return "..."
-        else:
-            self.__repr = True
-            resultado = "NodoArbolBinario(%r)" % self.valor
-            self.__repr = False
-            return resultado
+    def __validar_indice(self, indice):
+        if indice < 0 or indice >= self.__longitud:
+            raise IndexError(str(indice))
 
-class ArbolBinario:
+    def __obtener_casilla(self, indice):
+        self.__validar_indice(indice)
+        if indice < self.__longitud // 2:
+            casilla = self.__cabeza
+            for i in range(indice):
+                casilla = self.__siguientes[casilla]
+        else:
+            casilla = self.__cola
+            for i in range(self.__longitud - 1 - indice):
+                casilla = self.__anteriores[casilla]
+        return casilla
 
-    PREORDEN = -1
-    INORDEN = 0
-    POSTORDEN = 1
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            rango = range(*indice.indices(self.__longitud))
+            return Vista(self, lambda lista, i: lista[rango[i]],
+                         lambda lista: len(rango),
+                         lambda lista: lista.__recorrer(rango))
+        return self.__valores[self.__obtener_casilla(indice)]
 
-    ERROR_VALOR_INEXISTENTE = "El valor no está presente en el árbol: "
+    obtener = __getitem__
 
-    def __init__(self, iterable=None):
-        #"Se copian los elementos de 'iterable' si se proporciona."
-        self.__raiz = None
-        self._ultimo_padre = None
-        self._ultimo_nodo = None
-        if iterable is not None:
-            self.extender(iterable)
+    def __recorrer(self, rango):
+        "Itera los valores en las posiciones del rango siguiendo los enlaces."
+        restantes = len(rango)
+        if restantes == 0:
+            return
+        casilla = self.__obtener_casilla(rango[0])
+        if rango.step > 0:
+            enlaces = self.__siguientes
+        else:
+            enlaces = self.__anteriores
+        saltos = abs(rango.step) - 1
+        while True:
+            yield self.__valores[casilla]
+            restantes -= 1
+            if restantes == 0:
+                return
+            casilla = enlaces[casilla]
+            if saltos:
+                for i in range(saltos):
+                    casilla = enlaces[casilla]
 
-    def __len__(self):
-        cuenta = -1
-        # Preorden es más eficiente
-        for cuenta, ignorar in enumerate(self.preorden()):
-            pass
-        return cuenta + 1
+    def __setitem__(self, indice, valor):
+        if isinstance(indice, slice):
+            raise NotImplementedError("sin soporte para asignar a 'slice'")
+        self.__valores[self.__obtener_casilla(indice)] = valor
 
-    tamano = __len__
+    cambiar = __setitem__
 
-    def __buscar_padre(self, valor, raiz=None):
-        """Busca el padre que tendría un nodo con el 'valor' dado.
+    def __nueva_casilla(self, valor, anterior, siguiente):
+        "Ocupa una casilla, libre si la hay, y la enlaza entre las dadas."
+        casilla = self.__libre
+        if casilla != self.NULO:
+            self.__libre = self.__siguientes[casilla]
+            self.__valores[casilla] = valor
+            self.__anteriores[casilla] = anterior
+            self.__siguientes[casilla] = siguiente
+        else:
+            casilla = len(self.__valores)
+            self.__valores.append(valor)
+            self.__anteriores.append(anterior)
+            self.__siguientes.append(siguiente)
+        if anterior != self.NULO:
+            self.__siguientes[anterior] = casilla
+        else:
+            self.__cabeza = casilla
+        if siguiente != self.NULO:
+            self.__anteriores[siguiente] = casilla
+        else:
+            self.__cola = casilla
+        self.__longitud += 1
+        return casilla
+
+    def __liberar_casilla(self, casilla):
+        "Desenlaza la casilla, la agrega a la lista libre y devuelve su valor."
+        anterior = self.__anteriores[casilla]
+        siguiente = self.__siguientes[casilla]
+        if anterior != self.NULO:
+            self.__siguientes[anterior] = siguiente
+        else:
+            self.__cabeza = siguiente
+        if siguiente != self.NULO:
+            self.__anteriores[siguiente] = anterior
+        else:
+            self.__cola = anterior
+        valor = self.__valores[casilla]
+        self.__valores[casilla] = None  # No retener referencias
+        self.__anteriores[casilla] = self.LIBRE
+        self.__siguientes[casilla] = self.__libre
+        self.__libre = casilla
+        self.__longitud -= 1
+        return valor
 
-        Devuelve un par (tuple) con el padre respectivo en este
-        arbol binario, buscando el hijo a partir de 'raiz', y un entero
-        entre -1, 0 y 1 que indique en qué posición iría el nodo
-        con el valor dado como hijo.
+    def anexar(self, valor):
+        return self.__nueva_casilla(valor, self.__cola, self.NULO)
 
-        Para la izquierda, devuelve -1.  Para la derecha, devuelve 1.
-        Devuelve (None, 0) cuando no hay padre para un nodo con tal valor.
-        El último caso implica que el nodo correspondería a la raíz.
+    append = anexar
 
-        En cualquier caso, el nodo con tal valor podría o no existir
-        actualmente en el árbol.
+    def insertar(self, indice, valor=None):
         """
-        if raiz is not None:
-            padre = raiz.padre()
-            hijo = raiz
-        else:
-            padre = None
-            hijo = self.__raiz
-        while hijo is not None:
-            if valor == hijo.valor:
-                break
-            padre = hijo
-            if valor < padre.valor:
-                hijo = padre.izquierdo()
-            elif valor > padre.valor:
-                hijo = padre.derecho()
-            else:
-                raise TypeError("valor no ordenado")
-        if padre is None:
-            posicion = 0
-        elif valor < padre.valor:
-            posicion = -1
-        else:
-            posicion = 1
-        return padre, posicion
+        insertar(valor), inserta al comienzo
+        insertar(indice, valor), inserta en la posición indicada
+        Véase ListaEnlazada.insertar acerca de los valores nulos.
+        """
+        if valor is None:
+            valor = indice
+            indice = 0
+        if indice == self.__longitud:
+            return self.anexar(valor)
+        siguiente = self.__obtener_casilla(indice)
+        return self.__nueva_casilla(valor, self.__anteriores[siguiente],
+                                    siguiente)
 
-    def __buscar(self, valor):
-        "Obtiene el nodo cuyo valor se compara igual con el valor dado."
-        padre, posicion = self.__buscar_padre(valor)
-        if padre is None:
-            nodo_encontrado = self.__raiz
-        elif posicion == -1:
-            nodo_encontrado = padre.izquierdo()
-        else:
-            nodo_encontrado = padre.derecho()
-        return nodo_encontrado
+    def __validar_casilla(self, casilla):
+        "Comprueba, en lo posible, que el manejador sea de esta lista."
+        util.comprobar_tipos("casilla", casilla, int)
+        if casilla < 0 or casilla >= len(self.__valores) \
+            or self.__anteriores[casilla] == self.LIBRE:
+            raise ValueError("La casilla no pertenece a la lista")
 
-    def buscar(self, valor):
-        """Obtiene el elemento que se compare igual con el valor dado.
+    def valor_en(self, casilla):
+        "Devuelve el valor guardado en la casilla dada (un manejador)."
+        self.__validar_casilla(casilla)
+        return self.__valores[casilla]
 
-        Devuelve None si no se encuentra dicho elemento."""
-        nodo_encontrado = self.__buscar(valor)
-        return nodo_encontrado.valor if nodo_encontrado is not None else None
+    def insertar_despues(self, casilla, valor):
+        """Inserta 'valor' justo después de la casilla dada en tiempo constante.
 
-    def __insertar_aux(self, nodo, valor, cambiar):
-        "Si cambiar es True, levanta KeyError, de lo contrario cambia"
-        " el valor del nodo por 'valor' y devuelve el valor anterior."
-        " El nodo no puede ser None."
-        if not cambiar:
-            raise KeyError("El valor ya está presente en el árbol: %s == %s"
-                           % (valor, nodo.valor))
-        self._ultimo_nodo = None  # Si no hay adición (pero cambio), señalizarlo
-        anterior, nodo.valor = nodo.valor, valor
-        return anterior
+        'casilla' debe ser un manejador de esta lista.  Devuelve la nueva."""
+        self.__validar_casilla(casilla)
+        return self.__nueva_casilla(valor, casilla, self.__siguientes[casilla])
 
-    def insertar(self, valor, cambiar=False):
-        """Inserta el valor en el árbol binario.
+    def remover_nodo(self, casilla):
+        """Remueve de la lista la casilla dada en tiempo constante.
 
-        Si el valor ya está presente y cambiar es False, levanta una
-        excepción KeyError.  Si cambiar es True, cambia el elemento
-        por el valor dado y devuelve el elemento anterior.
-        Si cambiar es False y la inserción tiene éxito devuelve None.
-        """
-        padre, posicion = self.__buscar_padre(valor)
-        anterior = None
-        if padre is None:
-            if self.__raiz is None:
-                self.__raiz = self._ultimo_nodo = NodoArbolBinario(valor)
-            else:
-                anterior = self.__insertar_aux(self.__raiz, valor, cambiar)
-        elif posicion == -1:
-            if padre.izquierdo() is None:
-                self._ultimo_nodo = NodoArbolBinario(valor)
-                padre.enlazar_a_izquierdo(self._ultimo_nodo)
-            else:
-                anterior = self.__insertar_aux(padre.izquierdo(),
-                                               valor, cambiar)
-        else:
-            if padre.derecho() is None:
-                self._ultimo_nodo = NodoArbolBinario(valor)
-                padre.enlazar_a_derecho(self._ultimo_nodo)
-            else:
-                anterior = self.__insertar_aux(padre.derecho(), valor, cambiar)
-        return anterior if cambiar else None
+        'casilla' debe ser un manejador de esta lista.  Devuelve su valor."""
+        self.__validar_casilla(casilla)
+        return self.__liberar_casilla(casilla)
 
-    insert = insertar
+    def extraer_ultimo(self):
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        return self.__liberar_casilla(self.__cola)
 
-    def agregar(self, valor):
-        "Agrega el valor al árbol. Levanta KeyError si ya está presente."
-        self.insertar(valor, cambiar=False)
+    def extraer(self, indice=None):
+        if indice is None:
+            indice = 0
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        return self.__liberar_casilla(self.__obtener_casilla(indice))
 
-    add = agregar
+    pop = extraer
 
-    def cambiar(self, valor_viejo, valor_nuevo):
-        """Cambiar el valor del nodo con el valor viejo por el valor nuevo.
+    def __delitem__(self, indice):
+        self.extraer(indice)
 
-        Devuelve el valor anterior."""
-        nodo = self.__buscar(valor_viejo)
-        if nodo is None:
-            raise KeyError(self.ERROR_VALOR_INEXISTENTE + str(valor_viejo))
-        return self.__insertar_aux(nodo, valor_nuevo, cambiar=True)
+    def remover(self, valor):
+        casilla = self.__cabeza
+        while casilla != self.NULO:
+            if self.__valores[casilla] == valor:
+                self.__liberar_casilla(casilla)
+                return
+            casilla = self.__siguientes[casilla]
+        raise ValueError("El valor no se encuentra en la lista: "
+                         + str(valor))
 
-    def extender(self, iterable):
-        "Inserta los elementos de iterable en el árbol, eliminando duplicados."
+    remove = remover
+
+    def __iadd__(self, iterable):
+        "Anexa todos los elementos de iterable a la lista"
         for valor in iterable:
-            self.insertar(valor, cambiar=True)
+            self.__nueva_casilla(valor, self.__cola, self.NULO)
+        return self
 
+    extender = __iadd__
     extend = extender
 
-    def __minmax_nodo(self, padre, posicion):
-        if padre is None:
-            return None
-        if posicion == -1:
-            lado = NodoArbolBinario.izquierdo
-        else:
-            lado = NodoArbolBinario.derecho
+    def __add__(self, lista):
+        if not isinstance(lista, ListaEnlazadaCompacta):
+            return NotImplemented
+        union = ListaEnlazadaCompacta()
+        union += self
+        union += lista
+        return union
+
+    # Véase la documentación de estas funciones en utilidades.py
+    indice = util.indice
+    index = indice
+
+    buscar = util.buscar
+
+    buscar_por_atributo = util.buscar_por_atributo
+
+    def vaciar(self):
+        "Vacía la lista y libera sus arreglos"
+        self.__valores = []
+        self.__siguientes = array.array("i")
+        self.__anteriores = array.array("i")
+        self.__libre = self.NULO
+        self.__cabeza = self.__cola = self.NULO
+        self.__longitud = 0
+
+    clear = vaciar
+
+    def copiar(self):
+        """Realiza una copia plana de la lista.
+
+        La copia ocupa casillas contiguas en el orden de la lista, por lo
+        que los manejadores de la original no sirven para la copia."""
+        return ListaEnlazadaCompacta(self)
+
+    copy = copiar
+
+    def ordenar(self, clave=None, inverso=False):
+        """Ordena la lista en su lugar, de forma estable, como list.sort.
+
+        Véase ListaEnlazada.ordenar: solo se reescriben los enlaces, así
+        que las casillas siguen siendo manejadores válidos."""
+        if self.__longitud < 2:
+            return
+        if clave is None:
+            clave = lambda valor: valor
+        NULO = self.NULO
+        valores = self.__valores
+        siguientes, anteriores = self.__siguientes, self.__anteriores
+        cabeza = self.__cabeza
+        ancho = 1
+        while True:
+            izquierdo, cabeza, cola, mezclas = cabeza, NULO, NULO, 0
+            while izquierdo != NULO:
+                mezclas += 1
+                derecho, largo_izquierdo = izquierdo, 0
+                while largo_izquierdo < ancho and derecho != NULO:
+                    derecho = siguientes[derecho]
+                    largo_izquierdo += 1
+                largo_derecho = ancho
+                while largo_izquierdo > 0 \
+                    or largo_derecho > 0 and derecho != NULO:
+                    if largo_izquierdo == 0:
+                        tomar_derecho = True
+                    elif largo_derecho == 0 or derecho == NULO:
+                        tomar_derecho = False
+                    elif inverso:
+                        tomar_derecho = clave(valores[izquierdo]) \
+                                        < clave(valores[derecho])
+                    else:
+                        tomar_derecho = clave(valores[derecho]) \
+                                        < clave(valores[izquierdo])
+                    if tomar_derecho:
+                        casilla, derecho = derecho, siguientes[derecho]
+                        largo_derecho -= 1
+                    else:
+                        casilla, izquierdo = izquierdo, siguientes[izquierdo]
+                        largo_izquierdo -= 1
+                    if cola == NULO:
+                        cabeza = casilla
+                    else:
+                        siguientes[cola] = casilla
+                    anteriores[casilla] = cola
+                    cola = casilla
+                izquierdo = derecho
+            siguientes[cola] = NULO
+            if mezclas == 1:
+                break
+            ancho *= 2
+        self.__cabeza, self.__cola = cabeza, cola
+
+    class IteradorL2E:
+        "Iterador de lista doblemente enlazada compacta"
+
+        def __init__(self, lista, adelante=True, nodos=False):
+            """'adelante' indica la dirección de iteración
+
+            Con 'nodos' se obtienen las casillas en lugar de los valores."""
+            util.comprobar_tipos("lista", lista, ListaEnlazadaCompacta)
+            self.__lista = lista
+            self.__nodos = nodos
+            if adelante:
+                self.__casilla = lista._ListaEnlazadaCompacta__cabeza
+                self.__enlaces = lista._ListaEnlazadaCompacta__siguientes
+            else:
+                self.__casilla = lista._ListaEnlazadaCompacta__cola
+                self.__enlaces = lista._ListaEnlazadaCompacta__anteriores
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            casilla = self.__casilla
+            if casilla == ListaEnlazadaCompacta.NULO:
+                raise StopIteration()
+            self.__casilla = self.__enlaces[casilla]
+            if self.__nodos:
+                return casilla
+            return self.__lista._ListaEnlazadaCompacta__valores[casilla]
+
+    def __iter__(self):
+        "Devuelve un iterador eficiente sobre la lista enlazada."
+        return self.IteradorL2E(self)
+
+    def __reversed__(self):
+        "Devuelve un iterador reverso eficiente sobre la lista enlazada."
+        return self.IteradorL2E(self, adelante=False)
+
+    def __str__(self):
+        if self.__str:
+            # Protección contra llamadas recursivas
+            return "[...]"
+        else:
+            self.__str = True
+            resultado = "[%s]" % ", ".join(map(repr, self))
+            self.__str = False
+            return resultado
+
+    def __repr__(self):
+        return "ListaEnlazadaCompacta(%s)" % self
+
+
+def fusionar_ordenadas(*listas, clave=None, inverso=False):
+    """Devuelve una VistaSecuencial que mezcla, sin copiarlas, las listas o
+    iterables ya ordenados con la misma 'clave' e 'inverso'.
+
+    Es estable: a igual clave, los elementos de las primeras listas van
+    antes.  Cada recorrido toma O(n log k) para n elementos en k listas;
+    las listas deben poder recorrerse varias veces."""
+    return VistaSecuencial(listas, lambda listas: heapq.merge(
+        *listas, key=clave, reverse=inverso))
+
+
+class NodoListaDeSaltos:
+    """Nodo de una lista de saltos.
+
+    'siguientes[n]' es el siguiente nodo en el nivel n, y 'anchos[n]'
+    cuántas posiciones avanza ese enlace.  'anterior' enlaza solo
+    el nivel inferior, para recorrer la lista en reversa."""
+
+    __slots__ = ("valor", "siguientes", "anchos", "anterior")
+
+    def __init__(self, valor, niveles):
+        self.valor = valor
+        self.siguientes = [None] * niveles
+        self.anchos = [0] * niveles
+        self.anterior = None
+
+    def __repr__(self):
+        return "NodoListaDeSaltos(%r)" % (self.valor,)
+
+class ListaDeSaltos:
+    """Lista de saltos indexable (skip list), secuencia heterogénea.
+
+    Ofrece la misma interfaz que ListaEnlazada, pero el acceso, el cambio,
+    la inserción y la extracción por índice toman O(log n) esperado en
+    lugar de O(n).  Cada nodo sube de nivel con probabilidad 1/2 y sus
+    enlaces guardan cuántas posiciones saltan."""
+
+    NIVEL_MAXIMO = 32
+
+    def __init__(self, iterable=None):
+        "Se copian los elementos de 'iterable' si se proporciona."
+        self.__cabeza = NodoListaDeSaltos(None, self.NIVEL_MAXIMO)
+        self.__cola = None
+        self.__niveles = 1  # Niveles en uso
+        self.__longitud = 0
+        self.__cabeza.anchos[0] = 1  # Hasta el final, una posición más allá
+        if iterable is not None:
+            self.extender(iterable)
+        self.__str = False  # Para __str__
+
+    def __len__(self): return self.__longitud
+
+    largo = __len__
+
+    def __validar_indice(self, indice):
+        if indice < 0 or indice >= self.__longitud:
+            raise IndexError(str(indice))
+
+    def __buscar_anteriores(self, indice):
+        """Obtiene, por nivel, el último nodo antes de la posición dada.
+
+        Devuelve dos listas: los nodos y sus posiciones.  La cabeza
+        tiene la posición -1."""
+        anteriores = [None] * self.__niveles
+        posiciones = [0] * self.__niveles
+        nodo = self.__cabeza
+        posicion = -1
+        for nivel in range(self.__niveles - 1, -1, -1):
+            while nodo.siguientes[nivel] is not None \
+                and posicion + nodo.anchos[nivel] < indice:
+                posicion += nodo.anchos[nivel]
+                nodo = nodo.siguientes[nivel]
+            anteriores[nivel] = nodo
+            posiciones[nivel] = posicion
+        return anteriores, posiciones
+
+    def __obtener_nodo(self, indice):
+        self.__validar_indice(indice)
+        nodo = self.__cabeza
+        posicion = -1
+        for nivel in range(self.__niveles - 1, -1, -1):
+            while nodo.siguientes[nivel] is not None \
+                and posicion + nodo.anchos[nivel] <= indice:
+                posicion += nodo.anchos[nivel]
+                nodo = nodo.siguientes[nivel]
+        return nodo
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            raise NotImplementedError("sin soporte para 'slice'")
+        return self.__obtener_nodo(indice).valor
+
+    obtener = __getitem__
+
+    def __setitem__(self, indice, valor):
+        if isinstance(indice, slice):
+            raise NotImplementedError("sin soporte para 'slice'")
+        self.__obtener_nodo(indice).valor = valor
+
+    cambiar = __setitem__
+
+    def __nivel_aleatorio(self):
+        niveles = 1
+        while niveles < self.NIVEL_MAXIMO and random.random() < 0.5:
+            niveles += 1
+        return niveles
+
+    def __insertar(self, indice, valor):
+        "Inserta el valor para que quede en la posición 'indice'."
+        if indice < 0 or indice > self.__longitud:
+            raise IndexError(str(indice))
+        niveles = self.__nivel_aleatorio()
+        while self.__niveles < niveles:
+            self.__cabeza.anchos[self.__niveles] = self.__longitud + 1
+            self.__niveles += 1
+        anteriores, posiciones = self.__buscar_anteriores(indice)
+        nuevo = NodoListaDeSaltos(valor, niveles)
+        for nivel in range(niveles):
+            anterior = anteriores[nivel]
+            nuevo.siguientes[nivel] = anterior.siguientes[nivel]
+            nuevo.anchos[nivel] = \
+                posiciones[nivel] + anterior.anchos[nivel] - indice + 1
+            anterior.siguientes[nivel] = nuevo
+            anterior.anchos[nivel] = indice - posiciones[nivel]
+        for nivel in range(niveles, self.__niveles):
+            anteriores[nivel].anchos[nivel] += 1
+        if anteriores[0] is not self.__cabeza:
+            nuevo.anterior = anteriores[0]
+        if nuevo.siguientes[0] is not None:
+            nuevo.siguientes[0].anterior = nuevo
+        else:
+            self.__cola = nuevo
+        self.__longitud += 1
+
+    def anexar(self, valor):
+        self.__insertar(self.__longitud, valor)
+
+    append = anexar
+
+    def insertar(self, indice, valor=None):
+        """
+        insertar(valor), inserta al comienzo
+        insertar(indice, valor), inserta en la posición indicada
+        Véase ListaEnlazada.insertar acerca de los valores nulos.
+        """
+        if valor is None:
+            valor = indice
+            indice = 0
+        self.__insertar(indice, valor)
+
+    def extraer(self, indice=None):
+        if indice is None:
+            indice = 0
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        self.__validar_indice(indice)
+        anteriores, ignorar = self.__buscar_anteriores(indice)
+        a_extraer = anteriores[0].siguientes[0]
+        niveles = len(a_extraer.siguientes)
+        for nivel in range(niveles):
+            anterior = anteriores[nivel]
+            anterior.siguientes[nivel] = a_extraer.siguientes[nivel]
+            anterior.anchos[nivel] += a_extraer.anchos[nivel] - 1
+        for nivel in range(niveles, self.__niveles):
+            anteriores[nivel].anchos[nivel] -= 1
+        if a_extraer.siguientes[0] is not None:
+            a_extraer.siguientes[0].anterior = a_extraer.anterior
+        else:
+            self.__cola = a_extraer.anterior
+        while self.__niveles > 1 \
+            and self.__cabeza.siguientes[self.__niveles - 1] is None:
+            self.__niveles -= 1
+        self.__longitud -= 1
+        return a_extraer.valor
+
+    pop = extraer
+
+    def extraer_ultimo(self):
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        return self.extraer(self.__longitud - 1)
+
+    def __delitem__(self, indice):
+        self.extraer(indice)
+
+    def remover(self, valor):
+        indice = self.indice(valor)
+        if indice == -1:
+            raise ValueError("El valor no se encuentra en la lista: "
+                             + str(valor))
+        self.extraer(indice)
+
+    remove = remover
+
+    def __iadd__(self, iterable):
+        "Anexa todos los elementos de iterable a la lista"
+        for valor in iterable:
+            self.anexar(valor)
+        return self
+
+    extender = __iadd__
+    extend = extender
+
+    def __add__(self, lista):
+        if not isinstance(lista, ListaDeSaltos):
+            return NotImplemented
+        union = ListaDeSaltos()
+        union += self
+        union += lista
+        return union
+
+    # Véase la documentación de estas funciones en utilidades.py
+    indice = util.indice
+    index = indice
+
+    buscar = util.buscar
+
+    buscar_por_atributo = util.buscar_por_atributo
+
+    def vaciar(self):
+        "Vacía la lista"
+        self.__cabeza = NodoListaDeSaltos(None, self.NIVEL_MAXIMO)
+        self.__cabeza.anchos[0] = 1
+        self.__cola = None
+        self.__niveles = 1
+        self.__longitud = 0
+
+    clear = vaciar
+
+    def copiar(self):
+        """Realiza una copia plana de la lista.
+
+        Los nodos de la copia son independientes de la lista original,
+        pero no necesariamente los valores.
+        """
+        return ListaDeSaltos(self)
+
+    copy = copiar
+
+    def __iter__(self):
+        "Devuelve un iterador sobre la lista por su nivel inferior."
+        nodo = self.__cabeza.siguientes[0]
+        while nodo is not None:
+            yield nodo.valor
+            nodo = nodo.siguientes[0]
+
+    def __reversed__(self):
+        "Devuelve un iterador reverso sobre la lista."
+        nodo = self.__cola
+        while nodo is not None:
+            yield nodo.valor
+            nodo = nodo.anterior
+
+    def __str__(self):
+        if self.__str:
+            # Protección contra llamadas recursivas
+            return "[...]"
+        else:
+            self.__str = True
+            resultado = "[%s]" % ", ".join(map(repr, self))
+            self.__str = False
+            return resultado
+
+    def __repr__(self):
+        return "ListaDeSaltos(%s)" % self
+
+
+class ArregloCircular:
+    """Arreglo circular que crece según se necesite, secuencia heterogénea.
+
+    Ofrece la interfaz de ListaEnlazada.  Anexar y extraer por cualquiera
+    de los extremos toman O(1) amortizado y el acceso por índice O(1),
+    sin crear un nodo por elemento.  Insertar o extraer en medio toma O(n).
+    """
+
+    CAPACIDAD_MINIMA = 8  # Siempre una potencia de 2
+
+    def __init__(self, iterable=None):
+        "Se copian los elementos de 'iterable' si se proporciona."
+        self.__datos = [None] * self.CAPACIDAD_MINIMA
+        self.__inicio = 0
+        self.__longitud = 0
+        if iterable is not None:
+            self.extender(iterable)
+        self.__str = False  # Para __str__
+
+    def __len__(self): return self.__longitud
+
+    largo = __len__
+
+    def __validar_indice(self, indice):
+        if indice < 0 or indice >= self.__longitud:
+            raise IndexError(str(indice))
+
+    def __posicion(self, indice):
+        "Posición en el arreglo de datos del elemento con el índice dado."
+        return (self.__inicio + indice) & (len(self.__datos) - 1)
+
+    def __redimensionar(self, capacidad):
+        datos = [None] * capacidad
+        for i in range(self.__longitud):
+            datos[i] = self.__datos[self.__posicion(i)]
+        self.__datos = datos
+        self.__inicio = 0
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            raise NotImplementedError("sin soporte para 'slice'")
+        self.__validar_indice(indice)
+        return self.__datos[self.__posicion(indice)]
+
+    obtener = __getitem__
+
+    def __setitem__(self, indice, valor):
+        if isinstance(indice, slice):
+            raise NotImplementedError("sin soporte para 'slice'")
+        self.__validar_indice(indice)
+        self.__datos[self.__posicion(indice)] = valor
+
+    cambiar = __setitem__
+
+    # anexar, extraer_ultimo y extraer(0) son el uso típico de Pila y Cola,
+    # por lo que calculan las posiciones sin llamar a __posicion
+    def anexar(self, valor):
+        datos = self.__datos
+        if self.__longitud == len(datos):
+            self.__redimensionar(2 * len(datos))
+            datos = self.__datos
+        datos[(self.__inicio + self.__longitud) & (len(datos) - 1)] = valor
+        self.__longitud += 1
+
+    append = anexar
+
+    def insertar(self, indice, valor=None):
+        """
+        insertar(valor), inserta al comienzo
+        insertar(indice, valor), inserta en la posición indicada
+        Véase ListaEnlazada.insertar acerca de los valores nulos.
+        """
+        if valor is None:
+            valor = indice
+            indice = 0
+        if indice < 0 or indice > self.__longitud:
+            raise IndexError(str(indice))
+        if self.__longitud == len(self.__datos):
+            self.__redimensionar(2 * len(self.__datos))
+        if indice == 0:
+            self.__inicio = (self.__inicio - 1) & (len(self.__datos) - 1)
+        else:
+            for i in range(self.__longitud, indice, -1):
+                self.__datos[self.__posicion(i)] = \
+                    self.__datos[self.__posicion(i - 1)]
+        self.__datos[self.__posicion(indice)] = valor
+        self.__longitud += 1
+
+    def extraer_ultimo(self):
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        self.__longitud -= 1
+        datos = self.__datos
+        posicion = (self.__inicio + self.__longitud) & (len(datos) - 1)
+        valor = datos[posicion]
+        datos[posicion] = None  # No retener referencias
+        return valor
+
+    def extraer(self, indice=None):
+        if self.__longitud == 0:
+            raise IndexError("la lista está vacía")
+        if indice is None or indice == 0:
+            datos = self.__datos
+            valor = datos[self.__inicio]
+            datos[self.__inicio] = None
+            self.__inicio = (self.__inicio + 1) & (len(datos) - 1)
+            self.__longitud -= 1
+            return valor
+        self.__validar_indice(indice)
+        if indice == self.__longitud - 1:
+            return self.extraer_ultimo()
+        valor = self.__datos[self.__posicion(indice)]
+        for i in range(indice, self.__longitud - 1):
+            self.__datos[self.__posicion(i)] = \
+                self.__datos[self.__posicion(i + 1)]
+        self.__datos[self.__posicion(self.__longitud - 1)] = None
+        self.__longitud -= 1
+        return valor
+
+    pop = extraer
+
+    def __delitem__(self, indice):
+        self.extraer(indice)
+
+    def remover(self, valor):
+        indice = self.indice(valor)
+        if indice == -1:
+            raise ValueError("El valor no se encuentra en la lista: "
+                             + str(valor))
+        self.extraer(indice)
+
+    remove = remover
+
+    def __iadd__(self, iterable):
+        "Anexa todos los elementos de iterable a la lista"
+        for valor in iterable:
+            self.anexar(valor)
+        return self
+
+    extender = __iadd__
+    extend = extender
+
+    def __add__(self, lista):
+        if not isinstance(lista, ArregloCircular):
+            return NotImplemented
+        union = ArregloCircular()
+        union += self
+        union += lista
+        return union
+
+    # Véase la documentación de estas funciones en utilidades.py
+    indice = util.indice
+    index = indice
+
+    buscar = util.buscar
+
+    buscar_por_atributo = util.buscar_por_atributo
+
+    def vaciar(self):
+        "Vacía el arreglo"
+        self.__datos = [None] * self.CAPACIDAD_MINIMA
+        self.__inicio = 0
+        self.__longitud = 0
+
+    clear = vaciar
+
+    def copiar(self):
+        "Realiza una copia plana del arreglo."
+        return ArregloCircular(self)
+
+    copy = copiar
+
+    def __iter__(self):
+        "Devuelve un iterador sobre el arreglo."
+        for i in range(self.__longitud):
+            yield self.__datos[self.__posicion(i)]
+
+    def __reversed__(self):
+        "Devuelve un iterador reverso sobre el arreglo."
+        for i in range(self.__longitud - 1, -1, -1):
+            yield self.__datos[self.__posicion(i)]
+
+    def __str__(self):
+        if self.__str:
+            # Protección contra llamadas recursivas
+            return "[...]"
+        else:
+            self.__str = True
+            resultado = "[%s]" % ", ".join(map(repr, self))
+            self.__str = False
+            return resultado
+
+    def __repr__(self):
+        return "ArregloCircular(%s)" % self
+
+
+class NodoArbolBinario():
+    """Nodo de un árbol binario.  'tamano' es la cantidad de nodos del subárbol.
+
+    'clave' es lo que se compara para ordenar los nodos; por omisión
+    es el propio valor.  'generacion' identifica la versión del árbol
+    que puede modificar el nodo (véase ArbolBinario.instantanea)."""
+
+    __slots__ = ("valor", "clave", "tamano", "generacion", "__nodo_padre",
+                 "__nodo_izquierdo", "__nodo_derecho")
+
+    def __init__(self, valor=None, clave=None):
+        self.valor = valor
+        self.clave = valor if clave is None else clave
+        self.tamano = 1
+        self.generacion = 0
+        self.__nodo_padre = None
+        self.__nodo_izquierdo = None
+        self.__nodo_derecho = None
+
+    def padre(self):
+        return self.__nodo_padre
+
+    def izquierdo(self):
+        return self.__nodo_izquierdo
+
+    def derecho(self):
+        return self.__nodo_derecho
+
+    def enlazar_a_izquierdo(self, izquierdo):
+        "Enlaza al 'NodoArbolBinario' como el izquierdo"
+        if izquierdo is not None:
+            util.comprobar_tipos("izquierdo", izquierdo, NodoArbolBinario)
+        self.__nodo_izquierdo = izquierdo
+        if izquierdo is not None:
+            izquierdo.__nodo_padre = self
+
+    def enlazar_a_derecho(self, derecho):
+        "Enlaza al 'NodoArbolBinario' como el derecho"
+        if derecho is not None:
+            util.comprobar_tipos("derecho", derecho, NodoArbolBinario)
+        self.__nodo_derecho = derecho
+        if derecho is not None:
+            derecho.__nodo_padre = self
+
+    def desenlazar_padre(self):
+        "Desenlaza el 'NodoArbolBinario' padre."
+        " También desenlaza este nodo en el padre."
+        if self.__nodo_padre is not None:
+            if self == self.__nodo_padre.__nodo_izquierdo:
+                self.__nodo_padre.__nodo_izquierdo = None
+            elif self == self.__nodo_padre.__nodo_derecho:
+                self.__nodo_padre.__nodo_derecho = None
+            self.__nodo_padre = None
+
+    @reprlib.recursive_repr("...")
+    def __repr__(self):
+        return "NodoArbolBinario(%r)" % (self.valor,)
+
+class ArbolBinario:
+    """Árbol binario de búsqueda.
+
+    Se puede usar como conjunto ordenado de valores (insertar, buscar,
+    remover...) o como mapa ordenado con claves separadas de los valores
+    (poner, obtener, quitar...).  En el segundo caso se ordena por las
+    claves, que se comparan directamente sin envolverlas.  Un mismo árbol
+    no debería mezclar ambos usos.  Los iteradores devuelven los valores.
+    """
+
+    PREORDEN = -1
+    INORDEN = 0
+    POSTORDEN = 1
+
+    ERROR_VALOR_INEXISTENTE = "El valor no está presente en el árbol: "
+
+    # Tipo de los nodos creados al insertar.  Las subclases que necesiten
+    # guardar más información en cada nodo pueden cambiarlo.
+    _TIPO_NODO = NodoArbolBinario
+
+    # Contador global de generaciones; cada versión de cada árbol tiene
+    # la suya, así nunca confunde como propios los nodos de otra versión
+    __generaciones = 0
+
+    def __init__(self, iterable=None):
+        #"Se copian los elementos de 'iterable' si se proporciona."
+        self.__raiz = None
+        self.__generacion = self.__nueva_generacion()
+        self._ultimo_padre = None
+        self._ultimo_nodo = None
+        if iterable is not None:
+            self.extender(iterable)
+
+    def __len__(self):
+        return self.__raiz.tamano if self.__raiz is not None else 0
+
+    tamano = __len__
+
+    @staticmethod
+    def __nueva_generacion():
+        ArbolBinario.__generaciones += 1
+        return ArbolBinario.__generaciones
+
+    def __nuevo_nodo(self, valor, clave):
+        "Crea un nodo que pertenece a la versión actual del árbol."
+        nodo = self._TIPO_NODO(valor, clave)
+        nodo.generacion = self.__generacion
+        return nodo
+
+    def __copiar_nodo(self, nodo):
+        "Copia 'nodo' para la versión actual, con los mismos hijos."
+        copia = self.__nuevo_nodo(nodo.valor, nodo.clave)
+        copia.enlazar_a_izquierdo(nodo.izquierdo())
+        copia.enlazar_a_derecho(nodo.derecho())
+        self._actualizar_nodo(copia)
+        self._copiar_datos(nodo, copia)
+        return copia
+
+    def __raiz_propia(self):
+        "Devuelve la raíz, copiándola antes si se comparte con otra versión."
+        raiz = self.__raiz
+        if raiz is not None and raiz.generacion != self.__generacion:
+            raiz = self.__raiz = self.__copiar_nodo(raiz)
+        return raiz
+
+    def _hijo_propio(self, padre, izquierdo):
+        """Devuelve el hijo izquierdo o derecho de 'padre' listo para cambiarlo.
+
+        Si el hijo se comparte con una instantánea, lo reemplaza en
+        'padre' por una copia y devuelve la copia.  'padre' ya debe
+        pertenecer a la versión actual.  Todo nodo que se vaya a modificar
+        debe obtenerse así, desde la raíz; las subclases que roten o
+        cambien nodos por su cuenta deben respetarlo."""
+        hijo = padre.izquierdo() if izquierdo else padre.derecho()
+        if hijo is None or hijo.generacion == self.__generacion:
+            return hijo
+        hijo = self.__copiar_nodo(hijo)
+        if izquierdo:
+            padre.enlazar_a_izquierdo(hijo)
+        else:
+            padre.enlazar_a_derecho(hijo)
+        return hijo
+
+    def instantanea(self):
+        """Devuelve una copia persistente del árbol en tiempo constante.
+
+        La copia y el original comparten todos los nodos.  Desde entonces,
+        cada modificación en cualquiera de los dos copia solo los nodos
+        del camino que cambia, O(log n) en los árboles balanceados, de
+        modo que ninguno ve los cambios del otro.  En los nodos
+        compartidos, 'padre' puede apuntar al de otra versión; los
+        iteradores no lo usan."""
+        copia = type(self)()
+        copia.__raiz = self.__raiz
+        self.__generacion = self.__nueva_generacion()
+        return copia
+
+    snapshot = instantanea
+
+    def __buscar_padre(self, clave, raiz=None, propio=False):
+        """Busca el padre que tendría un nodo con la 'clave' dada.
+
+        Devuelve un par (tuple) con el padre respectivo en este
+        arbol binario, buscando el hijo a partir de 'raiz', y un entero
+        entre -1, 0 y 1 que indique en qué posición iría el nodo
+        con la clave dada como hijo.
+
+        Para la izquierda, devuelve -1.  Para la derecha, devuelve 1.
+        Devuelve (None, 0) cuando no hay padre para un nodo con tal clave.
+        El último caso implica que el nodo correspondería a la raíz.
+
+        En cualquier caso, el nodo con tal clave podría o no existir
+        actualmente en el árbol.
+
+        Si 'propio' es True, el camino recorrido, incluido el nodo con
+        la clave si existe, queda listo para modificarse (véase
+        _hijo_propio).  No admite 'raiz'.
+        """
+        if raiz is not None:
+            padre = raiz.padre()
+            hijo = raiz
+        else:
+            padre = None
+            hijo = self.__raiz_propia() if propio else self.__raiz
+        generacion = self.__generacion if propio else None
+        while hijo is not None:
+            if clave == hijo.clave:
+                break
+            padre = hijo
+            if clave < padre.clave:
+                hijo = padre.izquierdo()
+                izquierdo = True
+            elif clave > padre.clave:
+                hijo = padre.derecho()
+                izquierdo = False
+            else:
+                raise TypeError("valor no ordenado")
+            if propio and hijo is not None and hijo.generacion != generacion:
+                hijo = self._hijo_propio(padre, izquierdo)
+        if padre is None:
+            posicion = 0
+        elif clave < padre.clave:
+            posicion = -1
+        else:
+            posicion = 1
+        return padre, posicion
+
+    def __buscar(self, clave, propio=False):
+        "Obtiene el nodo cuya clave se compara igual con la clave dada."
+        padre, posicion = self.__buscar_padre(clave, propio=propio)
+        if padre is None:
+            nodo_encontrado = self.__raiz
+        elif posicion == -1:
+            nodo_encontrado = padre.izquierdo()
+        else:
+            nodo_encontrado = padre.derecho()
+        return nodo_encontrado
+
+    def buscar(self, valor):
+        """Obtiene el elemento que se compare igual con el valor dado.
+
+        Devuelve None si no se encuentra dicho elemento."""
+        nodo_encontrado = self.__buscar(valor)
+        return nodo_encontrado.valor if nodo_encontrado is not None else None
+
+    def __insertar_aux(self, nodo, clave, valor, cambiar):
+        "Si cambiar es True, levanta KeyError, de lo contrario cambia"
+        " el valor del nodo por 'valor' y devuelve el valor anterior."
+        " El nodo no puede ser None."
+        if not cambiar:
+            raise KeyError("El valor ya está presente en el árbol: %s == %s"
+                           % (valor, nodo.valor))
+        self._ultimo_nodo = None  # Si no hay adición (pero cambio), señalizarlo
+        anterior, nodo.valor = nodo.valor, valor
+        nodo.clave = clave
+        self._cambiado(nodo)
+        return anterior
+
+    def __insertar(self, clave, valor, cambiar):
+        "Véase insertar.  Ordena por 'clave' en lugar de por 'valor'."
+        padre, posicion = self.__buscar_padre(clave, propio=True)
+        anterior = None
+        if padre is None:
+            if self.__raiz is None:
+                self.__raiz = self._ultimo_nodo = self.__nuevo_nodo(valor, clave)
+            else:
+                anterior = self.__insertar_aux(self.__raiz, clave, valor,
+                                               cambiar)
+        elif posicion == -1:
+            if padre.izquierdo() is None:
+                self._ultimo_nodo = self.__nuevo_nodo(valor, clave)
+                padre.enlazar_a_izquierdo(self._ultimo_nodo)
+                self._reparar(padre)
+            else:
+                anterior = self.__insertar_aux(padre.izquierdo(),
+                                               clave, valor, cambiar)
+        else:
+            if padre.derecho() is None:
+                self._ultimo_nodo = self.__nuevo_nodo(valor, clave)
+                padre.enlazar_a_derecho(self._ultimo_nodo)
+                self._reparar(padre)
+            else:
+                anterior = self.__insertar_aux(padre.derecho(),
+                                               clave, valor, cambiar)
+        return anterior if cambiar else None
+
+    def insertar(self, valor, cambiar=False):
+        """Inserta el valor en el árbol binario.
+
+        Si el valor ya está presente y cambiar es False, levanta una
+        excepción KeyError.  Si cambiar es True, cambia el elemento
+        por el valor dado y devuelve el elemento anterior.
+        Si cambiar es False y la inserción tiene éxito devuelve None.
+        """
+        return self.__insertar(valor, valor, cambiar)
+
+    insert = insertar
+
+    def agregar(self, valor):
+        "Agrega el valor al árbol. Levanta KeyError si ya está presente."
+        self.insertar(valor, cambiar=False)
+
+    add = agregar
+
+    def cambiar(self, valor_viejo, valor_nuevo):
+        """Cambiar el valor del nodo con el valor viejo por el valor nuevo.
+
+        Devuelve el valor anterior."""
+        nodo = self.__buscar(valor_viejo, propio=True)
+        if nodo is None:
+            raise KeyError(self.ERROR_VALOR_INEXISTENTE + str(valor_viejo))
+        return self.__insertar_aux(nodo, valor_nuevo, valor_nuevo, cambiar=True)
+
+    def extender(self, iterable):
+        """Inserta los elementos de iterable en el árbol, eliminando duplicados.
+
+        Si el árbol está vacío, se construye balanceado de una vez
+        (véase desde_ordenados)."""
+        if self.__raiz is None:
+            self.__construir(self.__ordenar_pares(
+                (valor, valor) for valor in iterable))
+            return
+        for valor in iterable:
+            self.insertar(valor, cambiar=True)
+
+    extend = extender
+
+    @staticmethod
+    def __ordenar_pares(pares):
+        """Devuelve una lista de los pares (clave, valor) ordenada por clave.
+
+        Si ya vienen ordenados solo se copian.  De cada clave repetida
+        se conserva el último par, como al insertar cambiando."""
+        pares = list(pares)
+        for i in range(1, len(pares)):
+            if not pares[i - 1][0] < pares[i][0]:
+                break
+        else:
+            return pares
+        pares.sort(key=lambda par: par[0])  # Estable: el último queda último
+        unicos = []
+        for par in pares:
+            if len(unicos) != 0 and unicos[-1][0] == par[0]:
+                unicos[-1] = par
+            else:
+                unicos.append(par)
+        return unicos
+
+    def __construir(self, pares):
+        """Reemplaza el contenido por un árbol perfectamente balanceado.
+
+        'pares' debe ser una lista de pares (clave, valor) ordenada por
+        clave y sin claves repetidas.  Toma tiempo lineal."""
+        def construir(inicio, fin):  # Profundidad de recursión logarítmica
+            if inicio >= fin:
+                return None
+            medio = (inicio + fin) // 2
+            clave, valor = pares[medio]
+            nodo = self.__nuevo_nodo(valor, clave)
+            nodo.enlazar_a_izquierdo(construir(inicio, medio))
+            nodo.enlazar_a_derecho(construir(medio + 1, fin))
+            self._actualizar_nodo(nodo)
+            return nodo
+        self.__raiz = construir(0, len(pares))
+
+    @classmethod
+    def desde_ordenados(cls, iterable, pares=False):
+        """Construye un árbol balanceado con los elementos de 'iterable'.
+
+        Si 'pares' es True, los elementos son pares (clave, valor) para
+        el uso como mapa.  Toma tiempo lineal cuando los elementos ya
+        vienen ordenados y sin repetir, como los que se leen por ID;
+        de lo contrario se ordenan primero.  De los repetidos queda
+        el último."""
+        arbol = cls()
+        if not pares:
+            iterable = ((valor, valor) for valor in iterable)
+        arbol.__construir(cls.__ordenar_pares(iterable))
+        return arbol
+
+    def __contains__(self, clave):
+        "Indica si hay un elemento con la clave (o el valor) dado."
+        return self.__buscar(clave) is not None
+
+    def obtener(self, clave, defecto=None):
+        """Obtiene el valor asociado a la clave.
+
+        Devuelve 'defecto' si la clave no está en el árbol.
+        No crea objetos intermedios: la clave se compara tal cual."""
+        nodo = self.__buscar(clave)
+        return nodo.valor if nodo is not None else defecto
+
+    get = obtener
+
+    def poner(self, clave, valor):
+        """Asocia el valor a la clave, reemplazando cualquier valor anterior.
+
+        Devuelve el valor anterior, o None si la clave no estaba."""
+        return self.__insertar(clave, valor, cambiar=True)
+
+    def quitar(self, clave):
+        """Remueve la clave y devuelve su valor asociado.
+
+        Levanta KeyError si la clave no está en el árbol."""
+        return self.__remover(clave)
+
+    def claves(self):
+        "Devuelve un iterador inorden de las claves."
+        return (nodo.clave for nodo in
+                self.IteradorArbolBinario(self, ArbolBinario.INORDEN, True))
+
+    def pares(self):
+        "Devuelve un iterador inorden de los pares (clave, valor)."
+        return ((nodo.clave, nodo.valor) for nodo in
+                self.IteradorArbolBinario(self, ArbolBinario.INORDEN, True))
+
+    def __minmax_nodo(self, padre, posicion, propio=False):
+        "Si 'propio' es True, copia el camino como _hijo_propio."
+        if padre is None:
+            return None
+        if propio:
+            lado = lambda nodo: self._hijo_propio(nodo, posicion == -1)
+        elif posicion == -1:
+            lado = NodoArbolBinario.izquierdo
+        else:
+            lado = NodoArbolBinario.derecho
         hijo = lado(padre)
         while hijo is not None:
             padre = hijo
@@ -613,6 +1890,196 @@ class ArbolBinario:
         nodo = self.__minmax_nodo(self.__raiz, 1)
         return nodo.valor
 
+    def seleccionar(self, indice):
+        """Obtiene el elemento con posición 'indice' en el recorrido inorden.
+
+        Admite índices negativos, como las listas.  Levanta IndexError si
+        el índice está fuera de rango.  Toma un tiempo proporcional a la
+        altura del árbol, sin recorrer los elementos anteriores."""
+        longitud = len(self)
+        if indice < 0:
+            indice += longitud
+        if indice < 0 or indice >= longitud:
+            raise IndexError(str(indice))
+        nodo = self.__raiz
+        while True:
+            izquierdos = self._tamano(nodo.izquierdo())
+            if indice < izquierdos:
+                nodo = nodo.izquierdo()
+            elif indice > izquierdos:
+                indice -= izquierdos + 1
+                nodo = nodo.derecho()
+            else:
+                return nodo.valor
+
+    def posicion(self, clave):
+        """Obtiene la cantidad de elementos con clave menor que la dada.
+
+        En el uso como conjunto, la clave es el propio valor.
+        Si la clave está en el árbol, es su índice en el recorrido inorden
+        (véase seleccionar); si no, es el índice que ocuparía al insertarla.
+        """
+        posicion = 0
+        nodo = self.__raiz
+        while nodo is not None:
+            if clave == nodo.clave:
+                return posicion + self._tamano(nodo.izquierdo())
+            elif clave < nodo.clave:
+                nodo = nodo.izquierdo()
+            elif clave > nodo.clave:
+                posicion += self._tamano(nodo.izquierdo()) + 1
+                nodo = nodo.derecho()
+            else:
+                raise TypeError("valor no ordenado")
+        return posicion
+
+    def rango(self, desde=None, hasta=None):
+        """Devuelve un iterador inorden de los elementos entre dos claves.
+
+        Ambos extremos son inclusivos; None indica que no hay límite.
+        Los subárboles fuera del rango no se recorren, por lo que obtener
+        k elementos toma un tiempo proporcional a la altura más k."""
+        pila = Pila()
+        nodo = self.__raiz
+        while True:
+            while nodo is not None:
+                if desde is not None and nodo.clave < desde:
+                    nodo = nodo.derecho()  # Todo el subárbol izquierdo sobra
+                else:
+                    pila.insertar(nodo)
+                    nodo = nodo.izquierdo()
+            if len(pila) == 0:
+                return
+            nodo = pila.extraer()
+            if hasta is not None and nodo.clave > hasta:
+                return
+            yield nodo.valor
+            nodo = nodo.derecho()
+
+    def __cota(self, clave, menor, estricta):
+        """Obtiene el nodo con la clave más cercana a la dada.
+
+        Busca por debajo de ella si 'menor' es True, y por encima si no.
+        Si 'estricta' es False, una clave igual también sirve."""
+        candidato = None
+        nodo = self.__raiz
+        while nodo is not None:
+            if not estricta and clave == nodo.clave:
+                return nodo
+            if (nodo.clave < clave) if menor else (nodo.clave > clave):
+                candidato = nodo
+                nodo = nodo.derecho() if menor else nodo.izquierdo()
+            else:
+                nodo = nodo.izquierdo() if menor else nodo.derecho()
+        return candidato
+
+    def piso(self, clave):
+        """Obtiene el elemento con la mayor clave menor o igual que la dada.
+
+        Devuelve None si no existe tal elemento.  Lo mismo aplica para
+        techo, predecesor y sucesor."""
+        nodo = self.__cota(clave, menor=True, estricta=False)
+        return nodo.valor if nodo is not None else None
+
+    def techo(self, clave):
+        "Obtiene el elemento con la menor clave mayor o igual que la dada."
+        nodo = self.__cota(clave, menor=False, estricta=False)
+        return nodo.valor if nodo is not None else None
+
+    def predecesor(self, clave):
+        "Obtiene el elemento con la mayor clave estrictamente menor que la dada."
+        nodo = self.__cota(clave, menor=True, estricta=True)
+        return nodo.valor if nodo is not None else None
+
+    def sucesor(self, clave):
+        "Obtiene el elemento con la menor clave estrictamente mayor que la dada."
+        nodo = self.__cota(clave, menor=False, estricta=True)
+        return nodo.valor if nodo is not None else None
+
+    def altura(self):
+        "Devuelve la cantidad de niveles del árbol.  Es 0 si está vacío."
+        altura = 0
+        pila = Pila()
+        if self.__raiz is not None:
+            pila.insertar((self.__raiz, 1))
+        while len(pila) != 0:
+            nodo, nivel = pila.extraer()
+            if nivel > altura:
+                altura = nivel
+            for hijo in (nodo.izquierdo(), nodo.derecho()):
+                if hijo is not None:
+                    pila.insertar((hijo, nivel + 1))
+        return altura
+
+    @staticmethod
+    def _tamano(nodo):
+        return nodo.tamano if nodo is not None else 0
+
+    def _actualizar_nodo(self, nodo):
+        """Recalcula la información que guarda 'nodo' sobre su subárbol.
+
+        Supone que la de sus hijos ya está al día.  Las subclases que
+        guarden más información en los nodos deben extenderlo."""
+        nodo.tamano = 1 + self._tamano(nodo.izquierdo()) \
+                      + self._tamano(nodo.derecho())
+
+    def _copiar_datos(self, origen, copia):
+        """Copia en 'copia' lo que guarda 'origen' y que _actualizar_nodo
+        no puede recalcular desde los hijos.  Se usa al copiar nodos para
+        las instantáneas; las subclases que guarden tal información en
+        los nodos, como un color, deben extenderlo."""
+        pass
+
+    def _reparar(self, nodo):
+        """Actualiza los nodos desde 'nodo' hasta la raíz.
+
+        Se llama tras cada adición o remoción con el nodo más bajo cuyo
+        subárbol cambió.  Los árboles balanceados lo sobrescriben para
+        restablecer el balance en el mismo recorrido."""
+        while nodo is not None:
+            self._actualizar_nodo(nodo)
+            nodo = nodo.padre()
+
+    def _cambiado(self, nodo):
+        """Se llama tras cambiar el valor de 'nodo', ya existente, al
+        insertar con 'cambiar' o con poner.  La forma del árbol no cambia,
+        por lo que no hace nada; los árboles que se reestructuran con cada
+        acceso lo sobrescriben."""
+        pass
+
+    def __rotar(self, nodo, izquierda):
+        "Rota el subárbol de 'nodo' y devuelve la nueva raíz del subárbol."
+        padre = nodo.padre()
+        pivote = self._hijo_propio(nodo, not izquierda)
+        if izquierda:
+            nodo.enlazar_a_derecho(pivote.izquierdo())
+            pivote.enlazar_a_izquierdo(nodo)
+        else:
+            nodo.enlazar_a_izquierdo(pivote.derecho())
+            pivote.enlazar_a_derecho(nodo)
+        if padre is None:
+            self.__raiz = pivote
+            pivote.desenlazar_padre()
+        elif padre.izquierdo() is nodo:
+            padre.enlazar_a_izquierdo(pivote)
+        else:
+            padre.enlazar_a_derecho(pivote)
+        self._actualizar_nodo(nodo)
+        self._actualizar_nodo(pivote)
+        return pivote
+
+    def _rotar_izquierda(self, nodo):
+        """Rota a la izquierda: el hijo derecho de 'nodo' toma su lugar.
+
+        Devuelve la nueva raíz del subárbol."""
+        return self.__rotar(nodo, True)
+
+    def _rotar_derecha(self, nodo):
+        """Rota a la derecha: el hijo izquierdo de 'nodo' toma su lugar.
+
+        Devuelve la nueva raíz del subárbol."""
+        return self.__rotar(nodo, False)
+
     def __remover_nodo(self, a_remover):
         if a_remover is None:
             return None
@@ -628,15 +2095,21 @@ class ArbolBinario:
 
         if otro_lado(a_remover) is not None:
             if este_lado(a_remover) is not None:
-                if este_lado(otro_lado(a_remover)) is None:
-                    enlazar(otro_lado(a_remover), este_lado(a_remover))
-                    reemplazo = otro_lado(a_remover)
+                # Lo que cambie bajo 'a_remover' debe ser de esta versión
+                otro = self._hijo_propio(
+                    a_remover, otro_lado is NodoArbolBinario.izquierdo)
+                if este_lado(otro) is None:
+                    enlazar(otro, este_lado(a_remover))
+                    reemplazo = otro
                 else:
-                    posicion = -1 if este_lado is NodoArbolBinario.derecho \
-                               else 1
-                    extremo = self.__minmax_nodo(otro_lado(a_remover), posicion)
+                    # El extremo es el más cercano a 'a_remover' en orden
+                    posicion = 1 if este_lado is NodoArbolBinario.derecho \
+                               else -1
+                    extremo = self.__minmax_nodo(otro, posicion, propio=True)
                     extremo.valor, a_remover.valor = \
                        a_remover.valor, extremo.valor
+                    extremo.clave, a_remover.clave = \
+                       a_remover.clave, extremo.clave
                     a_remover = extremo
                     self.__remover_nodo(a_remover)  # No es recursivo realmente
                     return a_remover  # Termina aquí. No hay más reemplazo
@@ -645,9 +2118,12 @@ class ArbolBinario:
         else:
             reemplazo = este_lado(a_remover)
         if padre is None:
-            self.__raiz = reemplazo
             if reemplazo is not None:
+                # Su padre debe ser 'a_remover' y no el de otra versión
+                reemplazo = self._hijo_propio(
+                    a_remover, a_remover.izquierdo() is reemplazo)
                 reemplazo.desenlazar_padre()
+            self.__raiz = reemplazo
         else:
             enlazar(padre, reemplazo)
         self._ultimo_nodo = reemplazo
@@ -657,15 +2133,22 @@ class ArbolBinario:
         #a_remover.enlazar_a_derecho(None)
         return a_remover
 
-    def remover(self, valor):
-        "Remueve el valor dado.  Levanta KeyError si no se halla."
-        # ARREGLAR ESTO...
-        a_remover = self.__buscar(valor)
+    def __remover(self, clave):
+        a_remover = self.__buscar(clave, propio=True)
         if a_remover is None:
-            raise KeyError(self.ERROR_VALOR_INEXISTENTE + str(valor))
+            raise KeyError(self.ERROR_VALOR_INEXISTENTE + str(clave))
         a_remover = self.__remover_nodo(a_remover)  # Puede no ser el mismo
+        # El reemplazo puede haber cambiado de hijos; si no hay, el padre
+        if self._ultimo_nodo is not None:
+            self._reparar(self._ultimo_nodo)
+        else:
+            self._reparar(self._ultimo_padre)
         return a_remover.valor
 
+    def remover(self, valor):
+        "Remueve el valor dado.  Levanta KeyError si no se halla."
+        return self.__remover(valor)
+
     remove = remover
 
     def vaciar(self):
@@ -680,7 +2163,10 @@ class ArbolBinario:
         Los nodos de la copia son independientes del árbol original,
         pero no necesariamente los valores.
         """
-        return ArbolBinario(self.preorden())  # Primero los padres
+        copia = type(self)()
+        copia.__construir([(nodo.clave, nodo.valor) for nodo in
+                           self.IteradorArbolBinario(self, nodos=True)])
+        return copia
 
     copy = copiar
 
@@ -692,16 +2178,19 @@ class ArbolBinario:
         def __init__(self, arbol, orden=0, nodos=False):
             util.comprobar_tipos("arbol", arbol, ArbolBinario)
             raiz = arbol._ArbolBinario__raiz
+            # Los recorridos usan una pila explícita en lugar de recursión,
+            # así no dependen de la profundidad del árbol
+            self.__pila = Pila()
             if orden == ArbolBinario.PREORDEN:
-                self.__pila = Pila()
                 if raiz is not None:
                     self.__pila.insertar(raiz)
                 self.__funcion = self.__preorden
             elif orden == ArbolBinario.INORDEN:
-                self.__generador = self.__inorden_generador(raiz)
+                self.__apilar_izquierdos(raiz)
                 self.__funcion = self.__inorden
             elif orden == ArbolBinario.POSTORDEN:
-                self.__generador = self.__postorden_generador(raiz)
+                if raiz is not None:
+                    self.__pila.insertar((raiz, False))
                 self.__funcion = self.__postorden
             else:
                 raise ValueError("Orden de recorrido inválido: " + str(orden))
@@ -709,65 +2198,561 @@ class ArbolBinario:
 
         def __iter__(self): return self
 
-        def __next__(self):
-            if self.__nodos:
-                return self.__funcion()
+        def __next__(self):
+            if self.__nodos:
+                return self.__funcion()
+            else:
+                return self.__funcion().valor
+
+        def __preorden(self):
+            if len(self.__pila) == 0:
+                raise StopIteration()
+            procesado = self.__pila.extraer()
+            if procesado.derecho() is not None:
+                self.__pila.insertar(procesado.derecho())
+            if procesado.izquierdo() is not None:
+                self.__pila.insertar(procesado.izquierdo())
+            return procesado
+
+        def __apilar_izquierdos(self, nodo):
+            "Apila 'nodo' y sus descendientes por la izquierda."
+            while nodo is not None:
+                self.__pila.insertar(nodo)
+                nodo = nodo.izquierdo()
+
+        def __inorden(self):
+            if len(self.__pila) == 0:
+                raise StopIteration()
+            procesado = self.__pila.extraer()
+            self.__apilar_izquierdos(procesado.derecho())
+            return procesado
+
+        def __postorden(self):
+            # Cada nodo se apila dos veces: al descubrirlo y, ya con sus
+            # hijos encima, para devolverlo después de ellos
+            while len(self.__pila) != 0:
+                procesado, expandido = self.__pila.extraer()
+                if expandido:
+                    return procesado
+                self.__pila.insertar((procesado, True))
+                if procesado.derecho() is not None:
+                    self.__pila.insertar((procesado.derecho(), False))
+                if procesado.izquierdo() is not None:
+                    self.__pila.insertar((procesado.izquierdo(), False))
+            raise StopIteration()
+
+    def __iter__(self):
+        "Devuelve un iterador inorden del arbol binario"
+        return self.IteradorArbolBinario(self)
+
+    inorden = __iter__
+
+    def preorden(self):
+        "Devuelve un iterador preorden del arbol binario"
+        return self.IteradorArbolBinario(self, ArbolBinario.PREORDEN)
+
+    def postorden(self):
+        "Devuelve un iterador postorden del arbol binario"
+        return self.IteradorArbolBinario(self, ArbolBinario.POSTORDEN)
+
+class NodoArbolAVL(NodoArbolBinario):
+    "Nodo de un árbol AVL.  Guarda la altura de su subárbol."
+
+    __slots__ = ("altura",)
+
+    def __init__(self, valor=None, clave=None):
+        super().__init__(valor, clave)
+        self.altura = 1
+
+class ArbolAVL(ArbolBinario):
+    """Árbol binario de búsqueda autobalanceado.
+
+    Las alturas de los subárboles de cada nodo difieren a lo sumo en uno,
+    de manera que buscar, insertar y remover toman O(log n) aun cuando
+    los valores se insertan ordenados."""
+
+    _TIPO_NODO = NodoArbolAVL
+
+    @staticmethod
+    def __altura(nodo):
+        return nodo.altura if nodo is not None else 0
+
+    def _actualizar_nodo(self, nodo):
+        super()._actualizar_nodo(nodo)
+        nodo.altura = 1 + max(self.__altura(nodo.izquierdo()),
+                              self.__altura(nodo.derecho()))
+
+    def _reparar(self, nodo):
+        "Restablece el balance desde 'nodo' hasta la raíz."
+        while nodo is not None:
+            self._actualizar_nodo(nodo)
+            balance = self.__altura(nodo.izquierdo()) \
+                      - self.__altura(nodo.derecho())
+            if balance > 1:
+                izquierdo = nodo.izquierdo()
+                if self.__altura(izquierdo.izquierdo()) \
+                    < self.__altura(izquierdo.derecho()):
+                    self._rotar_izquierda(self._hijo_propio(nodo, True))
+                nodo = self._rotar_derecha(nodo)
+            elif balance < -1:
+                derecho = nodo.derecho()
+                if self.__altura(derecho.derecho()) \
+                    < self.__altura(derecho.izquierdo()):
+                    self._rotar_derecha(self._hijo_propio(nodo, False))
+                nodo = self._rotar_izquierda(nodo)
+            nodo = nodo.padre()
+
+    def altura(self):
+        "Devuelve la cantidad de niveles del árbol.  Es 0 si está vacío."
+        return self.__altura(self._ArbolBinario__raiz)
+
+class ArbolSplay(ArbolBinario):
+    """Árbol binario de búsqueda biselado (splay).
+
+    Cada acceso por clave (buscar, obtener, 'in', insertar, poner,
+    remover y quitar) sube el nodo accedido hasta la raíz con rotaciones,
+    o el último nodo visitado si la clave no está.  Así las claves usadas
+    con frecuencia quedan cerca de la raíz, y cada operación toma O(log n)
+    amortizado aunque una sola puede tomar O(n).
+
+    Como las búsquedas también reestructuran el árbol, no se debe buscar
+    mientras se lo recorre con un iterador.  Las demás consultas, como
+    rango, seleccionar o piso, no lo modifican."""
+
+    def __subir(self, nodo):
+        "Rota el padre de 'nodo' para que este ocupe su lugar y lo devuelve."
+        if nodo.padre().izquierdo() is nodo:
+            return self._rotar_derecha(nodo.padre())
+        return self._rotar_izquierda(nodo.padre())
+
+    def __biselar(self, nodo):
+        """Sube 'nodo' hasta la raíz y lo devuelve.
+
+        Basta con actualizar 'nodo' antes: cada ancestro se recalcula al
+        rotarlo, ya con sus hijos definitivos."""
+        self._actualizar_nodo(nodo)
+        padre = nodo.padre()
+        while padre is not None:
+            abuelo = padre.padre()
+            if abuelo is not None:
+                if (abuelo.izquierdo() is padre) \
+                    == (padre.izquierdo() is nodo):
+                    self.__subir(padre)  # Zig-zig: primero el abuelo
+                else:
+                    nodo = self.__subir(nodo)  # Zig-zag
+            # La rotación puede haber copiado el nodo; se sigue con la copia
+            nodo = self.__subir(nodo)
+            padre = nodo.padre()
+        return nodo
+
+    def _reparar(self, nodo):
+        """Sube a la raíz el nodo agregado tras una inserción, o 'nodo'
+        tras una remoción (el reemplazo o el padre del removido)."""
+        agregado = self._ultimo_nodo
+        if agregado is not None and agregado.padre() is nodo:
+            nodo = agregado
+        if nodo is not None:
+            self.__biselar(nodo)
+
+    def _cambiado(self, nodo):
+        "Sube a la raíz el nodo cuyo valor se cambió."
+        self.__biselar(nodo)
+
+    def __acceder(self, clave):
+        "Busca el nodo con la clave y lo sube a la raíz.  Puede ser None."
+        padre, posicion = self._ArbolBinario__buscar_padre(clave, propio=True)
+        if padre is None:
+            return self._ArbolBinario__raiz
+        nodo = padre.izquierdo() if posicion == -1 else padre.derecho()
+        raiz = self.__biselar(nodo if nodo is not None else padre)
+        return raiz if nodo is not None else None
+
+    def buscar(self, valor):
+        """Obtiene el elemento que se compare igual con el valor dado.
+
+        Devuelve None si no se encuentra dicho elemento."""
+        nodo = self.__acceder(valor)
+        return nodo.valor if nodo is not None else None
+
+    def __contains__(self, clave):
+        "Indica si hay un elemento con la clave (o el valor) dado."
+        return self.__acceder(clave) is not None
+
+    def obtener(self, clave, defecto=None):
+        """Obtiene el valor asociado a la clave.
+
+        Devuelve 'defecto' si la clave no está en el árbol."""
+        nodo = self.__acceder(clave)
+        return nodo.valor if nodo is not None else defecto
+
+    get = obtener
+
+class NodoArbolRojinegro(NodoArbolBinario):
+    "Nodo de un árbol rojinegro.  Los nodos nuevos son rojos."
+
+    __slots__ = ("rojo",)
+
+    def __init__(self, valor=None, clave=None):
+        super().__init__(valor, clave)
+        self.rojo = True
+
+class ArbolRojinegro(ArbolBinario):
+    """Árbol binario de búsqueda rojinegro.
+
+    Ningún nodo rojo tiene un hijo rojo y todos los caminos desde un nodo
+    hasta sus hojas tienen la misma cantidad de nodos negros (la raíz
+    puede quedar roja, lo que no afecta estas reglas), de manera
+    que la altura es a lo sumo 2 log2(n + 1).  Es menos estricto que el
+    AVL: búsquedas algo más profundas a cambio de menos rotaciones al
+    insertar y a lo sumo tres al remover."""
+
+    _TIPO_NODO = NodoArbolRojinegro
+
+    @staticmethod
+    def __rojo(nodo):
+        return nodo is not None and nodo.rojo
+
+    def _copiar_datos(self, origen, copia):
+        super()._copiar_datos(origen, copia)
+        copia.rojo = origen.rojo
+
+    def __colorear(self):
+        """Colorea un árbol construido balanceado (véase desde_ordenados):
+        son rojos solo los nodos del último nivel, si hay más de uno."""
+        altura = self.altura()
+        pila = Pila()
+        if self._ArbolBinario__raiz is not None:
+            pila.insertar((self._ArbolBinario__raiz, 1))
+        while len(pila) != 0:
+            nodo, nivel = pila.extraer()
+            nodo.rojo = nivel == altura and altura > 1
+            for hijo in (nodo.izquierdo(), nodo.derecho()):
+                if hijo is not None:
+                    pila.insertar((hijo, nivel + 1))
+
+    def extender(self, iterable):
+        vacio = len(self) == 0
+        super().extender(iterable)
+        if vacio:
+            self.__colorear()
+
+    extend = extender
+
+    @classmethod
+    def desde_ordenados(cls, iterable, pares=False):
+        arbol = super().desde_ordenados(iterable, pares)
+        arbol.__colorear()
+        return arbol
+
+    def copiar(self):
+        copia = super().copiar()
+        copia.__colorear()
+        return copia
+
+    copy = copiar
+
+    def __rotar_hacia(self, nodo, izquierda):
+        if izquierda:
+            return self._rotar_izquierda(nodo)
+        return self._rotar_derecha(nodo)
+
+    def _reparar(self, nodo):
+        "Actualiza los tamaños y restablece los colores tras una inserción."
+        super()._reparar(nodo)
+        nodo = self._ultimo_nodo
+        while True:
+            padre = nodo.padre()
+            if padre is None:
+                nodo.rojo = False
+                return
+            if not padre.rojo:
+                return
+            abuelo = padre.padre()
+            if abuelo is None:
+                # La primera inserción deja la raíz roja; basta cambiarla
+                padre.rojo = False
+                return
+            padre_izquierdo = abuelo.izquierdo() is padre
+            tio = self._hijo_propio(abuelo, not padre_izquierdo)
+            if self.__rojo(tio):
+                padre.rojo = tio.rojo = False
+                abuelo.rojo = True
+                nodo = abuelo
+                continue
+            if (padre.izquierdo() is nodo) != padre_izquierdo:
+                # 'nodo' es el hijo interior: se lo alinea con su padre
+                padre = self.__rotar_hacia(padre, padre_izquierdo)
+            padre.rojo = False
+            abuelo.rojo = True
+            self.__rotar_hacia(abuelo, not padre_izquierdo)
+            return
+
+    def __remover(self, clave):
+        nodo = self._ArbolBinario__buscar(clave, propio=True)
+        if nodo is None:
+            raise KeyError(self.ERROR_VALOR_INEXISTENTE + str(clave))
+        valor = nodo.valor
+        if nodo.izquierdo() is not None and nodo.derecho() is not None:
+            # Como en ArbolBinario, se remueve el sucesor en su lugar
+            sucesor = self._hijo_propio(nodo, False)
+            while sucesor.izquierdo() is not None:
+                sucesor = self._hijo_propio(sucesor, True)
+            nodo.valor, nodo.clave = sucesor.valor, sucesor.clave
+            nodo = sucesor
+        hijo = self._hijo_propio(nodo, nodo.izquierdo() is not None)
+        padre = nodo.padre()
+        izquierdo = padre is not None and padre.izquierdo() is nodo
+        if padre is None:
+            if hijo is not None:
+                hijo.desenlazar_padre()
+            self._ArbolBinario__raiz = hijo
+        elif izquierdo:
+            padre.enlazar_a_izquierdo(hijo)
+        else:
+            padre.enlazar_a_derecho(hijo)
+        ArbolBinario._reparar(self, padre)  # Solo los tamaños
+        if not nodo.rojo:
+            if self.__rojo(hijo):
+                hijo.rojo = False
             else:
-                return self.__funcion().valor
+                self.__reparar_remocion(hijo, padre, izquierdo)
+        return valor
+
+    def __reparar_remocion(self, nodo, padre, izquierdo):
+        """Restablece los colores cuando al camino de 'nodo', hijo izquierdo
+        o derecho de 'padre' y posiblemente None, le falta un nodo negro."""
+        while padre is not None and not self.__rojo(nodo):
+            hermano = self._hijo_propio(padre, not izquierdo)
+            if hermano.rojo:
+                hermano.rojo = False
+                padre.rojo = True
+                self.__rotar_hacia(padre, izquierdo)
+                hermano = self._hijo_propio(padre, not izquierdo)
+            lejano = self._hijo_propio(hermano, not izquierdo)
+            cercano = self._hijo_propio(hermano, izquierdo)
+            if not self.__rojo(lejano) and not self.__rojo(cercano):
+                hermano.rojo = True
+                nodo, padre = padre, padre.padre()
+                izquierdo = padre is not None and padre.izquierdo() is nodo
+                continue
+            if not self.__rojo(lejano):
+                cercano.rojo = False
+                hermano.rojo = True
+                hermano = self.__rotar_hacia(hermano, not izquierdo)
+                lejano = self._hijo_propio(hermano, not izquierdo)
+            hermano.rojo = padre.rojo
+            padre.rojo = lejano.rojo = False
+            self.__rotar_hacia(padre, izquierdo)
+            nodo = self._ArbolBinario__raiz
+            break
+        if nodo is not None:
+            nodo.rojo = False
+
+    def quitar(self, clave):
+        """Remueve la clave y devuelve su valor asociado.
+
+        Levanta KeyError si la clave no está en el árbol."""
+        return self.__remover(clave)
 
-        def __preorden(self):
-            if len(self.__pila) == 0:
-                raise StopIteration()
-            procesado = self.__pila.extraer()
-            if procesado.derecho() is not None:
-                self.__pila.insertar(procesado.derecho())
-            if procesado.izquierdo() is not None:
-                self.__pila.insertar(procesado.izquierdo())
-            return procesado
+    def remover(self, valor):
+        "Remueve el valor dado.  Levanta KeyError si no se halla."
+        return self.__remover(valor)
 
-        def __inorden_generador(self, nodo):
-            if nodo is not None:
-                yield from self.__inorden_generador(nodo.izquierdo())
-                yield nodo
-                yield from self.__inorden_generador(nodo.derecho())
+    remove = remover
 
-        def __inorden(self):
-            return next(self.__generador)
 
-        def __postorden_generador(self, nodo):
-            if nodo is not None:
-                yield from self.__postorden_generador(nodo.izquierdo())
-                yield from self.__postorden_generador(nodo.derecho())
-                yield nodo
+# Árboles ordenados intercambiables, para elegir uno por carga de trabajo
+# sin cambiar el código que los usa.  Todos ofrecen la interfaz de
+# ArbolBinario; véase rendimiento.py arboles para compararlos.
+TIPOS_ARBOL = {
+    "binario": ArbolBinario,
+    "avl": ArbolAVL,
+    "rojinegro": ArbolRojinegro,
+    "splay": ArbolSplay,
+}
+
+def crear_arbol(tipo="avl", iterable=None):
+    """Crea un árbol ordenado del tipo dado, con los elementos de
+    'iterable' si se proporciona.
+
+    'tipo' es una clave de TIPOS_ARBOL o una subclase de ArbolBinario."""
+    if isinstance(tipo, str):
+        if tipo not in TIPOS_ARBOL:
+            raise ValueError("Tipo de árbol desconocido: %r.  Disponibles: %s"
+                             % (tipo, ", ".join(TIPOS_ARBOL)))
+        tipo = TIPOS_ARBOL[tipo]
+    elif not (isinstance(tipo, type) and issubclass(tipo, ArbolBinario)):
+        raise TypeError("'tipo' no es un tipo de árbol: %r" % (tipo,))
+    return tipo(iterable)
+
+class NodoArbolIntervalos(NodoArbolAVL):
+    "Nodo de un ArbolIntervalos.  Guarda el mayor fin de su subárbol."
+
+    __slots__ = ("fin_maximo",)
+
+    def __init__(self, valor=None, clave=None):
+        super().__init__(valor, clave)
+        self.fin_maximo = self.clave[1] if self.clave is not None else None
+
+class ArbolIntervalos(ArbolAVL):
+    """Árbol de intervalos cerrados [inicio, fin] sobre un árbol AVL.
+
+    Las claves son tuplas (inicio, fin, ...); los elementos que siguen
+    al fin desempatan intervalos iguales, por ejemplo un ID.  Se usa
+    como mapa (poner, quitar...) o, con tuplas como valores, como
+    conjunto.  Cada nodo guarda además el mayor fin de su subárbol, de
+    modo que 'solapados' y 'en_punto' descartan los subárboles que no
+    pueden tener resultados: toman O(log n) más un costo proporcional
+    a los k resultados (O(k log n) en el peor caso), en lugar de
+    recorrer todo el árbol."""
+
+    _TIPO_NODO = NodoArbolIntervalos
+
+    @staticmethod
+    def __comprobar_intervalo(clave):
+        if clave[1] < clave[0]:
+            raise ValueError("El intervalo termina antes de empezar: %s > %s"
+                             % (clave[0], clave[1]))
+
+    def _actualizar_nodo(self, nodo):
+        super()._actualizar_nodo(nodo)
+        fin_maximo = nodo.clave[1]
+        for hijo in (nodo.izquierdo(), nodo.derecho()):
+            if hijo is not None and hijo.fin_maximo > fin_maximo:
+                fin_maximo = hijo.fin_maximo
+        nodo.fin_maximo = fin_maximo
 
-        def __postorden(self):
-            return next(self.__generador)
+    def insertar(self, valor, cambiar=False):
+        self.__comprobar_intervalo(valor)
+        return super().insertar(valor, cambiar)
 
-    def __iter__(self):
-        "Devuelve un iterador inorden del arbol binario"
-        return self.IteradorArbolBinario(self)
+    insert = insertar
 
-    inorden = __iter__
+    def poner(self, clave, valor):
+        self.__comprobar_intervalo(clave)
+        return super().poner(clave, valor)
 
-    def preorden(self):
-        "Devuelve un iterador preorden del arbol binario"
-        return self.IteradorArbolBinario(self, ArbolBinario.PREORDEN)
+    def solapados(self, inicio, fin, pares=False):
+        """Itera los valores cuyo intervalo se solapa con [inicio, fin].
 
-    def postorden(self):
-        "Devuelve un iterador postorden del arbol binario"
-        return self.IteradorArbolBinario(self, ArbolBinario.POSTORDEN)
+        Se solapan si comparten al menos un punto, extremos incluidos.
+        Se devuelven en el orden de las claves (por inicio); si 'pares'
+        es True, como pares (clave, valor)."""
+        pila = Pila()
+        nodo = self._ArbolBinario__raiz
+        while True:
+            # Un subárbol cuyo mayor fin es anterior a 'inicio' no aporta nada
+            while nodo is not None and not nodo.fin_maximo < inicio:
+                pila.insertar(nodo)
+                nodo = nodo.izquierdo()
+            if len(pila) == 0:
+                return
+            nodo = pila.extraer()
+            if fin < nodo.clave[0]:
+                return  # Este y los siguientes empiezan después de 'fin'
+            if not nodo.clave[1] < inicio:
+                yield (nodo.clave, nodo.valor) if pares else nodo.valor
+            nodo = nodo.derecho()
 
-class ArbolAVL(ArbolBinario):
-    pass
+    def en_punto(self, punto, pares=False):
+        "Itera los valores cuyo intervalo contiene 'punto'; véase solapados."
+        return self.solapados(punto, punto, pares)
 
 class NodoArbolNario:
-    "Nodo de un árbol n-ario."
+    """Nodo de un árbol n-ario.
+
+    Opcionalmente mantiene un índice hash de sus hijos (véase 'indexar')
+    que hace que buscar un hijo por clave tome tiempo constante.
+
+    'dueno' es la marca del ArbolNario al que pertenece el nodo; la
+    mantiene el propio árbol para responder 'en_arbol' en tiempo constante.
+    'agregados' guarda los agregados del subárbol ya calculados por
+    ArbolNario.agregado, o None si cambió algo en el subárbol.
+
+    Para las instantáneas de ArbolNario, el nodo guarda su valor e hijos
+    anteriores la primera vez que cambia después de cada instantánea
+    (véase 'estado').  Por eso el valor debe cambiarse con 'cambiar_valor'
+    y los hijos con los métodos del nodo, no directamente."""
+
+    __slots__ = ("valor", "dueno", "agregados", "__nodo_padre",
+                 "__nodos_hijos", "__indice", "__clave_indice",
+                 "__version", "__historia")
+
+    # Reloj de versiones común a todos los nodos.  Una instantánea ve de
+    # cada nodo el último estado con versión menor o igual a la suya
+    __reloj = 1
+
+    # Instantáneas vivas de árboles cuya raíz no tiene marca de dueño;
+    # las de los demás se registran en la marca (véase ArbolNario._Marca)
+    _instantaneas_sin_dueno = weakref.WeakSet()
 
     def __init__(self, valor=None):
         self.valor = valor
+        self.dueno = None
+        self.agregados = None
         self.__nodo_padre = None
         self.__nodos_hijos = []
-        self.__repr = False  # Para __repr__
+        self.__indice = None  # clave -> hijo, o lista de hijos si se repite
+        self.__clave_indice = None
+        self.__version = NodoArbolNario.__reloj  # Del estado actual
+        self.__historia = None  # Estados anteriores: (version, valor, hijos)
+
+    @staticmethod
+    def _nueva_version():
+        "Devuelve la versión de una nueva instantánea y avanza el reloj."
+        version = NodoArbolNario.__reloj
+        NodoArbolNario.__reloj += 1
+        return version
+
+    def __versiones_vivas(self):
+        """Versiones, en orden, de las instantáneas vivas que pueden ver
+        el nodo: las registradas en su marca de dueño."""
+        if self.dueno is not None:
+            instantaneas = self.dueno.instantaneas
+        else:
+            instantaneas = NodoArbolNario._instantaneas_sin_dueno
+        if not instantaneas:
+            return ()
+        return sorted(arbol._ArbolNario__version
+                      for arbol in list(instantaneas))
+
+    def __podar_historia(self, versiones):
+        "Descarta los estados anteriores que ninguna instantánea viva ve."
+        historia = self.__historia
+        conservados = []
+        for i, estado in enumerate(historia):
+            # Cada estado vale hasta la versión del siguiente
+            hasta = historia[i + 1][0] if i + 1 < len(historia) \
+                    else self.__version
+            if any(estado[0] <= version < hasta for version in versiones):
+                conservados.append(estado)
+        self.__historia = conservados if conservados else None
+
+    def __preservar(self):
+        """Guarda el estado actual antes de cambiarlo si alguna instantánea
+        viva lo ve, y descarta los anteriores que ya no ve ninguna."""
+        versiones = self.__versiones_vivas()
+        if self.__historia is not None:
+            self.__podar_historia(versiones)
+        if versiones and self.__version <= versiones[-1]:
+            if self.__historia is None:
+                self.__historia = []
+            self.__historia.append((self.__version, self.valor,
+                                    list(self.__nodos_hijos)))
+            self.__version = NodoArbolNario.__reloj
+
+    def estado(self, version):
+        """Devuelve el par (valor, hijos) que tenía el nodo en la versión dada.
+
+        La lista de hijos no debe modificarse.  Levanta ValueError si el
+        nodo aún no existía en esa versión."""
+        if self.__version <= version:
+            return self.valor, self.__nodos_hijos
+        if self.__historia is not None:
+            for version_estado, valor, hijos in reversed(self.__historia):
+                if version_estado <= version:
+                    return valor, hijos
+        raise ValueError("El nodo no existía en la versión " + str(version))
 
     def padre(self):
         return self.__nodo_padre
@@ -782,6 +2767,88 @@ class NodoArbolNario:
             raiz = raiz.__nodo_padre
         return raiz
 
+    def __clave(self, hijo):
+        if self.__clave_indice is None:
+            return hijo.valor
+        return self.__clave_indice(hijo.valor)
+
+    def __indexar_hijo(self, hijo):
+        clave = self.__clave(hijo)
+        anterior = self.__indice.get(clave)
+        if anterior is None:
+            self.__indice[clave] = hijo
+        elif isinstance(anterior, list):
+            anterior.append(hijo)
+        else:
+            self.__indice[clave] = [anterior, hijo]
+
+    def __desindexar_hijo(self, hijo):
+        clave = self.__clave(hijo)
+        anterior = self.__indice.get(clave)
+        if anterior is hijo:
+            del self.__indice[clave]
+        elif isinstance(anterior, list):
+            anterior.remove(hijo)
+            if len(anterior) == 1:
+                self.__indice[clave] = anterior[0]
+
+    def indexar(self, clave=None):
+        """Crea un índice hash de los hijos.
+
+        Los hijos se indexan por 'clave(valor)', o por su valor si 'clave'
+        es None, por lo que las claves deben ser inmutables y 'hashables'.
+        El índice se mantiene al agregar, cambiar y remover hijos; para
+        cambiar el valor de un hijo indexado, úsese 'cambiar_valor'."""
+        self.__indice = {}
+        self.__clave_indice = clave
+        for hijo in self.__nodos_hijos:
+            self.__indexar_hijo(hijo)
+
+    def desindexar(self):
+        "Elimina el índice de los hijos."
+        self.__indice = self.__clave_indice = None
+
+    @property
+    def indexado(self):
+        return self.__indice is not None
+
+    def buscar_hijo(self, clave):
+        """Devuelve el primer hijo con la clave dada, o None si no hay.
+
+        Sin índice, la clave es el valor y la búsqueda es lineal."""
+        if self.__indice is None:
+            for hijo in self.__nodos_hijos:
+                if hijo.valor == clave:
+                    return hijo
+            return None
+        hijo = self.__indice.get(clave)
+        if isinstance(hijo, list):
+            return hijo[0]
+        return hijo
+
+    def cambiar_valor(self, valor):
+        """Cambia el valor del nodo, actualizando el índice del padre
+        y los agregados."""
+        self.__preservar()
+        padre = self.__nodo_padre
+        if padre is not None and padre.__indice is not None:
+            padre.__desindexar_hijo(self)
+            self.valor = valor
+            padre.__indexar_hijo(self)
+        else:
+            self.valor = valor
+        self.invalidar_agregados()
+
+    def invalidar_agregados(self):
+        """Descarta los agregados calculados del nodo y de sus ancestros.
+
+        Si un nodo no los tiene, tampoco sus ancestros, así que basta
+        con subir hasta el primero que no los tenga."""
+        nodo = self
+        while nodo is not None and nodo.agregados is not None:
+            nodo.agregados = None
+            nodo = nodo.__nodo_padre
+
     def __len__(self):
         "Devuelve la cantidad de hijos"
         return len(self.__nodos_hijos)
@@ -795,12 +2862,26 @@ class NodoArbolNario:
 
         Para añadir uno nuevo, úsese el método 'agregar'"""
         util.comprobar_tipos("hijo", hijo, NodoArbolNario)
+        self.__preservar()
+        if self.__indice is not None:
+            self.__desindexar_hijo(self.__nodos_hijos[indice])
         self.__nodos_hijos[indice] = hijo
         hijo.__nodo_padre = self
+        if self.__indice is not None:
+            self.__indexar_hijo(hijo)
+        self.invalidar_agregados()
 
     def __delitem__(self, indice):
         "Elimina el hijo con posición en el índice dado."
+        self.__preservar()
+        if self.__indice is not None:
+            removidos = self.__nodos_hijos[indice]
+            if not isinstance(indice, slice):
+                removidos = (removidos,)
+            for hijo in removidos:
+                self.__desindexar_hijo(hijo)
         del self.__nodos_hijos[indice]
+        self.invalidar_agregados()
 
     def agregar(self, hijo_s):
         "Agrega uno o varios hijos nuevos al nodo."
@@ -815,22 +2896,47 @@ class NodoArbolNario:
         if varios:
             util.comprobar_tipos(("hijo",) * len(hijo_s), hijo_s,
                                  (NodoArbolNario,) * len(hijo_s) )
+            self.__preservar()
             self.__nodos_hijos += hijo_s
             for hijo in hijo_s:
                 hijo.__nodo_padre = self
+                if self.__indice is not None:
+                    self.__indexar_hijo(hijo)
         else:
             util.comprobar_tipos("hijo", hijo_s, NodoArbolNario)
+            self.__preservar()
             self.__nodos_hijos.append(hijo_s)
             hijo_s.__nodo_padre = self
+            if self.__indice is not None:
+                self.__indexar_hijo(hijo_s)
+        self.invalidar_agregados()
 
     def remover(self, hijo):
-        "Elimina un hijo por identidad.  Devuelve un booleano indicando éxito."
+        """Elimina un hijo por identidad.  Devuelve un booleano indicando éxito.
+
+        Con índice, un nodo que no es hijo se descarta sin recorrer los hijos.
+        """
         util.comprobar_tipos("hijo", hijo, NodoArbolNario)
+        if self.__indice is not None:
+            indexado = self.__indice.get(self.__clave(hijo))
+            if indexado is not hijo and not (isinstance(indexado, list)
+                                             and hijo in indexado):
+                return False
+            self.__preservar()
+            if self.__nodos_hijos[-1] is hijo:
+                del self.__nodos_hijos[-1]
+            else:
+                self.__nodos_hijos.remove(hijo)
+            self.__desindexar_hijo(hijo)
+            self.invalidar_agregados()
+            return True
+        self.__preservar()
         try:
             self.__nodos_hijos.remove(hijo)
-            return True
         except ValueError:
             return False
+        self.invalidar_agregados()
+        return True
 
     def desenlazar_padre(self):
         "Desenlaza el 'NodoArbolBinario' padre."
@@ -839,17 +2945,39 @@ class NodoArbolNario:
             self.__nodo_padre.remover(self)
             self.__nodo_padre = None
 
+    @reprlib.recursive_repr("...")
     def __repr__(self):
-        if self.__repr:
-            return "..."
-        else:
-            self.__repr = True
-            resultado = "NodoArbolNario(%r)#%d" % (self.valor, len(self))
-            self.__repr = False
-            return resultado
+        return "NodoArbolNario(%r)#%d" % (self.valor, len(self))
 
 class ArbolNario:
-    "Árbol n-ario"
+    """Árbol n-ario
+
+    Con 'indexar', cada nodo que recibe hijos mediante insertar_nodo
+    los indexa por 'clave' (véase NodoArbolNario.indexar), y las
+    comprobaciones de duplicados y búsquedas entre hermanos toman tiempo
+    constante.  Con 'clave', los duplicados se detectan por clave.
+
+    Los nodos insertados con los métodos del árbol llevan la marca del
+    árbol, por lo que 'en_arbol' toma tiempo constante; en el árbol de un
+    subárbol de otro, sube por los padres.  Con 'etiquetar', el árbol
+    numera sus nodos en un recorrido en profundidad (entrada y salida) la
+    primera vez que se consulta tras un cambio en sus nodos, y
+    'es_ancestro' también toma tiempo constante.  Los cambios en otros
+    árboles no afectan la numeración.  Las marcas y etiquetas solo reflejan
+    los cambios hechos mediante los métodos del árbol, no directamente
+    en los nodos.
+
+    'profundidad', 'camino' y 'ancestro_comun' usan siempre esa numeración,
+    que se rehace en O(n) solo si hubo cambios desde la última consulta;
+    'ancestro_comun' además usa una tabla de mínimos de O(n log n) y
+    luego responde en tiempo constante.
+
+    Se pueden registrar agregados de subárbol (véase registrar_agregado),
+    que se guardan en cada nodo y se recalculan solo en los caminos hacia
+    la raíz de los nodos que cambian.
+
+    'instantanea' devuelve en tiempo constante una copia de solo lectura
+    del árbol tal como está; véase su documentación."""
 
     PREORDEN = PROFUNDIDAD = -1  # Son recorridos iguales
     ANCHURA = 0
@@ -857,40 +2985,367 @@ class ArbolNario:
 
     ERROR_VALOR_DUPLICADO = "Hijo con valor duplicado: "
 
-    def __init__(self, duplicados=True):
+    # Agregado de la cantidad de nodos, usado por __len__ si se registra:
+    # arbol.registrar_agregado(*ArbolNario.TAMANO)
+    TAMANO = ("tamano", lambda valor: 1, lambda a, b: a + b, 0)
+
+    class _Marca:
+        """Marca de dueño de los nodos de un árbol (véase en_arbol).
+
+        Cuenta los cambios estructurales hechos en los nodos que la
+        llevan, desde cualquier árbol: los árboles pueden compartir
+        nodos, como las subtareas de una tarea con el árbol de su
+        proyecto, y los subárboles llevan la marca del árbol dueño.
+
+        También registra, sin mantenerlas vivas, las instantáneas que
+        pueden ver esos nodos, que solo guardan sus estados anteriores
+        para ellas (véase instantanea)."""
+
+        __slots__ = ("cambios", "instantaneas", "__weakref__")
+
+        def __init__(self):
+            self.cambios = 0
+            self.instantaneas = None  # WeakSet, al registrar la primera
+
+        def registrar(self, instantanea):
+            if self.instantaneas is None:
+                self.instantaneas = weakref.WeakSet()
+            self.instantaneas.add(instantanea)
+
+    def __init__(self, duplicados=True, indexar=False, clave=None,
+                 etiquetar=False):
         self.__raiz = None
         self.__duplicados = duplicados
+        self.__indexar = indexar
+        self.__clave = clave
+        self.__marca = ArbolNario._Marca()  # 'dueno' de los nodos propios
+        self.__cambios = 0  # Cambios hechos con este árbol
+        self.__etiquetar = etiquetar
+        # Numeración en preorden, véase __numerar
+        self.__entradas = None  # nodo -> posición en preorden
+        self.__salidas = None  # posición -> última posición del subárbol
+        self.__preorden = None  # posición -> nodo
+        self.__profundidades = None  # posición -> profundidad
+        self.__minimos = None  # Tabla de mínimos para ancestro_comun
+        self.__cambios_numeracion = None  # Véase __contar_cambios
+        self.__agregados = {}  # nombre -> (funcion, combinar, identidad)
+        self.__version = None  # Versión de los nodos si es una instantánea
+        # Instantánea de la que se obtuvo esta, para mantenerla registrada
+        self.__origen = None
+
+    def __len__(self):
+        """Devuelve la cantidad de nodos.
 
-    __len__ = ArbolBinario.__len__
+        Toma tiempo constante si está registrado ArbolNario.TAMANO."""
+        if self.TAMANO[0] in self.__agregados:
+            return self.agregado(self.TAMANO[0])
+        cuenta = -1
+        # Preorden es más eficiente
+        for cuenta, ignorar in enumerate(self.preorden()):
+            pass
+        return cuenta + 1
 
     @property
     def raiz(self):
         return self.__raiz
 
+    def __cambiar(self, marca):
+        "Registra un cambio estructural en nodos con la marca dada."
+        self.__cambios += 1
+        if marca is not None:
+            marca.cambios += 1
+
+    def __contar_cambios(self):
+        """Identifica el estado de la estructura del árbol para saber si
+        la numeración sigue valiendo: cambia con cada cambio hecho con
+        este árbol o en nodos con la marca de su raíz."""
+        marca = self.__raiz.dueno if self.__raiz is not None else None
+        return (self.__cambios, marca,
+                marca.cambios if marca is not None else 0)
+
+    def __comprobar_vivo(self):
+        if self.__version is not None:
+            raise TypeError("Operación no disponible en una instantánea")
+
+    def __estado(self, nodo):
+        "Devuelve el par (valor, hijos) del nodo en la versión del árbol."
+        if self.__version is None:
+            return nodo.valor, nodo._NodoArbolNario__nodos_hijos
+        return nodo.estado(self.__version)
+
+    def instantanea(self):
+        """Devuelve una copia de solo lectura del árbol en tiempo constante.
+
+        La instantánea comparte los nodos con el árbol; cada nodo guarda
+        su valor e hijos anteriores la primera vez que cambia después,
+        así que cada cambio posterior copia solo la lista de hijos del
+        nodo que cambia.  Los nodos siguen siendo los mismos objetos en
+        el árbol, por lo que las referencias a ellos siguen valiendo.
+
+        La instantánea se registra en la marca de dueño de la raíz, y los
+        nodos solo guardan estados anteriores mientras alguna instantánea
+        viva con su marca los ve: al descartar las instantáneas, los
+        cambios siguientes dejan de copiar y descartan esos estados.
+
+        La instantánea se puede recorrer (solo por valores), medir,
+        copiar con 'copiar' (por ejemplo, para deshacer cambios) y de
+        ella se pueden obtener subárboles; las demás operaciones levantan
+        TypeError.  Los valores se comparten, como en 'copiar'."""
+        copia = ArbolNario(self.__duplicados, self.__indexar, self.__clave,
+                           self.__etiquetar)
+        copia.__raiz = self.__raiz
+        if self.__version is not None:
+            copia.__version = self.__version
+            copia.__origen = self
+        else:
+            copia.__version = NodoArbolNario._nueva_version()
+            if self.__raiz is not None and self.__raiz.dueno is not None:
+                self.__raiz.dueno.registrar(copia)
+            elif self.__raiz is not None:
+                NodoArbolNario._instantaneas_sin_dueno.add(copia)
+        return copia
+
+    snapshot = instantanea
+
+    def __marcar(self, raiz, marca):
+        """Asigna la marca a todos los nodos del subárbol de 'raiz'.
+
+        Las instantáneas vivas registradas en las marcas anteriores de
+        los nodos pasan a la nueva, que se crea si es None, para que los
+        nodos sigan guardando los estados que ellas ven."""
+        if len(raiz) == 0:
+            nodos = (raiz,)
+        else:
+            nodos = list(self.IteradorArbolNario(self.subarbol(raiz),
+                                                 nodos=True))
+        for anterior in {nodo.dueno for nodo in nodos}:
+            if anterior is not None and anterior is not marca \
+                and anterior.instantaneas:
+                if marca is None:
+                    marca = ArbolNario._Marca()
+                for instantanea in list(anterior.instantaneas):
+                    marca.registrar(instantanea)
+        for nodo in nodos:
+            nodo.dueno = marca
+
+    def __numerar(self):
+        """Numera los nodos en preorden si hubo cambios desde la última vez.
+
+        Devuelve el diccionario de posiciones de los nodos."""
+        self.__comprobar_vivo()
+        cambios = self.__contar_cambios()
+        if self.__cambios_numeracion == cambios:
+            return self.__entradas
+        entradas = {}
+        salidas = array.array("i")
+        preorden = []
+        profundidades = array.array("i")
+        pila = Pila()
+        if self.__raiz is not None:
+            pila.insertar((self.__raiz, 0))
+        while len(pila) != 0:
+            nodo, profundidad = pila.extraer()
+            if profundidad < 0:
+                # Fin del subárbol de 'nodo'
+                salidas[entradas[nodo]] = len(preorden) - 1
+                continue
+            entradas[nodo] = len(preorden)
+            salidas.append(len(preorden))
+            preorden.append(nodo)
+            profundidades.append(profundidad)
+            hijos = nodo._NodoArbolNario__nodos_hijos
+            if len(hijos) != 0:
+                pila.insertar((nodo, -1))
+                pila.extender((hijo, profundidad + 1)
+                              for hijo in reversed(hijos))
+        self.__entradas = entradas
+        self.__salidas = salidas
+        self.__preorden = preorden
+        self.__profundidades = profundidades
+        self.__minimos = None
+        self.__cambios_numeracion = cambios
+        return entradas
+
+    def __entrada(self, nodo):
+        "Posición en preorden del nodo; ValueError si no está en el árbol."
+        entrada = self.__numerar().get(nodo)
+        if entrada is None:
+            raise ValueError("El nodo no está en el árbol")
+        return entrada
+
     def en_arbol(self, nodo):
+        "Indica si el nodo pertenece al árbol."
+        self.__comprobar_vivo()
         if self.__raiz is None: return False
+        if nodo.dueno is self.__marca:
+            return True
+        if self.__raiz.dueno is self.__marca:
+            # Todos los nodos del árbol tienen su marca
+            return False
+        # La raíz fue insertada en otro árbol, que es el dueño de los nodos
         while nodo is not None:
             if self.__raiz is nodo:
                 return True
             nodo = nodo.padre()
         return False
 
+    def es_ancestro(self, ancestro, nodo):
+        """Indica si 'ancestro' es un ancestro propio de 'nodo' en el árbol.
+
+        Con 'etiquetar' toma tiempo constante; si no, sube desde 'nodo'."""
+        if self.__etiquetar:
+            entradas = self.__numerar()
+            if ancestro not in entradas or nodo not in entradas:
+                return False
+            entrada = entradas[ancestro]
+            return entrada < entradas[nodo] <= self.__salidas[entrada]
+        if not self.en_arbol(nodo):
+            return False
+        while nodo is not self.__raiz:
+            nodo = nodo.padre()
+            if nodo is ancestro:
+                return True
+        return False
+
+    def profundidad(self, nodo):
+        "Devuelve la profundidad del nodo; la raíz tiene profundidad 0."
+        entrada = self.__entrada(nodo)
+        return self.__profundidades[entrada]
+
+    def camino(self, nodo):
+        "Devuelve la lista de nodos desde la raíz hasta 'nodo', inclusive."
+        profundidad = self.profundidad(nodo)
+        camino = [None] * (profundidad + 1)
+        for i in range(profundidad, -1, -1):
+            camino[i] = nodo
+            nodo = nodo.padre()
+        return camino
+
+    def __construir_minimos(self):
+        """Construye la tabla dispersa (sparse table) de las posiciones de
+        menor profundidad: el nivel k tiene, para cada posición i, la de
+        menor profundidad entre i e i + 2**k - 1."""
+        profundidades = self.__profundidades
+        nivel = array.array("i", range(len(profundidades)))
+        minimos = [nivel]
+        salto = 1
+        while 2 * salto <= len(profundidades):
+            nivel = array.array("i", (
+                a if profundidades[a] <= profundidades[b] else b
+                for a, b in zip(nivel, nivel[salto:]) ))
+            minimos.append(nivel)
+            salto *= 2
+        self.__minimos = minimos
+
+    def ancestro_comun(self, a, b):
+        """Devuelve el ancestro común más bajo de los nodos 'a' y 'b'.
+
+        Si uno es ancestro del otro, lo devuelve a él."""
+        entrada_a = self.__entrada(a)
+        entrada_b = self.__entrada(b)
+        if entrada_a == entrada_b:
+            return a
+        if entrada_a > entrada_b:
+            entrada_a, entrada_b = entrada_b, entrada_a
+        if self.__minimos is None:
+            self.__construir_minimos()
+        # El nodo menos profundo después de 'a' y hasta 'b' en preorden es
+        # hijo del ancestro común
+        desde = entrada_a + 1
+        nivel = (entrada_b - desde + 1).bit_length() - 1
+        minimos = self.__minimos[nivel]
+        i = minimos[desde]
+        j = minimos[entrada_b - (1 << nivel) + 1]
+        if self.__profundidades[j] < self.__profundidades[i]:
+            i = j
+        return self.__preorden[i].padre()
+
     def subarbol(self, raiz):
         if raiz is None:
             subarbol = self
         else:
             subarbol = ArbolNario()
             subarbol.__raiz = raiz
+            subarbol.__agregados = self.__agregados
+            subarbol.__version = self.__version
+            if self.__version is not None:
+                subarbol.__origen = self
         return subarbol
 
-    def buscar(self, funcion, orden=-1, nodos=True, raiz=None):
+    def registrar_agregado(self, nombre, funcion, combinar, identidad):
+        """Registra un agregado de subárbol con el nombre dado.
+
+        El agregado de un nodo parte de 'identidad' y combina, en orden,
+        'funcion(valor)' del nodo y los agregados de sus hijos con
+        'combinar(a, b)', que debe ser asociativa.  Por ejemplo, la suma
+        de un atributo o el mínimo.  Como los nodos guardan los agregados
+        por nombre, árboles que comparten nodos deben usar nombres
+        distintos para agregados distintos."""
+        util.comprobar_tipos("nombre", nombre, str)
+        self.__comprobar_vivo()
+        self.__agregados[nombre] = (funcion, combinar, identidad)
+        if self.__raiz is not None:
+            for nodo in self.IteradorArbolNario(self, nodos=True):
+                if nodo.agregados is not None:
+                    nodo.agregados.pop(nombre, None)
+
+    def quitar_agregado(self, nombre):
+        "Deja de mantener el agregado con el nombre dado."
+        del self.__agregados[nombre]
+
+    def agregado(self, nombre, nodo=None):
+        """Devuelve el agregado registrado con 'nombre' del subárbol de 'nodo',
+        o de todo el árbol si es None.
+
+        Solo se calculan los nodos que cambiaron desde la última consulta,
+        por lo que consultar de nuevo sin cambios toma tiempo constante."""
+        self.__comprobar_vivo()
+        funcion, combinar, identidad = self.__agregados[nombre]
+        if nodo is None:
+            nodo = self.__raiz
+            if nodo is None:
+                return identidad
+        # Postorden sin recursión, solo por los nodos sin el agregado
+        pila = Pila()
+        pila.insertar((nodo, False))
+        while len(pila) != 0:
+            actual, expandido = pila.extraer()
+            if actual.agregados is not None and nombre in actual.agregados:
+                continue
+            hijos = actual._NodoArbolNario__nodos_hijos
+            if not expandido:
+                pendientes = [hijo for hijo in hijos
+                              if hijo.agregados is None
+                              or nombre not in hijo.agregados]
+                if len(pendientes) != 0:
+                    pila.insertar((actual, True))
+                    pila.extender((hijo, False) for hijo in pendientes)
+                    continue
+            resultado = combinar(identidad, funcion(actual.valor))
+            for hijo in hijos:
+                resultado = combinar(resultado, hijo.agregados[nombre])
+            if actual.agregados is None:
+                actual.agregados = {}
+            actual.agregados[nombre] = resultado
+        return nodo.agregados[nombre]
+
+    def buscar(self, funcion, orden=-1, nodos=True, raiz=None,
+               profundidad_maxima=None, podar=None):
+        """Devuelve el primer nodo o valor para el que 'funcion' es
+        verdadera, o None.  Véase filtrar para los demás argumentos."""
         arbol = self.subarbol(raiz)
-        return util.buscar(self.IteradorArbolNario(arbol, orden, nodos),
-                           funcion)
-
-    def buscar_por_valor(self, valor, orden=0, nodos=True, raiz=None):
+        return util.buscar(
+            self.IteradorArbolNario(arbol, orden, nodos, profundidad_maxima,
+                                    podar),
+            funcion)
+
+    def buscar_por_valor(self, valor, orden=0, nodos=True, raiz=None,
+                         profundidad_maxima=None, podar=None):
+        """Devuelve el primer nodo o valor igual a 'valor', o None.
+        Véase filtrar para los demás argumentos."""
         arbol = self.subarbol(raiz)
-        iterador = self.IteradorArbolNario(arbol, orden, nodos)
+        iterador = self.IteradorArbolNario(arbol, orden, nodos,
+                                           profundidad_maxima, podar)
         if nodos:
             return util.buscar_por_atributo(iterador, "valor", valor)
         else:
@@ -899,53 +3354,107 @@ class ArbolNario:
                     return valor_posible
             return None
 
+    def filtrar(self, funcion, orden=-1, nodos=True, raiz=None,
+                profundidad_maxima=None, podar=None):
+        """Itera perezosamente los nodos, o valores si no 'nodos', para los
+        que 'funcion' es verdadera, en el orden de recorrido dado.
+
+        Se recorre el subárbol de 'raiz', o todo el árbol si es None.
+        Con 'profundidad_maxima' no se desciende más allá de esa
+        profundidad, contada desde 'raiz' (0 es solo la raíz).  Los
+        subárboles de los nodos o valores para los que 'podar' es
+        verdadera se saltan enteros, incluido el propio nodo, sin
+        visitarlos."""
+        arbol = self.subarbol(raiz)
+        return filter(funcion,
+                      self.IteradorArbolNario(arbol, orden, nodos,
+                                              profundidad_maxima, podar))
+
+    filter = filtrar
+
     def insertar_nodo(self, valor, padre=None):
+        self.__comprobar_vivo()
         nodo = valor if isinstance(valor, NodoArbolNario) \
                else NodoArbolNario(valor)
         if padre is None:
             if self.__raiz is not None:
                 raise KeyError("No se permite cambio de raiz con insertar_nodo")
             self.__raiz = nodo
+            self.__marcar(nodo, self.__marca)
+            self.__cambiar(self.__marca)
             return
+        if self.__indexar and not padre.indexado:
+            padre.indexar(self.__clave)
         if not self.__duplicados:
-            duplicado = util.buscar_por_atributo(padre.hijos(),
-                                                 "valor", nodo.valor)
+            duplicado = self.__buscar_hermano(padre, nodo.valor)
             if duplicado is not None:
                 raise KeyError(self.ERROR_VALOR_DUPLICADO + str(duplicado.valor))
         if not self.en_arbol(padre):
             raise ValueError("El padre no está en el árbol")
         padre.agregar(nodo)
+        # Los nodos nuevos son del dueño del padre, que puede ser otro árbol
+        # si este es el subárbol de una raíz insertada en él
+        self.__marcar(nodo, padre.dueno)
+        self.__cambiar(padre.dueno)
+
+    def __buscar_hermano(self, padre, valor):
+        "Busca entre los hijos de 'padre' uno que se considere igual a 'valor'."
+        if padre.indexado:
+            return padre.buscar_hijo(valor if self.__clave is None
+                                     else self.__clave(valor))
+        return util.buscar_por_atributo(padre.hijos(), "valor", valor)
 
     def cambiar_nodo(self, nodo, valor, heredar=False):
+        self.__comprobar_vivo()
         if not self.en_arbol(nodo):
             raise ValueError("El nodo original no está en el árbol")
         valor_real = valor.valor if isinstance(valor, NodoArbolNario) else valor
         if nodo is not self.__raiz and not self.__duplicados:
-            for hermano in nodo.padre().hijos():
-                if hermano is not nodo and hermano.valor == valor_real:
+            if nodo.padre().indexado:
+                hermano = self.__buscar_hermano(nodo.padre(), valor_real)
+                if hermano is not None and hermano is not nodo:
                     raise KeyError(self.ERROR_VALOR_DUPLICADO
                                    + str(hermano.valor))
+            else:
+                for hermano in nodo.padre().hijos():
+                    if hermano is not nodo and hermano.valor == valor_real:
+                        raise KeyError(self.ERROR_VALOR_DUPLICADO
+                                       + str(hermano.valor))
         if isinstance(valor, NodoArbolNario):
             if heredar:
-                valor.agregar(nodo.hijos())
+                # Se mueven, para que no queden también en el nodo reemplazado
+                hijos = list(nodo.hijos())
+                del nodo[:]
+                valor.agregar(hijos)
             if nodo is self.__raiz:
+                marca = self.__marca
                 self.__raiz = valor
             else:
+                marca = nodo.dueno
                 nodo.padre().agregar(valor)
                 nodo.desenlazar_padre()
+            if nodo.padre() is None:
+                # Si no, sigue siendo parte del árbol en el que se insertó
+                self.__marcar(nodo, None)
+            self.__marcar(valor, marca)
+            self.__cambiar(marca)
         else:
-            nodo.valor = valor
+            nodo.cambiar_valor(valor)
 
     def remover_nodo(self, nodo, huerfanos=True, padre=None, nodos=False):
+        self.__comprobar_vivo()
         if not isinstance(nodo, NodoArbolNario):
             if padre is None:
                 raise ValueError("'nodo' no es un nodo y padre es None")
             else:
-                nodo = util.buscar_por_atributo(padre.hijos(), "valor", nodo)
+                nodo = self.__buscar_hermano(padre, nodo)
                 if nodo is None:
                     raise KeyError("No hay nodo con valor 'nodo' en el padre")
+        marca = nodo.dueno
         if nodo is self.__raiz:
             self.__raiz = None
+            # Una marca nueva invalida las de todos los nodos en O(1)
+            self.__marca = ArbolNario._Marca()
         elif not huerfanos:
             if not self.__duplicados:
                 duplicados = set(nodo.padre().hijos()) & set(nodo.hijos())
@@ -955,14 +3464,22 @@ class ArbolNario:
                                    + str(nodo.valor))
             padre = nodo.padre()
             nodo.desenlazar_padre()
-            padre.agregar(nodo.hijos())
+            hijos = list(nodo.hijos())
+            del nodo[:]
+            padre.agregar(hijos)
+            self.__marcar(nodo, None)
         else:
             nodo.desenlazar_padre()
+            self.__marcar(nodo, None)
+        self.__cambiar(marca)
         return nodo if nodos else nodo.valor
 
     def vaciar(self):
         "Vacía el arbol"
+        self.__comprobar_vivo()
         self.__raiz = None
+        self.__marca = ArbolNario._Marca()
+        self.__cambiar(None)
 
     clear = vaciar
 
@@ -970,13 +3487,18 @@ class ArbolNario:
         """Realiza una copia plana del árbol.
 
         Los nodos de la copia son independientes del árbol original,
-        pero no necesariamente los valores.
+        pero no necesariamente los valores.  La copia de una instantánea
+        es un árbol normal con el contenido de la instantánea.
         """
-        nuevo_arbol = ArbolNario(duplicados=self.__duplicados)
+        nuevo_arbol = ArbolNario(self.__duplicados, self.__indexar,
+                                 self.__clave, self.__etiquetar)
+        nuevo_arbol.__agregados = dict(self.__agregados)
         if self.__raiz is None:
             return nuevo_arbol
-        nuevo_arbol.__raiz = NodoArbolNario(self.__raiz.valor)
-        if len(self.__raiz) == 0:
+        valor, hijos = self.__estado(self.__raiz)
+        nuevo_arbol.__raiz = NodoArbolNario(valor)
+        nuevo_arbol.__raiz.dueno = nuevo_arbol.__marca
+        if len(hijos) == 0:
             return nuevo_arbol
         # Tomado parcialmente de IteradorArbolNario.__preorden
         este_nodo = self.__raiz
@@ -985,70 +3507,211 @@ class ArbolNario:
         pila.insertar((este_nodo, otro_nodo))
         while len(pila) != 0:
             este_nodo, otro_nodo = pila.extraer()
-            if len(este_nodo) != 0:
-                otro_nodo.agregar(NodoArbolNario(hijo.valor)
-                                  for hijo in este_nodo.hijos())
-                pila.extender((este_hijo, otro_hijo) for este_hijo, otro_hijo in
-                              zip(reversed(este_nodo.hijos()),
-                                  reversed(otro_nodo.hijos()) ) )
+            valor, hijos = self.__estado(este_nodo)
+            if len(hijos) != 0:
+                if este_nodo.indexado:
+                    otro_nodo.indexar(este_nodo._NodoArbolNario__clave_indice)
+                otros_hijos = [NodoArbolNario(self.__estado(hijo)[0])
+                               for hijo in hijos]
+                otro_nodo.agregar(otros_hijos)
+                for otro_hijo in otros_hijos:
+                    otro_hijo.dueno = nuevo_arbol.__marca
+                pila.extender(zip(reversed(hijos), reversed(otros_hijos)))
         return nuevo_arbol
 
     copy = copiar
 
     class IteradorArbolNario:
+        """Iterador de un ArbolNario en el orden dado.
+
+        Con 'profundidad_maxima' o 'podar' se recorre limitando la
+        profundidad o saltando subárboles, como en ArbolNario.filtrar;
+        'podar' recibe lo mismo que devuelve el iterador."""
 
-        def __init__(self, arbol, orden=-1, nodos=False):
+        def __init__(self, arbol, orden=-1, nodos=False,
+                     profundidad_maxima=None, podar=None):
             util.comprobar_tipos("arbol", arbol, ArbolNario)
             raiz = arbol._ArbolNario__raiz
+            # En las instantáneas se recorren los estados de su versión,
+            # y solo se devuelven valores
+            self.__version = arbol._ArbolNario__version
+            instantanea = self.__version is not None
+            if instantanea and nodos:
+                raise ValueError("Las instantáneas solo se recorren por valores")
+            # La instantánea debe seguir viva y registrada mientras se recorre
+            self.__arbol = arbol if instantanea else None
             if orden == ArbolNario.PREORDEN:
                 self.__pila = Pila()
                 if raiz is not None:
                     self.__pila.insertar(raiz)
-                self.__funcion = self.__preorden
+                self.__funcion = self.__preorden_version if instantanea \
+                                 else self.__preorden
             elif orden == ArbolNario.ANCHURA:
                 self.__cola = Cola()
                 if raiz is not None:
                     self.__cola.anexar(raiz)
-                self.__funcion = self.__anchura
+                self.__funcion = self.__anchura_version if instantanea \
+                                 else self.__anchura
             elif orden == ArbolBinario.POSTORDEN:
-                self.__generador = self.__postorden_generador(raiz)
-                self.__funcion = self.__postorden
+                self.__pila = Pila()
+                if raiz is not None:
+                    self.__pila.insertar((raiz, False))
+                self.__funcion = self.__postorden_version if instantanea \
+                                 else self.__postorden
             else:
                 raise ValueError("Orden de recorrido inválido: " + str(orden))
-            self.__nodos = nodos
+            # Las funciones de las instantáneas ya devuelven los valores
+            self.__nodos = nodos or instantanea
+            if profundidad_maxima is not None or podar is not None:
+                if profundidad_maxima is not None and profundidad_maxima < 0:
+                    raise ValueError("Profundidad máxima negativa: "
+                                     + str(profundidad_maxima))
+                # Los recorridos limitados guardan la profundidad de cada
+                # nodo y ya devuelven lo pedido
+                self.__profundidad_maxima = profundidad_maxima
+                self.__podar = podar
+                self.__devolver_nodos = nodos
+                if orden == ArbolNario.PREORDEN:
+                    self.__pila = Pila()
+                    if raiz is not None:
+                        self.__pila.insertar((raiz, 0))
+                    self.__funcion = self.__preorden_limitado
+                elif orden == ArbolNario.ANCHURA:
+                    self.__cola = Cola()
+                    if raiz is not None:
+                        self.__cola.anexar((raiz, 0))
+                    self.__funcion = self.__anchura_limitada
+                else:
+                    self.__pila = Pila()
+                    if raiz is not None:
+                        self.__pila.insertar((raiz, 0, False))
+                    self.__funcion = self.__postorden_limitado
+                self.__nodos = True
 
         def __iter__(self): return self
 
         def __next__(self):
-            if self.__nodos:
-                return self.__funcion()
-            else:
-                return self.__funcion().valor
-
+            try:
+                if self.__nodos:
+                    return self.__funcion()
+                else:
+                    return self.__funcion().valor
+            except StopIteration:
+                # El iterador se referencia a sí mismo con __funcion, por
+                # lo que solo lo libera el recolector de ciclos; así no
+                # retiene la instantánea hasta entonces
+                self.__arbol = None
+                raise
+
+        # Se usa directamente la lista de hijos de cada nodo en lugar de
+        # 'hijos()' para no crear una Vista por cada nodo visitado
         def __preorden(self):
             if len(self.__pila) == 0:
                 raise StopIteration()
             procesado = self.__pila.extraer()
-            if len(procesado) != 0:
-                self.__pila.extender(reversed(procesado.hijos()))
+            hijos = procesado._NodoArbolNario__nodos_hijos
+            if len(hijos) != 0:
+                self.__pila.extender(reversed(hijos))
             return procesado
 
         def __anchura(self):
             if len(self.__cola) == 0:
                 raise StopIteration()
             procesado = self.__cola.extraer()
-            if len(procesado) != 0:
-                self.__cola.extender(iter(procesado.hijos()))
+            hijos = procesado._NodoArbolNario__nodos_hijos
+            if len(hijos) != 0:
+                self.__cola.extender(hijos)
             return procesado
 
-        def __postorden_generador(self, nodo):
-            if nodo is not None:
-                for hijo in nodo.hijos():
-                    yield from self.__postorden_generador(hijo)
-                yield nodo
-
         def __postorden(self):
-            return next(self.__generador)
+            # Como en IteradorArbolBinario, sin recursión
+            while len(self.__pila) != 0:
+                procesado, expandido = self.__pila.extraer()
+                if expandido or len(procesado) == 0:
+                    return procesado
+                self.__pila.insertar((procesado, True))
+                self.__pila.extender((hijo, False)
+                                     for hijo in reversed(procesado.hijos()))
+            raise StopIteration()
+
+        def __preorden_version(self):
+            if len(self.__pila) == 0:
+                raise StopIteration()
+            valor, hijos = self.__pila.extraer().estado(self.__version)
+            if len(hijos) != 0:
+                self.__pila.extender(reversed(hijos))
+            return valor
+
+        def __anchura_version(self):
+            if len(self.__cola) == 0:
+                raise StopIteration()
+            valor, hijos = self.__cola.extraer().estado(self.__version)
+            if len(hijos) != 0:
+                self.__cola.extender(hijos)
+            return valor
+
+        def __postorden_version(self):
+            while len(self.__pila) != 0:
+                procesado, expandido = self.__pila.extraer()
+                valor, hijos = procesado.estado(self.__version)
+                if expandido or len(hijos) == 0:
+                    return valor
+                self.__pila.insertar((procesado, True))
+                self.__pila.extender((hijo, False) for hijo in reversed(hijos))
+            raise StopIteration()
+
+        def __abrir(self, nodo):
+            "Devuelve el nodo o valor a devolver y los hijos del nodo."
+            if self.__version is not None:
+                return nodo.estado(self.__version)
+            elemento = nodo if self.__devolver_nodos else nodo.valor
+            return elemento, nodo._NodoArbolNario__nodos_hijos
+
+        def __expandir(self, hijos, profundidad):
+            "Indica si se deben visitar los hijos de un nodo."
+            return len(hijos) != 0 and (
+                self.__profundidad_maxima is None
+                or profundidad < self.__profundidad_maxima)
+
+        def __preorden_limitado(self):
+            while len(self.__pila) != 0:
+                nodo, profundidad = self.__pila.extraer()
+                elemento, hijos = self.__abrir(nodo)
+                if self.__podar is not None and self.__podar(elemento):
+                    continue
+                if self.__expandir(hijos, profundidad):
+                    self.__pila.extender((hijo, profundidad + 1)
+                                         for hijo in reversed(hijos))
+                return elemento
+            raise StopIteration()
+
+        def __anchura_limitada(self):
+            while len(self.__cola) != 0:
+                nodo, profundidad = self.__cola.extraer()
+                elemento, hijos = self.__abrir(nodo)
+                if self.__podar is not None and self.__podar(elemento):
+                    continue
+                if self.__expandir(hijos, profundidad):
+                    self.__cola.extender((hijo, profundidad + 1)
+                                         for hijo in hijos)
+                return elemento
+            raise StopIteration()
+
+        def __postorden_limitado(self):
+            while len(self.__pila) != 0:
+                nodo, profundidad, expandido = self.__pila.extraer()
+                elemento, hijos = self.__abrir(nodo)
+                if expandido:
+                    return elemento
+                # Se poda en la primera visita, antes de bajar a los hijos
+                if self.__podar is not None and self.__podar(elemento):
+                    continue
+                if not self.__expandir(hijos, profundidad):
+                    return elemento
+                self.__pila.insertar((nodo, profundidad, True))
+                self.__pila.extender((hijo, profundidad + 1, False)
+                                     for hijo in reversed(hijos))
+            raise StopIteration()
 
     def __iter__(self):
         "Devuelve un iterador preorden/en profundidad del arbol n-ario"
@@ -1067,11 +3730,17 @@ class ArbolNario:
 
 
 class Secuencia:
-    "Interfaz común para varias colecciones secuenciales"
+    """Interfaz común para varias colecciones secuenciales
 
-    def __init__(self, iterable=None):
-        # Almacen de datos de soporte para la interfaz, por ahora ListaEnlazada
-        self._soporte = ListaEnlazada(iterable)
+    'soporte' es la clase del almacén de datos de la secuencia.  Debe
+    ofrecer la interfaz de ListaEnlazada; ListaDeSaltos sirve cuando
+    se accede mucho por índice, ArregloCircular cuando solo se usan
+    los extremos, como en Pila y Cola, y ListaEnlazadaCompacta para
+    listas largas que deben ocupar poca memoria."""
+
+    def __init__(self, iterable=None, soporte=ListaEnlazada):
+        # Almacen de datos de soporte para la interfaz
+        self._soporte = soporte(iterable)
 
     def __len__(self): return len(self._soporte)
     largo = __len__
@@ -1098,7 +3767,7 @@ class Secuencia:
             tipo = type(secuencia)
         else:
             return NotImplemented
-        union = tipo()
+        union = tipo(soporte=type(self._soporte))
         union += self
         union += secuencia
         return union
@@ -1124,8 +3793,8 @@ class Lista(ListaEnlazada, Secuencia):
 class Pila(Secuencia):
     "Pila: el último elemento insertado es el primero extraído."
 
-    def __init__(self, iterable=None):
-        super().__init__(iterable)
+    def __init__(self, iterable=None, soporte=ArregloCircular):
+        super().__init__(iterable, soporte)
         self._ListaEnlazada__str = False  # Para __str__
 
     def insertar(self, valor):
@@ -1149,6 +3818,9 @@ class Pila(Secuencia):
 class Cola(Secuencia):
     "Cola: el primer elemento anexado es el primero extraído."
 
+    def __init__(self, iterable=None, soporte=ArregloCircular):
+        super().__init__(iterable, soporte)
+
     def anexar(self, valor):
         "Anexa 'valor' al final de la cola."
         self._soporte.anexar(valor)
@@ -1162,3 +3834,527 @@ class Cola(Secuencia):
     # Conveniencia para self[0]
     @property
     def frente(self): return self[0]
+
+class ColaConcurrente(Cola):
+    """Cola segura entre hilos para productores y consumidores.
+
+    Con 'capacidad', anexar espera mientras la cola está llena; extraer
+    siempre espera mientras está vacía.  Con bloquear=False no se espera y
+    se levanta IndexError; con 'tiempo' se espera a lo sumo esos segundos
+    y luego se levanta TimeoutError.  extraer_lote toma varios elementos
+    con una sola adquisición del cerrojo.
+
+    cerrar() indica que no se anexará nada más: anexar levanta ValueError,
+    y una vez vacía, extraer devuelve ColaConcurrente.FIN sin esperar,
+    extraer_lote una lista vacía y consumir termina.
+
+    len, str, repr, la lectura y el cambio por índice y la iteración
+    también toman el cerrojo.  La iteración, indice, buscar y
+    buscar_por_atributo recorren una copia tomada con el cerrojo, por lo
+    que sus funciones se llaman sin tenerlo."""
+
+    FIN = object()  # Centinela de cola cerrada y vacía
+    __LOTE = 64     # Elementos que extender anexa por adquisición
+
+    def __init__(self, iterable=None, capacidad=None, soporte=ArregloCircular):
+        if capacidad is not None:
+            util.comprobar_tipos("capacidad", capacidad, int)
+            if capacidad <= 0:
+                raise ValueError("La capacidad debe ser positiva: %d"
+                                 % capacidad)
+        super().__init__(iterable, soporte)
+        if capacidad is not None and len(self._soporte) > capacidad:
+            raise ValueError("Hay más elementos que la capacidad: %d"
+                             % capacidad)
+        self.__capacidad = capacidad
+        self.__cerrada = False
+        self.__cerrojo = threading.Lock()
+        self.__no_vacia = threading.Condition(self.__cerrojo)
+        self.__no_llena = threading.Condition(self.__cerrojo)
+
+    @property
+    def capacidad(self): return self.__capacidad
+
+    @property
+    def cerrada(self): return self.__cerrada
+
+    def __admite(self):
+        return self.__cerrada or self.__capacidad is None \
+               or len(self._soporte) < self.__capacidad
+
+    def __disponible(self):
+        return self.__cerrada or len(self._soporte) > 0
+
+    @staticmethod
+    def __esperar(condicion, predicado, bloquear, tiempo, mensaje):
+        "Espera, con el cerrojo tomado, a que se cumpla el predicado."
+        if predicado():
+            return
+        if not bloquear:
+            raise IndexError(mensaje)
+        if not condicion.wait_for(predicado, tiempo):
+            raise TimeoutError(mensaje)
+
+    def __anexar(self, valor, bloquear, tiempo):
+        self.__esperar(self.__no_llena, self.__admite, bloquear, tiempo,
+                       "la cola está llena")
+        if self.__cerrada:
+            raise ValueError("la cola está cerrada")
+        self._soporte.anexar(valor)
+        self.__no_vacia.notify()
+
+    def anexar(self, valor, bloquear=True, tiempo=None):
+        "Anexa 'valor' al final de la cola, esperando si está llena."
+        with self.__cerrojo:
+            self.__anexar(valor, bloquear, tiempo)
+    append = anexar
+
+    def __iadd__(self, iterable):
+        "Anexa los elementos de iterable, por lotes, esperando si se llena."
+        iterable = iter(iterable)
+        while True:
+            # El iterable se consume fuera del cerrojo
+            lote = list(itertools.islice(iterable, ColaConcurrente.__LOTE))
+            if not lote:
+                return self
+            with self.__cerrojo:
+                for valor in lote:
+                    self.__anexar(valor, True, None)
+    extender = __iadd__
+    extend = extender
+
+    def extraer(self, bloquear=True, tiempo=None):
+        """Extrae el valor en el frente de la cola, esperando si está vacía.
+
+        Devuelve ColaConcurrente.FIN si la cola está cerrada y vacía."""
+        with self.__cerrojo:
+            self.__esperar(self.__no_vacia, self.__disponible, bloquear,
+                           tiempo, "la cola está vacía")
+            if len(self._soporte) == 0:
+                return ColaConcurrente.FIN
+            valor = self._soporte.extraer(0)
+            self.__no_llena.notify()
+            return valor
+    pop = extraer
+
+    def extraer_lote(self, n, bloquear=True, tiempo=None):
+        """Extrae hasta n valores del frente en una lista, esperando solo
+        mientras la cola está vacía.
+
+        Devuelve una lista vacía si la cola está cerrada y vacía."""
+        util.comprobar_tipos("n", n, int)
+        if n <= 0:
+            raise ValueError("n debe ser positivo: %d" % n)
+        with self.__cerrojo:
+            self.__esperar(self.__no_vacia, self.__disponible, bloquear,
+                           tiempo, "la cola está vacía")
+            extraer = self._soporte.extraer
+            valores = [extraer(0)
+                       for i in range(min(n, len(self._soporte)))]
+            self.__no_llena.notify(len(valores))
+            return valores
+
+    def consumir(self, n=1):
+        """Itera los valores extraídos, de a lotes de n, hasta que la cola
+        esté cerrada y vacía."""
+        while True:
+            valores = self.extraer_lote(n)
+            if not valores:
+                return
+            yield from valores
+
+    def cerrar(self):
+        "Cierra la cola y despierta a todos los hilos que esperan."
+        with self.__cerrojo:
+            self.__cerrada = True
+            self.__no_vacia.notify_all()
+            self.__no_llena.notify_all()
+    close = cerrar
+
+    def vaciar(self):
+        with self.__cerrojo:
+            self._soporte.vaciar()
+            self.__no_llena.notify_all()
+    clear = vaciar
+
+    def __len__(self):
+        with self.__cerrojo:
+            return len(self._soporte)
+    largo = __len__
+
+    def __getitem__(self, indice):
+        with self.__cerrojo:
+            return self._soporte[indice]
+    obtener = __getitem__
+
+    def __setitem__(self, indice, valor):
+        with self.__cerrojo:
+            self._soporte[indice] = valor
+    cambiar = __setitem__
+
+    def __copia(self):
+        with self.__cerrojo:
+            return list(self._soporte)
+
+    def __iter__(self): return iter(self.__copia())
+
+    def indice(self, valor_buscado):
+        return util.indice(self.__copia(), valor_buscado)
+    index = indice
+
+    def buscar(self, funcion): return util.buscar(self.__copia(), funcion)
+
+    def buscar_por_atributo(self, nombre, valor):
+        return util.buscar_por_atributo(self.__copia(), nombre, valor)
+
+    def __str__(self):
+        with self.__cerrojo:
+            return str(self._soporte)
+
+    def __repr__(self):
+        # Secuencia.__repr__ usa str(self), que ya toma el cerrojo
+        return "ColaConcurrente(%s)" % self
+
+class NodoColaPrioridad:
+    """Elemento de una ColaPrioridad.  Sirve de manejador para
+    'disminuir_clave' y 'remover'.
+
+    'posicion' es su índice en el montículo, o -1 si ya no está en la cola.
+    No se deben cambiar sus atributos directamente."""
+
+    __slots__ = ("valor", "clave", "posicion")
+
+    def __init__(self, valor, clave, posicion):
+        self.valor = valor
+        self.clave = clave
+        self.posicion = posicion
+
+    @reprlib.recursive_repr("...")
+    def __repr__(self):
+        return "NodoColaPrioridad(%r, %r)" % (self.valor, self.clave)
+
+class ColaPrioridad:
+    """Cola de prioridad: se extrae primero el valor de menor clave.
+
+    Es un montículo binario en un arreglo: insertar, extraer_min,
+    disminuir_clave y remover toman O(log n), ver_min O(1), y construir
+    la cola desde un iterable O(n).  'clave' es una función que calcula
+    la prioridad de cada valor, por ejemplo su fecha de vencimiento; por
+    omisión es el propio valor.  Entre claves iguales no se garantiza
+    ningún orden.
+
+    Los recorridos devuelven los valores en el orden del montículo, no
+    por prioridad."""
+
+    def __init__(self, iterable=None, clave=None):
+        self.__clave = clave
+        self.__monticulo = []  # De NodoColaPrioridad
+        self.__str = False  # Para __str__
+        if iterable is not None:
+            self.extender(iterable)
+
+    def __len__(self): return len(self.__monticulo)
+    largo = __len__
+
+    def __clave_de(self, valor):
+        return valor if self.__clave is None else self.__clave(valor)
+
+    def __subir(self, posicion):
+        "Sube el nodo en 'posicion' hasta que su padre no sea mayor."
+        monticulo = self.__monticulo
+        nodo = monticulo[posicion]
+        while posicion > 0:
+            padre = (posicion - 1) // 2
+            if not nodo.clave < monticulo[padre].clave:
+                break
+            monticulo[posicion] = monticulo[padre]
+            monticulo[posicion].posicion = posicion
+            posicion = padre
+        monticulo[posicion] = nodo
+        nodo.posicion = posicion
+
+    def __bajar(self, posicion):
+        "Baja el nodo en 'posicion' hasta que ningún hijo sea menor."
+        monticulo = self.__monticulo
+        largo = len(monticulo)
+        nodo = monticulo[posicion]
+        while True:
+            hijo = 2 * posicion + 1
+            if hijo >= largo:
+                break
+            if hijo + 1 < largo \
+                and monticulo[hijo + 1].clave < monticulo[hijo].clave:
+                hijo += 1
+            if not monticulo[hijo].clave < nodo.clave:
+                break
+            monticulo[posicion] = monticulo[hijo]
+            monticulo[posicion].posicion = posicion
+            posicion = hijo
+        monticulo[posicion] = nodo
+        nodo.posicion = posicion
+
+    def __validar_nodo(self, nodo):
+        "Comprueba que el manejador sea de esta cola."
+        util.comprobar_tipos("nodo", nodo, NodoColaPrioridad)
+        if not 0 <= nodo.posicion < len(self.__monticulo) \
+            or self.__monticulo[nodo.posicion] is not nodo:
+            raise ValueError("El nodo no pertenece a la cola")
+
+    def insertar(self, valor, clave=None):
+        """Inserta el valor y devuelve su nodo, que sirve de manejador.
+
+        Si 'clave' es None, se calcula con la función de la cola."""
+        if clave is None:
+            clave = self.__clave_de(valor)
+        nodo = NodoColaPrioridad(valor, clave, len(self.__monticulo))
+        self.__monticulo.append(nodo)
+        self.__subir(nodo.posicion)
+        return nodo
+    push = insertar
+
+    def __iadd__(self, iterable):
+        """Inserta todos los valores del iterable.
+
+        Si son al menos tantos como los que ya hay, como al construir la
+        cola, rehace el montículo de una vez en tiempo lineal en lugar de
+        insertarlos uno por uno."""
+        nuevos = [NodoColaPrioridad(valor, self.__clave_de(valor), 0)
+                  for valor in iterable]
+        if len(self.__monticulo) != 0 and len(nuevos) < len(self.__monticulo):
+            for nodo in nuevos:
+                nodo.posicion = len(self.__monticulo)
+                self.__monticulo.append(nodo)
+                self.__subir(nodo.posicion)
+            return self
+        # Floyd: bajar cada nodo interno, de los últimos a la raíz
+        self.__monticulo += nuevos
+        for posicion, nodo in enumerate(self.__monticulo):
+            nodo.posicion = posicion
+        for posicion in range(len(self.__monticulo) // 2 - 1, -1, -1):
+            self.__bajar(posicion)
+        return self
+    extender = __iadd__
+    extend = extender
+
+    def ver_min(self):
+        "Devuelve el valor de menor clave sin extraerlo."
+        if len(self.__monticulo) == 0:
+            raise IndexError("la cola está vacía")
+        return self.__monticulo[0].valor
+    peek = ver_min
+
+    def __remover_en(self, posicion):
+        "Remueve el nodo en 'posicion' y lo devuelve."
+        monticulo = self.__monticulo
+        nodo = monticulo[posicion]
+        ultimo = monticulo.pop()
+        if ultimo is not nodo:
+            monticulo[posicion] = ultimo
+            ultimo.posicion = posicion
+            if posicion > 0 \
+                and ultimo.clave < monticulo[(posicion - 1) // 2].clave:
+                self.__subir(posicion)
+            else:
+                self.__bajar(posicion)
+        nodo.posicion = -1
+        return nodo
+
+    def extraer_min(self):
+        "Extrae el valor de menor clave."
+        if len(self.__monticulo) == 0:
+            raise IndexError("la cola está vacía")
+        return self.__remover_en(0).valor
+    extraer = extraer_min
+    pop = extraer_min
+
+    def disminuir_clave(self, nodo, clave):
+        """Cambia la clave del nodo por una menor o igual.
+
+        Levanta ValueError si la clave es mayor o si el nodo no está
+        en la cola."""
+        self.__validar_nodo(nodo)
+        if nodo.clave < clave:
+            raise ValueError("La clave nueva es mayor que la actual: %s > %s"
+                             % (clave, nodo.clave))
+        nodo.clave = clave
+        self.__subir(nodo.posicion)
+
+    def remover(self, nodo):
+        """Remueve el nodo de la cola y devuelve su valor.
+
+        Levanta ValueError si el nodo no está en la cola."""
+        self.__validar_nodo(nodo)
+        return self.__remover_en(nodo.posicion).valor
+    remove = remover
+
+    def vaciar(self):
+        "Vacía la cola"
+        for nodo in self.__monticulo:
+            nodo.posicion = -1
+        self.__monticulo = []
+    clear = vaciar
+
+    def __iter__(self):
+        return (nodo.valor for nodo in self.__monticulo)
+
+    def __str__(self):
+        if self.__str:
+            # Protección contra llamadas recursivas
+            return "[...]"
+        else:
+            self.__str = True
+            resultado = "[%s]" % ", ".join(map(repr, self))
+            self.__str = False
+            return resultado
+
+    def __repr__(self):
+        return "ColaPrioridad(%s)" % self
+
+class NodoTrie:
+    """Nodo de un Trie.  'hijos' asocia cada carácter siguiente a un nodo;
+    'valores' es la lista de valores cuya clave termina aquí, o None."""
+
+    __slots__ = ("hijos", "valores")
+
+    def __init__(self):
+        self.hijos = {}
+        self.valores = None
+
+    def __repr__(self):
+        return "NodoTrie(%s)#%d" % (sorted(self.hijos), len(self.valores or ()))
+
+class Trie:
+    """Árbol de prefijos que asocia claves de texto a valores.
+
+    Una clave puede tener varios valores, como dos proyectos con el mismo
+    nombre; se conservan en orden de inserción.  'normalizar' se aplica
+    a las claves al insertar y al buscar: con str.casefold, por ejemplo,
+    no se distinguen mayúsculas de minúsculas.
+
+    Insertar, remover y obtener toman tiempo proporcional a la longitud
+    de la clave.  'buscar_prefijo' devuelve las coincidencias en orden
+    de clave a medida que se piden, así que obtener las k primeras toma
+    tiempo proporcional al prefijo y a lo recorrido para hallarlas, no
+    a la cantidad total de claves."""
+
+    def __init__(self, normalizar=None):
+        self.__raiz = NodoTrie()
+        self.__normalizar = normalizar
+        self.__cantidad = 0
+
+    def __len__(self):
+        "Devuelve la cantidad de valores."
+        return self.__cantidad
+    largo = __len__
+
+    def __clave(self, clave):
+        util.comprobar_tipos("clave", clave, str)
+        return clave if self.__normalizar is None else self.__normalizar(clave)
+
+    def __nodo(self, clave):
+        "Devuelve el nodo de la clave ya normalizada, o None si no existe."
+        nodo = self.__raiz
+        for caracter in clave:
+            nodo = nodo.hijos.get(caracter)
+            if nodo is None:
+                return None
+        return nodo
+
+    def insertar(self, clave, valor):
+        "Asocia el valor a la clave, además de los que ya tenga."
+        nodo = self.__raiz
+        for caracter in self.__clave(clave):
+            siguiente = nodo.hijos.get(caracter)
+            if siguiente is None:
+                siguiente = nodo.hijos[caracter] = NodoTrie()
+            nodo = siguiente
+        if nodo.valores is None:
+            nodo.valores = []
+        nodo.valores.append(valor)
+        self.__cantidad += 1
+    insert = insertar
+
+    def remover(self, clave, valor):
+        """Remueve el primer valor igual a 'valor' asociado a la clave.
+
+        Levanta KeyError si no está.  Los nodos que quedan sin valores
+        ni hijos se eliminan."""
+        clave_normal = self.__clave(clave)
+        camino = [self.__raiz]
+        for caracter in clave_normal:
+            nodo = camino[-1].hijos.get(caracter)
+            if nodo is None:
+                break
+            camino.append(nodo)
+        nodo = camino[-1]
+        if len(camino) != len(clave_normal) + 1 or nodo.valores is None \
+            or valor not in nodo.valores:
+            raise KeyError("El valor no está asociado a la clave: %r: %r"
+                           % (clave, valor))
+        nodo.valores.remove(valor)
+        if len(nodo.valores) == 0:
+            nodo.valores = None
+        self.__cantidad -= 1
+        # Podar desde el final de la clave hacia la raíz
+        for i in range(len(clave_normal), 0, -1):
+            nodo = camino[i]
+            if nodo.valores is not None or len(nodo.hijos) != 0:
+                break
+            del camino[i - 1].hijos[clave_normal[i - 1]]
+    remove = remover
+
+    def obtener(self, clave):
+        "Devuelve una lista de los valores asociados exactamente a la clave."
+        nodo = self.__nodo(self.__clave(clave))
+        if nodo is None or nodo.valores is None:
+            return []
+        return list(nodo.valores)
+    get = obtener
+
+    def __contains__(self, clave):
+        "Indica si hay algún valor asociado exactamente a la clave."
+        nodo = self.__nodo(self.__clave(clave))
+        return nodo is not None and nodo.valores is not None
+
+    def buscar_prefijo(self, prefijo, k=None, pares=False):
+        """Itera en orden de clave los valores cuya clave empieza con 'prefijo'.
+
+        Devuelve a lo sumo k valores si k no es None.  Si 'pares' es
+        True, devuelve pares (clave normalizada, valor)."""
+        prefijo = self.__clave(prefijo)
+        nodo = self.__nodo(prefijo)
+        if nodo is None or k is not None and k <= 0:
+            return
+        restantes = k
+        pila = Pila()
+        pila.insertar((nodo, prefijo))
+        while len(pila) != 0:
+            nodo, clave = pila.extraer()
+            if nodo.valores is not None:
+                for valor in nodo.valores:
+                    yield (clave, valor) if pares else valor
+                    if restantes is not None:
+                        restantes -= 1
+                        if restantes == 0:
+                            return
+            # Los hijos se apilan en orden inverso para salir en orden
+            pila.extender((nodo.hijos[caracter], clave + caracter)
+                          for caracter in sorted(nodo.hijos, reverse=True))
+
+    def __iter__(self):
+        "Itera todos los valores en orden de clave."
+        return self.buscar_prefijo("")
+
+    def pares(self):
+        "Itera los pares (clave normalizada, valor) en orden de clave."
+        return self.buscar_prefijo("", pares=True)
+
+    def vaciar(self):
+        "Vacía el trie"
+        self.__raiz = NodoTrie()
+        self.__cantidad = 0
+    clear = vaciar
+
+    @reprlib.recursive_repr("...")
+    def __repr__(self):
+        return "Trie([%s])" % ", ".join("(%r, %r)" % par for par in self.pares())
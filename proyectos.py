@@ -7,6 +7,12 @@
 #   v2
 #     * Funciones de búsqueda
 #     * Gestor
+#     * Índice de fechas de las tareas en Proyecto
+#     * Índices de nombres en Gestor, Empresa y Proyecto
+#     * Páginas perezosas de empresas en Gestor
+#     * Ordenamiento de las empresas en Gestor
+#     * Tipo de árbol de los índices por ID configurable
+#     * Búsquedas de tareas limitadas por nivel
 
 
 from colecciones import *
@@ -37,6 +43,8 @@ class Empresa:
         "telefono", "correo", "gerente", "equipo_contacto",
         "_Empresa__proyectos" )
     _MSG_ERROR_ATRIBUTO_INEXISTENTE = "Las 'Empresa's no tienen atributo '%s'"
+    # Nombre del árbol de los proyectos, de los de colecciones.TIPOS_ARBOL
+    TIPO_ARBOL = "avl"
 
     def __init__(
         self,
@@ -55,13 +63,24 @@ class Empresa:
                      "telefono": telefono, "correo": correo, "gerente": gerente,
                      "equipo_contacto": equipo_contacto }
         self.modificar(atributos)
-        self.__proyectos = ArbolBinario()
+        self.__proyectos = crear_arbol(Empresa.TIPO_ARBOL)
+        self.__nombres = Trie(str.casefold)
 
     @property
     def proyectos(self):
-        "Árbol binario de proyectos de la empresa."
+        """Árbol de proyectos de la empresa, usado como mapa por ID.
+
+        Su tipo depende de Empresa.TIPO_ARBOL al crear la empresa."""
         return self.__proyectos
 
+    @property
+    def nombres(self):
+        """Trie de los proyectos por nombre, sin distinguir mayúsculas.
+
+        Se mantiene al agregar y eliminar proyectos y al cambiarles el
+        nombre con 'modificar_proyecto'."""
+        return self.__nombres
+
     def validar_atributos(self, atributos):
         "Valida los atributos de la clase Empresa"
         try:
@@ -90,34 +109,66 @@ class Empresa:
     def agregar_proyecto(self, proyecto):
         "Agrega un 'Proyecto' a la empresa, solo si no está ya incluida."
         util.comprobar_tipos("proyecto", proyecto, Proyecto)
-        if self.buscar_proyecto_por_id(proyecto.id) is None:
-            self.__proyectos.insertar(ClaveValor(proyecto.id, proyecto))
+        if proyecto.id not in self.__proyectos:
+            self.__proyectos.poner(proyecto.id, proyecto)
+            self.__nombres.insertar(proyecto.nombre, proyecto)
 
     def buscar_proyecto(self, atributo, valor):
         """Busca el primer proyecto cuyo atributo sea el valor dado.
 
         Véase la documentación de Proyecto.buscar_tarea.
         """
-        return util.buscar_por_atributo((par.valor for par in self.__proyectos),
-                                        atributo, valor)
+        return util.buscar_por_atributo(self.__proyectos, atributo, valor)
 
     def buscar_proyecto_por_id(self, id_):
         """Busca un proyecto por ID eficientemente.
 
         Devuelve None si no se encuentra el proyecto buscado."""
         util.comprobar_tipos("id", id_, int)
-        par = self.__proyectos.buscar(ClaveValor(id_, None))
-        return par.valor if par is not None else None
+        return self.__proyectos.obtener(id_)
+
+    def buscar_proyectos_por_nombre(self, prefijo, k=None):
+        """Itera por nombre los proyectos cuyo nombre empieza con 'prefijo',
+        sin distinguir mayúsculas.  Devuelve a lo sumo k si no es None."""
+        return self.__nombres.buscar_prefijo(prefijo, k)
+
+    def proyectos_por_id(self, desde=None, hasta=None):
+        """Itera en orden de ID los proyectos con ID entre 'desde' y 'hasta'.
+
+        Ambos extremos son inclusivos; None indica que no hay límite.
+        Solo se recorren los proyectos dentro del rango."""
+        return self.__proyectos.rango(desde, hasta)
 
     def eliminar_proyecto(self, proyecto):
         util.comprobar_tipos("proyecto", proyecto, Proyecto)
-        self.__proyectos.remover(ClaveValor(proyecto.id, None))
+        proyecto = self.__proyectos.quitar(proyecto.id)
+        self.__nombres.remover(proyecto.nombre, proyecto)
+
+    def modificar_proyecto(self, proyecto, atributos):
+        """Modifica los atributos del proyecto con Proyecto.modificar,
+        manteniendo el índice de nombres si pertenece a la empresa."""
+        util.comprobar_tipos("proyecto", proyecto, Proyecto)
+        if "nombre" not in atributos \
+            or self.__proyectos.obtener(proyecto.id) is not proyecto:
+            proyecto.modificar(atributos)
+            return
+        self.__nombres.remover(proyecto.nombre, proyecto)
+        try:
+            proyecto.modificar(atributos)
+        finally:
+            # Con el nombre nuevo, o el mismo si no era válido
+            self.__nombres.insertar(proyecto.nombre, proyecto)
 
     def modificar(self, atributos):
         """Modifica los atributos de esta empresa.
 
         Véase la documentación de Proyecto.modificar"""
         Proyecto.modificar(self, atributos)
+        if "_Empresa__proyectos" in atributos:
+            # Árbol de proyectos nuevo: se rehace el índice de nombres
+            self.__nombres = Trie(str.casefold)
+            for proyecto in self.__proyectos:
+                self.__nombres.insertar(proyecto.nombre, proyecto)
 
     def __format__(self, formato):
         if formato == "":
@@ -182,14 +233,65 @@ class Proyecto:
                      "estado": estado, "empresa": empresa,
                      "gerente": gerente, "equipo": equipo}
         self.modificar(atributos)
-        self.__tareas = ArbolNario(duplicados=False)
+        self.__tareas = ArbolNario(duplicados=False, indexar=True)
         self.__tareas.insertar_nodo(self)
+        self.__fechas = ArbolIntervalos()
+        self.__nombres = Trie(str.casefold)
 
     @property
     def tareas(self):
         "Árbol n-ario de tareas del proyecto."
         return self.__tareas
 
+    @property
+    def fechas(self):
+        """Árbol de intervalos de las fechas de todas las tareas y subtareas.
+
+        Las claves son (fecha_inicio, fecha_vencimiento, id(tarea)) y los
+        valores las tareas.  Se mantiene al agregar y eliminar tareas o
+        subtareas y al cambiar sus fechas con 'modificar'."""
+        return self.__fechas
+
+    @property
+    def nombres(self):
+        """Trie de todas las tareas y subtareas por nombre, sin distinguir
+        mayúsculas.  Se mantiene como el índice de fechas."""
+        return self.__nombres
+
+    @staticmethod
+    def __clave_fechas(tarea):
+        return (tarea.fecha_inicio, tarea.fecha_vencimiento, id(tarea))
+
+    def _indexar_tareas(self, tarea, subtareas=True):
+        "Agrega la tarea, y sus subtareas si se indica, a los índices."
+        tareas = tarea.subtareas if subtareas else (tarea,)
+        for tarea in tareas:
+            self.__fechas.poner(self.__clave_fechas(tarea), tarea)
+            self.__nombres.insertar(tarea.nombre, tarea)
+
+    def _desindexar_tareas(self, tarea, subtareas=True):
+        "Quita la tarea, y sus subtareas si se indica, de los índices."
+        tareas = tarea.subtareas if subtareas else (tarea,)
+        for tarea in tareas:
+            self.__fechas.quitar(self.__clave_fechas(tarea))
+            self.__nombres.remover(tarea.nombre, tarea)
+
+    def tareas_activas(self, fecha):
+        """Itera las tareas y subtareas activas en la fecha dada, es decir,
+        con fecha_inicio <= fecha <= fecha_vencimiento, por fecha de inicio."""
+        return self.__fechas.en_punto(fecha)
+
+    def tareas_entre(self, desde, hasta):
+        """Itera las tareas y subtareas cuyas fechas se solapan con el
+        período de 'desde' a 'hasta', inclusive, por fecha de inicio."""
+        return self.__fechas.solapados(desde, hasta)
+
+    def buscar_tareas_por_nombre(self, prefijo, k=None):
+        """Itera por nombre las tareas y subtareas cuyo nombre empieza con
+        'prefijo', sin distinguir mayúsculas.  Devuelve a lo sumo k si no
+        es None."""
+        return self.__nombres.buscar_prefijo(prefijo, k)
+
     def validar_atributos(self, atributos):
         "Valida los atributos de la clase Proyecto"
         try:
@@ -237,22 +339,43 @@ class Proyecto:
         if self.buscar_tarea("id", tarea.id) is None:
             self.__tareas.insertar_nodo(tarea.subtareas.raiz,
                                         self.__tareas.raiz)
+            self._indexar_tareas(tarea)
 
-    def buscar_tarea(self, atributo, valor):
+    def buscar_tarea(self, atributo, valor, niveles=None):
         """Busca la primera tarea cuyo atributo sea el valor dado.
 
         'atributo' debe ser tipo 'str', el nombre del atributo buscado
         Si el atributo no está presente en alguna tarea,
         simplemente se ignora.
+        Con 'niveles' solo se buscan las tareas hasta esa cantidad de
+        niveles de subtareas; 1 son solo las tareas principales.
         Devuelve None si no encuentra la tarea buscada
         """
-        iterador = self.__tareas.en_anchura()
+        iterador = self.__tareas.IteradorArbolNario(
+            self.__tareas, ArbolNario.ANCHURA, profundidad_maxima=niveles)
         next(iterador)  # Descartar raíz
         return util.buscar_por_atributo(iterador, atributo, valor)
 
+    def filtrar_tareas(self, funcion, niveles=None, podar=None):
+        """Itera perezosamente en anchura las tareas para las que 'funcion'
+        es verdadera.
+
+        'niveles' es como en buscar_tarea.  Las subtareas de las tareas
+        para las que 'podar' es verdadera no se visitan, y tampoco
+        esas tareas."""
+        podar_tarea = None
+        if podar is not None:
+            podar_tarea = lambda tarea: tarea is not self and podar(tarea)
+        iterador = self.__tareas.IteradorArbolNario(
+            self.__tareas, ArbolNario.ANCHURA, profundidad_maxima=niveles,
+            podar=podar_tarea)
+        next(iterador)  # Descartar raíz
+        return filter(funcion, iterador)
+
     def eliminar_tarea(self, tarea):
         util.comprobar_tipos("tarea", tarea, Tarea)
         self.__tareas.remover_nodo(tarea, padre=self.__tareas.raiz)
+        self._desindexar_tareas(tarea)
 
     def modificar(self, atributos):
         """Modifica los atributos de este proyecto.
@@ -267,6 +390,19 @@ class Proyecto:
         self.validar_atributos(atributos)
         for nombre, valor in atributos.items():
             setattr(self, nombre, valor)
+        if "_Proyecto__tareas" in atributos:
+            # Árbol de tareas nuevo: se rehacen los índices
+            self.__fechas = ArbolIntervalos()
+            self.__nombres = Trie(str.casefold)
+            tareas = self.__tareas.en_anchura()
+            next(tareas)  # Descartar raíz
+            for tarea in tareas:
+                self._indexar_tareas(tarea, subtareas=False)
+        # Empresa y Tarea también usan este método; Tarea descarta los
+        # agregados de su nodo por su cuenta
+        if len(atributos) != 0 and hasattr(self, "_Proyecto__tareas"):
+            # Los agregados del árbol pueden depender de los atributos
+            self.__tareas.raiz.invalidar_agregados()
 
     def __format__(self, formato):
         if formato == "":
@@ -330,7 +466,7 @@ class Tarea:
                      "estado": estado, "porcentaje": porcentaje,
                      "empresa_cliente": empresa_cliente}
         self.modificar(atributos)
-        self.__subtareas = ArbolNario(duplicados=False)
+        self.__subtareas = ArbolNario(duplicados=False, indexar=True)
         self.__subtareas.insertar_nodo(self)
 
     @property
@@ -338,6 +474,11 @@ class Tarea:
         "Subárbol n-ario de subtareas de la tarea."
         return self.__subtareas
 
+    def __proyecto(self):
+        "Devuelve el Proyecto al que pertenece la tarea, o None si no hay."
+        raiz = self.__subtareas.raiz.raiz().valor
+        return raiz if isinstance(raiz, Proyecto) else None
+
     def validar_atributos(self, atributos):
         "Valida los atributos de la clase Tarea"
         try:
@@ -372,27 +513,55 @@ class Tarea:
         "Agrega una 'Tarea' como subtarea, solo si no está ya incluida."
         util.comprobar_tipos("tarea", tarea, Tarea)
         if self.buscar_subtarea("id", tarea.id) is None:
-            self.__tareas.insertar_nodo(tarea.subtareas.raiz,
-                                        self.__subtareas.raiz)
+            self.__subtareas.insertar_nodo(tarea.subtareas.raiz,
+                                           self.__subtareas.raiz)
+            proyecto = self.__proyecto()
+            if proyecto is not None:
+                proyecto._indexar_tareas(tarea)
 
-    def buscar_subtarea(self, atributo, valor):
+    def buscar_subtarea(self, atributo, valor, niveles=None):
         """Busca la primera subtarea cuyo atributo sea el valor dado.
 
         Véase la documentación de Proyecto.buscar_tarea.
         """
-        iterador = self.__subtareas.en_anchura()
+        iterador = self.__subtareas.IteradorArbolNario(
+            self.__subtareas, ArbolNario.ANCHURA, profundidad_maxima=niveles)
         next(iterador)  # Descartar raíz
         return util.buscar_por_atributo(iterador, atributo, valor)
 
     def eliminar_subtarea(self, tarea):
         util.comprobar_tipos("tarea", tarea, Tarea)
+        proyecto = self.__proyecto()
         self.__subtareas.remover_nodo(tarea, padre=self.__subtareas.raiz)
+        if proyecto is not None:
+            proyecto._desindexar_tareas(tarea)
 
     def modificar(self, atributos):
         """Modifica los atributos de esta tarea.
 
-        Véase la documentación de Proyecto.modificar"""
-        Proyecto.modificar(self, atributos)
+        Véase la documentación de Proyecto.modificar.  Si cambian las
+        fechas o el nombre, se actualizan los índices del proyecto, y
+        siempre se descartan los agregados calculados de la tarea y de
+        sus ancestros (véase ArbolNario.registrar_agregado)."""
+        proyecto = None
+        if "fecha_inicio" in atributos or "fecha_vencimiento" in atributos \
+            or "nombre" in atributos:
+            # En el constructor aún no hay subtareas ni proyecto
+            if hasattr(self, "_Tarea__subtareas"):
+                proyecto = self.__proyecto()
+        if proyecto is None:
+            Proyecto.modificar(self, atributos)
+        else:
+            proyecto._desindexar_tareas(self, subtareas=False)
+            try:
+                Proyecto.modificar(self, atributos)
+            finally:
+                # Con los datos nuevos, o los mismos si no eran válidos
+                proyecto._indexar_tareas(self, subtareas=False)
+        if len(atributos) != 0 and hasattr(self, "_Tarea__subtareas"):
+            # Los agregados de la tarea y de sus ancestros, en el árbol
+            # del proyecto, pueden depender de los atributos
+            self.__subtareas.raiz.invalidar_agregados()
 
     def __format__(self, formato):
         if formato == "":
@@ -440,12 +609,18 @@ class Gestor:
     ERROR_TAREA_NO_PERTENECE = 21
     ERROR_NO_TAREA = 30
     _MSG_ERROR_TAREA_NO_ID = "No existe una tarea con ese ID: "
+    TAMANO_PAGINA = 20
+    # Nombre del árbol del índice de empresas, de colecciones.TIPOS_ARBOL
+    TIPO_ARBOL = "avl"
 
     def __init__(self):
         self.id_empresa_max = 0
         self.id_proyecto_max = 0
         self.id_tarea_max = 0
-        self.__empresas = ListaEnlazada()
+        self.__empresas = ListaEnlazadaCompacta()
+        # Índice por ID de las casillas de las empresas en la lista
+        self.__casillas_empresas = crear_arbol(Gestor.TIPO_ARBOL)
+        self.__nombres_empresas = Trie(str.casefold)
         self.empresa = None
         self.proyecto = None
         self.__tareas = Pila()
@@ -455,6 +630,32 @@ class Gestor:
         "Lista que almacena todas las empresas gestionadas."
         return self.__empresas
 
+    def pagina_de_empresas(self, pagina, tamano=None, condicion=None):
+        """Devuelve una Vista perezosa de la página dada (desde 0) de las
+        empresas, o de las que cumplen la condición si se da.
+
+        Se llega a la página siguiendo los enlaces, sin copiar las empresas
+        anteriores; sin condición, desde el extremo más cercano."""
+        if tamano is None:
+            tamano = Gestor.TAMANO_PAGINA
+        util.comprobar_tipos(("pagina", "tamano"), (pagina, tamano),
+                             (int, int))
+        if pagina < 0 or tamano <= 0:
+            raise ValueError("La página y el tamaño no son válidos: %d, %d"
+                             % (pagina, tamano))
+        empresas = self.__empresas
+        if condicion is not None:
+            empresas = empresas[:].filtrar(condicion)
+        return empresas[pagina * tamano:(pagina + 1) * tamano]
+
+    def ordenar_empresas(self, atributo="nombre", inverso=False):
+        """Ordena en su lugar la lista de empresas por el atributo dado,
+        como 'nombre' o 'fecha_creacion'.  El orden es estable y los
+        índices de las empresas siguen siendo válidos."""
+        util.comprobar_tipos("atributo", atributo, str)
+        self.__empresas.ordenar(lambda empresa: getattr(empresa, atributo),
+                                inverso)
+
     @property
     def tareas(self):
         "Pila que almacena la cadena de subtareas en edición."
@@ -489,16 +690,28 @@ class Gestor:
             self.id_empresa_max = atributos["id_"]
 
         empresa = Empresa(**atributos)
-        self.__empresas.anexar(empresa)
+        self.__casillas_empresas.poner(empresa.id,
+                                       self.__empresas.anexar(empresa))
+        self.__nombres_empresas.insertar(empresa.nombre, empresa)
         return empresa
 
     def buscar_empresa(self, atributo, valor):
         """Busca la primera empresa cuyo atributo sea el valor dado.
 
         Véase la documentación de Proyecto.buscar_tarea.
+        La búsqueda por ID es eficiente.
         """
+        if atributo == "id" and isinstance(valor, int):
+            casilla = self.__casillas_empresas.obtener(valor)
+            return self.__empresas.valor_en(casilla) \
+                   if casilla is not None else None
         return self.__empresas.buscar_por_atributo(atributo, valor)
 
+    def buscar_empresas_por_nombre(self, prefijo, k=None):
+        """Itera por nombre las empresas cuyo nombre empieza con 'prefijo',
+        sin distinguir mayúsculas.  Devuelve a lo sumo k si no es None."""
+        return self.__nombres_empresas.buscar_prefijo(prefijo, k)
+
     def modificar_empresa(self, atributos, empresa=None):
         self.__manejar_id_en_atributos(atributos, "id", "id_", True)
         id_ = atributos.pop("id", None)
@@ -506,7 +719,16 @@ class Gestor:
             empresa = self.buscar_empresa("id", id_)
             if empresa is None:
                 raise ValueError(Gestor._MSG_ERROR_EMPRESA_NO_ID + str(id_))
-        empresa.modificar(atributos)
+        casilla = self.__casillas_empresas.obtener(empresa.id)
+        if "nombre" not in atributos or casilla is None \
+            or self.__empresas.valor_en(casilla) is not empresa:
+            empresa.modificar(atributos)
+            return
+        self.__nombres_empresas.remover(empresa.nombre, empresa)
+        try:
+            empresa.modificar(atributos)
+        finally:
+            self.__nombres_empresas.insertar(empresa.nombre, empresa)
 
     def eliminar_empresa(self, id_o_empresa):
         if not isinstance(id_o_empresa, Empresa):
@@ -516,7 +738,12 @@ class Gestor:
                                  + str(id_o_empresa))
         else:
             empresa = id_o_empresa
-        self.__empresas.remover(empresa)
+        casilla = self.__casillas_empresas.obtener(empresa.id)
+        if casilla is None or self.__empresas.valor_en(casilla) is not empresa:
+            raise ValueError(Gestor._MSG_ERROR_EMPRESA_NO_ID + str(empresa.id))
+        self.__casillas_empresas.quitar(empresa.id)
+        self.__empresas.remover_nodo(casilla)
+        self.__nombres_empresas.remover(empresa.nombre, empresa)
 
     def agregar_proyecto(self, atributos, forzar=False):
         if self.empresa is None:
@@ -545,7 +772,7 @@ class Gestor:
             proyecto = self.empresa.buscar_proyecto_por_id(id_)
             if proyecto is None:
                 raise ValueError(Gestor._MSG_ERROR_PROYECTO_NO_ID + str(id_))
-        proyecto.modificar(atributos)
+        self.empresa.modificar_proyecto(proyecto, atributos)
 
     def eliminar_proyecto(self, id_o_proyecto):
         if self.empresa is None:
@@ -595,6 +822,27 @@ class Gestor:
         )
         return nodo.valor if nodo is not None else None
 
+    def buscar_tareas_por_nombre(self, prefijo, k=None):
+        """Itera por nombre las tareas del proyecto o tarea en edición cuyo
+        nombre empieza con 'prefijo', sin distinguir mayúsculas, como
+        buscar_tarea.  Devuelve a lo sumo k si no es None.
+
+        Usa el índice de nombres del proyecto; las coincidencias en otros
+        niveles de subtareas se descartan."""
+        if len(self.__tareas) == 0:
+            raiz = self.proyecto.tareas.raiz
+        else:
+            raiz = self.__tareas.cima.subtareas.raiz
+        encontradas = 0
+        if k is not None and k <= 0:
+            return
+        for tarea in self.proyecto.buscar_tareas_por_nombre(prefijo):
+            if tarea.subtareas.raiz.padre() is raiz:
+                yield tarea
+                encontradas += 1
+                if encontradas == k:
+                    return
+
     def modificar_tarea(self, atributos, tarea=None):
         if self.empresa is None:
             raise RuntimeError(Gestor.__MSG_ERROR_NO_EMPRESA,
@@ -0,0 +1,767 @@
+#!/usr/bin/env python3
+# Mediciones de rendimiento de las colecciones
+# Autor: Francisco Román, Francisco Unda y Santiago Pinto
+# Fecha: 2026-10-18
+# Cambios:
+#   v1
+#     * Profundidad de búsqueda en árboles con claves secuenciales
+#     * Soportes de Pila y Cola
+#     * Memoria por elemento de las colecciones enlazadas
+#     * Hijos indexados en ArbolNario
+#     * Pertenencia y ancestros en cadenas profundas de ArbolNario
+#     * Agregados de subárbol en ArbolNario
+#     * Ancestro común más bajo en ArbolNario
+#     * Instantáneas de ArbolAVL y ArbolNario frente a copiar
+#     * Cola de prioridad frente a una lista ordenada
+#     * Consultas de intervalos activos en una fecha
+#     * Búsqueda por prefijo de nombre con Trie
+#     * Páginas de listas enlazadas copiando frente a vistas perezosas
+#     * Ordenamiento en su lugar de listas enlazadas frente a reconstruirlas
+#     * Rendimiento de ColaConcurrente con varios productores y consumidores
+#     * Accesos con distribución de Zipf en ArbolSplay frente a ArbolAVL
+#     * Operaciones de cada tipo de árbol ordenado con distintas claves
+#     * Salida de las tablas en CSV
+#     * Búsquedas en ArbolNario limitadas por profundidad y con poda
+#
+# Uso: python rendimiento.py [--csv] [medicion ...]
+# Sin argumentos se ejecutan todas las mediciones.  Con --csv las tablas
+# se muestran como CSV.
+
+import bisect
+import csv
+import math
+import queue
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from colecciones import *
+
+
+def _cronometrar(funcion, *argumentos):
+    "Ejecuta la función y devuelve (resultado, segundos transcurridos)."
+    inicio = time.perf_counter()
+    resultado = funcion(*argumentos)
+    return resultado, time.perf_counter() - inicio
+
+def _medir_memoria(funcion, *argumentos):
+    "Ejecuta la función y devuelve (resultado, bytes que siguen reservados)."
+    tracemalloc.start()
+    try:
+        inicial = tracemalloc.get_traced_memory()[0]
+        resultado = funcion(*argumentos)
+        return resultado, tracemalloc.get_traced_memory()[0] - inicial
+    finally:
+        tracemalloc.stop()
+
+def _profundidad_media(arbol):
+    "Cantidad media de nodos visitados para encontrar cada valor del árbol."
+    total = cuenta = 0
+    for nodo in arbol.IteradorArbolBinario(arbol, ArbolBinario.PREORDEN,
+                                           nodos=True):
+        profundidad = 1
+        while nodo.padre() is not None:
+            nodo = nodo.padre()
+            profundidad += 1
+        total += profundidad
+        cuenta += 1
+    return total / cuenta if cuenta != 0 else 0.0
+
+# Si es verdadero, _imprimir_tabla muestra las tablas como CSV
+_CSV = False
+
+def _imprimir_tabla(encabezados, filas):
+    if _CSV:
+        escritor = csv.writer(sys.stdout, lineterminator="\n")
+        escritor.writerow(encabezados)
+        escritor.writerows(filas)
+        return
+    anchos = [max(len(str(celda)) for celda in columna)
+              for columna in zip(encabezados, *filas)]
+    for fila in [encabezados] + filas:
+        print("  ".join(str(celda).rjust(ancho)
+                        for celda, ancho in zip(fila, anchos)))
+
+
+def medir_claves_secuenciales(n=10**5, n_binario=2000, busquedas=10**4):
+    """Inserta IDs secuenciales como lo hace Gestor.agregar_proyecto.
+
+    El ArbolBinario sin balancear degenera en una lista, por lo que se
+    mide con una cantidad menor de elementos ('n_binario')."""
+    print("Inserción de claves secuenciales y búsqueda aleatoria")
+    filas = []
+    for tipo, cantidad in ((ArbolBinario, n_binario), (ArbolAVL, n_binario),
+                           (ArbolAVL, n)):
+        arbol = tipo()
+        # Uno a uno, como llegan los proyectos; extender construiría
+        # el árbol balanceado de una vez
+        ignorar, t_insercion = _cronometrar(
+            lambda: [arbol.insertar(clave) for clave in range(cantidad)])
+        claves = [random.randrange(cantidad) for i in range(busquedas)]
+        ignorar, t_busqueda = _cronometrar(
+            lambda: [arbol.buscar(clave) for clave in claves])
+        filas.append((tipo.__name__, cantidad, arbol.altura(),
+                      "%.2f" % _profundidad_media(arbol),
+                      "%.2f" % math.log2(cantidad),
+                      "%.2f" % (t_insercion * 1e6 / cantidad),
+                      "%.2f" % (t_busqueda * 1e6 / busquedas) ))
+    _imprimir_tabla(("árbol", "n", "altura", "prof. media", "log2(n)",
+                     "inserción (us)", "búsqueda (us)"), filas)
+
+
+def medir_pilas_y_colas(n=10**5):
+    """Inserta y extrae n elementos de Pila y Cola con cada soporte.
+
+    Es el patrón de uso de los iteradores de los árboles, que apilan o
+    encolan cada nodo visitado."""
+    print("Pila y Cola: insertar y extraer %d elementos" % n)
+
+    def usar_pila(pila):
+        for i in range(n):
+            pila.insertar(i)
+        while len(pila) != 0:
+            pila.extraer()
+
+    def usar_cola(cola):
+        for i in range(n):
+            cola.anexar(i)
+        while len(cola) != 0:
+            cola.extraer()
+
+    filas = []
+    for soporte in (ListaEnlazada, ListaDeSaltos, ArregloCircular):
+        ignorar, t_pila = _cronometrar(usar_pila, Pila(soporte=soporte))
+        ignorar, t_cola = _cronometrar(usar_cola, Cola(soporte=soporte))
+        filas.append((soporte.__name__, "%.3f" % (t_pila * 1e6 / n),
+                      "%.3f" % (t_cola * 1e6 / n)))
+    _imprimir_tabla(("soporte", "pila (us)", "cola (us)"), filas)
+
+
+def medir_memoria(n=10**5):
+    """Bytes reservados por elemento al construir cada colección enlazada.
+
+    Se cuentan los nodos y la estructura, no los valores, que son
+    enteros pequeños compartidos por el intérprete; salvo en ArbolAVL,
+    que necesita claves distintas (unos 28 bytes más por elemento)."""
+    print("Memoria por elemento con %d elementos" % n)
+
+    def construir_nario():
+        arbol = ArbolNario()
+        arbol.insertar_nodo(0)
+        padres = [arbol.raiz]
+        for i in range(1, n):
+            nodo = NodoArbolNario(i % 256)
+            padres[i // 8].agregar(nodo)
+            padres.append(nodo)
+        return arbol
+
+    constructores = (
+        ("ListaEnlazada", lambda: ListaEnlazada(i % 256 for i in range(n))),
+        ("ListaEnlazadaCompacta",
+         lambda: ListaEnlazadaCompacta(i % 256 for i in range(n))),
+        ("ListaDeSaltos", lambda: ListaDeSaltos(i % 256 for i in range(n))),
+        ("ArregloCircular",
+         lambda: ArregloCircular(i % 256 for i in range(n))),
+        ("ArbolAVL", lambda: ArbolAVL.desde_ordenados(range(n))),
+        ("ArbolNario", construir_nario),
+    )
+    filas = []
+    for nombre, constructor in constructores:
+        coleccion, memoria = _medir_memoria(constructor)
+        filas.append((nombre, len(coleccion), "%.1f" % (memoria / n)))
+        del coleccion
+    _imprimir_tabla(("colección", "elementos", "bytes/elemento"), filas)
+
+
+def medir_hijos_indexados(n=5 * 10**4, n_lineal=2000):
+    """Inserta n hijos en la raíz de un ArbolNario sin duplicados, como las
+    tareas de primer nivel de un proyecto, y luego los remueve por valor.
+
+    Sin índice cada inserción recorre los hermanos, por lo que se mide
+    con una cantidad menor de hijos ('n_lineal')."""
+    print("Hijos de un mismo nodo en ArbolNario sin duplicados")
+
+    def insertar(arbol, cantidad):
+        for i in range(cantidad):
+            arbol.insertar_nodo(i, arbol.raiz)
+
+    def remover(arbol, cantidad):
+        for i in range(cantidad):
+            arbol.remover_nodo(i, padre=arbol.raiz)
+
+    filas = []
+    for indexar, cantidad in ((False, n_lineal), (True, n_lineal),
+                              (True, n)):
+        arbol = ArbolNario(duplicados=False, indexar=indexar)
+        arbol.insertar_nodo(None)
+        ignorar, t_insercion = _cronometrar(insertar, arbol, cantidad)
+        ignorar, t_remocion = _cronometrar(remover, arbol, cantidad)
+        filas.append(("sí" if indexar else "no", cantidad,
+                      "%.2f" % (t_insercion * 1e6 / cantidad),
+                      "%.2f" % (t_remocion * 1e6 / cantidad) ))
+    _imprimir_tabla(("índice", "hijos", "inserción (us)", "remoción (us)"),
+                    filas)
+
+
+def medir_cadenas_profundas(n=10**4, consultas=10**3):
+    """Inserta una cadena de n subtareas anidadas en un ArbolNario y luego
+    consulta ancestros al azar, con y sin etiquetas.
+
+    Cada inserción comprueba que el padre esté en el árbol, lo que antes
+    requería subir hasta la raíz."""
+    print("Cadena de %d nodos anidados en ArbolNario" % n)
+
+    def insertar(arbol):
+        nodo = arbol.raiz
+        for i in range(n):
+            hijo = NodoArbolNario(i)
+            arbol.insertar_nodo(hijo, nodo)
+            nodo = hijo
+
+    filas = []
+    for etiquetar in (False, True):
+        arbol = ArbolNario(etiquetar=etiquetar)
+        arbol.insertar_nodo(None)
+        ignorar, t_insercion = _cronometrar(insertar, arbol)
+        nodos = list(arbol.IteradorArbolNario(arbol, nodos=True))
+        pares = [(random.choice(nodos), random.choice(nodos))
+                 for i in range(consultas)]
+        arbol.es_ancestro(arbol.raiz, arbol.raiz)  # Numera los nodos
+        ignorar, t_consulta = _cronometrar(
+            lambda: [arbol.es_ancestro(a, b) for a, b in pares])
+        filas.append(("sí" if etiquetar else "no",
+                      "%.2f" % (t_insercion * 1e6 / n),
+                      "%.2f" % (t_consulta * 1e6 / consultas) ))
+    _imprimir_tabla(("etiquetas", "inserción (us)", "es_ancestro (us)"),
+                    filas)
+
+
+def medir_agregados(n=2 * 10**4, cambios=200):
+    """Compara len() de un ArbolNario aleatorio de n nodos recorriéndolo
+    y con el agregado ArbolNario.TAMANO, consultando tras cada inserción."""
+    print("len() de un ArbolNario de %d nodos tras cada inserción" % n)
+    filas = []
+    for registrar in (False, True):
+        arbol = ArbolNario()
+        arbol.insertar_nodo(0)
+        nodos = [arbol.raiz]
+        for i in range(1, n):
+            nodo = NodoArbolNario(i)
+            arbol.insertar_nodo(nodo, random.choice(nodos))
+            nodos.append(nodo)
+        if registrar:
+            arbol.registrar_agregado(*ArbolNario.TAMANO)
+            len(arbol)  # Primer cálculo completo
+
+        def insertar_y_contar():
+            for i in range(cambios):
+                arbol.insertar_nodo(NodoArbolNario(i), random.choice(nodos))
+                len(arbol)
+
+        ignorar, tiempo = _cronometrar(insertar_y_contar)
+        filas.append(("sí" if registrar else "no",
+                      "%.2f" % (tiempo * 1e6 / cambios) ))
+    _imprimir_tabla(("agregado", "inserción y len() (us)"), filas)
+
+
+def medir_ancestro_comun(n=10**5, consultas=10**4):
+    """Ancestro común de pares de nodos al azar en un ArbolNario profundo,
+    subiendo por 'padre()' y con ArbolNario.ancestro_comun."""
+    print("Ancestro común en un ArbolNario de %d nodos" % n)
+    arbol = ArbolNario()
+    arbol.insertar_nodo(0)
+    nodos = [arbol.raiz]
+    for i in range(1, n):
+        # Padres entre los últimos nodos, para un árbol profundo
+        nodo = NodoArbolNario(i)
+        arbol.insertar_nodo(nodo, random.choice(nodos[-50:]))
+        nodos.append(nodo)
+    pares = [(random.choice(nodos), random.choice(nodos))
+             for i in range(consultas)]
+
+    def subiendo():
+        for a, b in pares:
+            ancestros = set()
+            while a is not None:
+                ancestros.add(a)
+                a = a.padre()
+            while b not in ancestros:
+                b = b.padre()
+
+    ignorar, t_subiendo = _cronometrar(subiendo)
+    # La primera consulta numera los nodos y construye la tabla
+    ignorar, t_construccion = _cronometrar(arbol.ancestro_comun,
+                                           nodos[1], nodos[2])
+    ignorar, t_consultas = _cronometrar(
+        lambda: [arbol.ancestro_comun(a, b) for a, b in pares])
+    _imprimir_tabla(("método", "preparación (ms)", "consulta (us)"),
+                    [("subiendo", "-", "%.2f" % (t_subiendo * 1e6 / consultas)),
+                     ("ancestro_comun", "%.0f" % (t_construccion * 1e3),
+                      "%.2f" % (t_consultas * 1e6 / consultas))])
+
+def medir_instantaneas(n=5 * 10**4, copias=20):
+    """Toma 'copias' respaldos de un ArbolAVL y de un ArbolNario de n
+    elementos, cambiando un elemento después de cada uno, con 'copiar'
+    y con 'instantanea'."""
+    print("Respaldos de árboles de %d elementos" % n)
+    avl = ArbolAVL.desde_ordenados(range(n))
+    nario = ArbolNario()
+    nario.insertar_nodo(0)
+    nodos = [nario.raiz]
+    for i in range(1, n):
+        nodo = NodoArbolNario(i)
+        nario.insertar_nodo(nodo, random.choice(nodos))
+        nodos.append(nodo)
+
+    def respaldar(arbol, respaldo, cambiar):
+        respaldos = []
+        for i in range(copias):
+            respaldos.append(respaldo(arbol))
+            cambiar(i)
+        return respaldos
+
+    def cambiar_avl(i):
+        avl.remover(i)
+        avl.insertar(i)
+
+    def cambiar_nario(i):
+        nario.insertar_nodo(NodoArbolNario(-i), random.choice(nodos))
+
+    filas = []
+    for nombre, arbol, cambiar in (("ArbolAVL", avl, cambiar_avl),
+                                   ("ArbolNario", nario, cambiar_nario)):
+        for metodo in ("copiar", "instantanea"):
+            respaldo = getattr(type(arbol), metodo)
+            # Por separado: tracemalloc altera mucho los tiempos
+            segundos = _cronometrar(respaldar, arbol, respaldo, cambiar)[1]
+            memoria = _medir_memoria(respaldar, arbol, respaldo, cambiar)[1]
+            filas.append((nombre, metodo, "%.3f" % (segundos * 1e3 / copias),
+                          "%.0f" % (memoria / copias / 1024)))
+    _imprimir_tabla(("árbol", "método", "ms por respaldo", "KiB por respaldo"),
+                    filas)
+
+def medir_cola_prioridad(n=10**5, rondas=10**4):
+    """Mantiene n vencimientos pendientes, como las tareas de un gestor.
+    En cada ronda se extrae el próximo, se agrega uno nuevo y se
+    adelanta uno al azar.  Compara una lista ordenada (bisect) con
+    ColaPrioridad."""
+    print("Cola de prioridad: %d vencimientos, %d rondas" % (n, rondas))
+    claves = [random.randrange(10**6) for i in range(n)]
+    nuevas = [random.randrange(10**6) for i in range(rondas)]
+    adelantos = [random.randrange(1, 1000) for i in range(rondas)]
+
+    # Cada función devuelve el tiempo de las rondas, sin la preparación
+    def con_lista():
+        # Pares (clave, id) para encontrar cada elemento con bisect
+        lista = sorted((clave, i) for i, clave in enumerate(claves))
+        actuales = dict(enumerate(claves))
+        inicio = time.perf_counter()
+        for ronda in range(rondas):
+            clave, i = lista.pop(0)
+            del actuales[i]
+            i = n + ronda
+            bisect.insort(lista, (nuevas[ronda], i))
+            actuales[i] = nuevas[ronda]
+            # El mismo elemento que en con_cola
+            i = ronda % (n + ronda + 1)
+            if i in actuales:
+                del lista[bisect.bisect_left(lista, (actuales[i], i))]
+                actuales[i] -= adelantos[ronda]
+                bisect.insort(lista, (actuales[i], i))
+        return time.perf_counter() - inicio
+
+    def con_cola():
+        cola = ColaPrioridad()
+        nodos = [cola.insertar(i, clave) for i, clave in enumerate(claves)]
+        inicio = time.perf_counter()
+        for ronda in range(rondas):
+            cola.extraer_min()
+            nodos.append(cola.insertar(n + ronda, nuevas[ronda]))
+            # Puede ser uno ya extraído; entonces se salta
+            nodo = nodos[ronda % len(nodos)]
+            if nodo.posicion >= 0:
+                cola.disminuir_clave(nodo, nodo.clave - adelantos[ronda])
+        return time.perf_counter() - inicio
+
+    ignorar, t_ordenar = _cronometrar(sorted, claves)
+    ignorar, t_construir = _cronometrar(ColaPrioridad, claves)
+    _imprimir_tabla(("método", "construcción (ms)", "ronda (us)"),
+                    [("lista ordenada", "%.1f" % (t_ordenar * 1e3),
+                      "%.2f" % (con_lista() * 1e6 / rondas)),
+                     ("ColaPrioridad", "%.1f" % (t_construir * 1e3),
+                      "%.2f" % (con_cola() * 1e6 / rondas))])
+
+def medir_intervalos(n=10**5, consultas=1000):
+    """Busca los intervalos que contienen un punto al azar entre n
+    intervalos cortos, como las tareas activas en una fecha, recorriendo
+    todos y con ArbolIntervalos.en_punto."""
+    print("Intervalos que contienen un punto entre %d intervalos" % n)
+    intervalos = []
+    for i in range(n):
+        inicio = random.randrange(10**6)
+        intervalos.append((inicio, inicio + random.randrange(1, 200), i))
+    arbol = ArbolIntervalos.desde_ordenados(intervalos)
+    puntos = [random.randrange(10**6) for i in range(consultas)]
+
+    def recorriendo():
+        return sum(len([i for i in intervalos if i[0] <= punto <= i[1]])
+                   for punto in puntos)
+
+    def con_arbol():
+        return sum(len(list(arbol.en_punto(punto))) for punto in puntos)
+
+    encontrados, t_recorriendo = _cronometrar(recorriendo)
+    encontrados, t_arbol = _cronometrar(con_arbol)
+    print("Resultados por consulta: %.1f" % (encontrados / consultas))
+    _imprimir_tabla(("método", "consulta (us)"),
+                    [("recorriendo", "%.1f" % (t_recorriendo * 1e6 / consultas)),
+                     ("ArbolIntervalos", "%.1f" % (t_arbol * 1e6 / consultas))])
+
+
+def medir_nombres(n=10**5, consultas=1000, k=20):
+    """Busca los primeros k nombres, en orden, que empiezan con un prefijo
+    al azar entre n nombres, como 'consultar Proy*', recorriendo todos y
+    ordenando, y con Trie.buscar_prefijo."""
+    print("Primeros %d nombres con un prefijo entre %d nombres" % (k, n))
+    letras = "abcdefghijklmnopqrstuvwxyz"
+    nombres = ["".join(random.choice(letras) for j in range(8))
+               for i in range(n)]
+    trie = Trie(str.casefold)
+    for i, nombre in enumerate(nombres):
+        trie.insertar(nombre, i)
+    prefijos = [random.choice(nombres)[:random.randrange(1, 4)].upper()
+                for i in range(consultas)]
+
+    def recorriendo():
+        total = 0
+        for prefijo in prefijos:
+            prefijo = prefijo.casefold()
+            total += len(sorted(nombre for nombre in nombres
+                                if nombre.startswith(prefijo))[:k])
+        return total
+
+    def con_trie():
+        return sum(len(list(trie.buscar_prefijo(prefijo, k)))
+                   for prefijo in prefijos)
+
+    encontrados, t_recorriendo = _cronometrar(recorriendo)
+    encontrados, t_trie = _cronometrar(con_trie)
+    print("Resultados por consulta: %.1f" % (encontrados / consultas))
+    _imprimir_tabla(("método", "consulta (us)"),
+                    [("recorriendo", "%.1f" % (t_recorriendo * 1e6 / consultas)),
+                     ("Trie", "%.1f" % (t_trie * 1e6 / consultas))])
+
+
+def medir_paginas(n=10**5, paginas=200, tamano=20):
+    """Lee páginas de 'tamano' elementos de una ListaEnlazadaCompacta de n,
+    como Gestor.empresas, copiando desde el inicio y con rebanadas
+    perezosas, con y sin un filtro antes de paginar."""
+    print("Páginas de %d elementos en una lista de %d" % (tamano, n))
+    lista = ListaEnlazadaCompacta(range(n))
+    inicios = [random.randrange(n // tamano) * tamano for i in range(paginas)]
+    # La lista filtrada tiene la mitad de elementos: sus páginas se toman
+    # solo entre las completas para que todas tengan 'tamano' elementos
+    inicios_filtrados = [random.randrange(n // 2 // tamano) * tamano
+                         for i in range(paginas)]
+    par = lambda x: x % 2 == 0
+
+    def copiando():
+        return sum(len(list(lista)[inicio:inicio + tamano])
+                   for inicio in inicios)
+
+    def con_vista():
+        return sum(len(list(lista[inicio:inicio + tamano]))
+                   for inicio in inicios)
+
+    def filtrando_copiando():
+        return sum(len([x for x in lista if par(x)][inicio:inicio + tamano])
+                   for inicio in inicios_filtrados)
+
+    def filtrando_con_vista():
+        filtrada = lista[:].filtrar(par)
+        return sum(len(list(filtrada[inicio:inicio + tamano]))
+                   for inicio in inicios_filtrados)
+
+    filas = []
+    for nombre, funcion in (("copiando", copiando),
+                            ("vista", con_vista),
+                            ("filtro, copiando", filtrando_copiando),
+                            ("filtro, vista", filtrando_con_vista)):
+        leidos, t = _cronometrar(funcion)
+        assert leidos == paginas * tamano
+        filas.append((nombre, "%.1f" % (t * 1e6 / paginas)))
+    _imprimir_tabla(("método", "página (us)"), filas)
+
+
+def medir_ordenar(n=10**5):
+    """Ordena por una clave una ListaEnlazada y una ListaEnlazadaCompacta
+    de n elementos, reconstruyéndolas desde sorted() y en su lugar con
+    ordenar.  La memoria es la que queda reservada al terminar, con la
+    lista original todavía viva."""
+    print("Ordenar listas enlazadas de %d elementos" % n)
+    claves = [(random.randrange(n), i) for i in range(n)]
+    clave = lambda par: par[0]
+    filas = []
+    for tipo in (ListaEnlazada, ListaEnlazadaCompacta):
+        reconstruir = lambda lista: tipo(sorted(lista, key=clave))
+        en_su_lugar = lambda lista: lista.ordenar(clave)
+        for nombre, funcion in (("sorted y reconstruir", reconstruir),
+                                ("ordenar", en_su_lugar)):
+            ignorar, t = _cronometrar(funcion, tipo(claves))
+            lista = tipo(claves)
+            ignorar, memoria = _medir_memoria(funcion, lista)
+            filas.append((tipo.__name__, nombre, "%.1f" % (t * 1e3),
+                          "%.0f" % (memoria / 1024)))
+    _imprimir_tabla(("colección", "método", "tiempo (ms)", "memoria (KiB)"),
+                    filas)
+
+
+def medir_cola_concurrente(n=10**5, productores=4, consumidores=4,
+                           capacidad=1000, lote=64):
+    """Pasa n elementos de varios hilos productores a varios consumidores a
+    través de una cola acotada: queue.Queue como referencia, y
+    ColaConcurrente extrayendo de a uno y con extraer_lote."""
+    print("%d elementos, %d productores, %d consumidores, capacidad %d"
+          % (n, productores, consumidores, capacidad))
+    por_productor = n // productores
+
+    def con_queue():
+        cola = queue.Queue(capacidad)
+        def producir():
+            for i in range(por_productor):
+                cola.put(i)
+        def cerrar():
+            for i in range(consumidores):
+                cola.put(None)  # Centinela, como se acostumbra con Queue
+        def consumir():
+            while cola.get() is not None:
+                pass
+        return producir, consumir, cerrar
+
+    def con_cola_concurrente(n_lote):
+        cola = ColaConcurrente(capacidad=capacidad)
+        def producir():
+            for i in range(por_productor):
+                cola.anexar(i)
+        def consumir():
+            for valor in cola.consumir(n_lote):
+                pass
+        return producir, consumir, cola.cerrar
+
+    def correr(producir, consumir, cerrar):
+        hilos_p = [threading.Thread(target=producir)
+                   for i in range(productores)]
+        hilos_c = [threading.Thread(target=consumir)
+                   for i in range(consumidores)]
+        inicio = time.perf_counter()
+        for hilo in hilos_p + hilos_c:
+            hilo.start()
+        for hilo in hilos_p:
+            hilo.join()
+        cerrar()
+        for hilo in hilos_c:
+            hilo.join()
+        return time.perf_counter() - inicio
+
+    filas = []
+    for nombre, preparar in (("queue.Queue", con_queue),
+                             ("extraer", lambda: con_cola_concurrente(1)),
+                             ("extraer_lote(%d)" % lote,
+                              lambda: con_cola_concurrente(lote))):
+        t = correr(*preparar())
+        filas.append((nombre, "%.0f" % (productores * por_productor / t)))
+    _imprimir_tabla(("método", "elementos/s"), filas)
+
+
+def _traza_zipf(n, accesos, exponente):
+    """Traza de 'accesos' claves entre 1 y n donde la k-ésima más popular
+    tiene probabilidad proporcional a 1 / k ** exponente.  Con exponente
+    0 es uniforme.  Las claves populares se reparten al azar."""
+    claves = list(range(1, n + 1))
+    random.shuffle(claves)
+    pesos = [1 / k ** exponente for k in range(1, n + 1)]
+    return random.choices(claves, weights=pesos, k=accesos)
+
+def _profundidad(arbol, clave):
+    "Cantidad de nodos que se visitan al buscar la clave en el árbol."
+    nodo = next(arbol.IteradorArbolBinario(arbol, ArbolBinario.PREORDEN,
+                                           nodos=True), None)
+    profundidad = 0
+    while nodo is not None:
+        profundidad += 1
+        if clave == nodo.clave:
+            break
+        nodo = nodo.izquierdo() if clave < nodo.clave else nodo.derecho()
+    return profundidad
+
+def medir_splay(n=10**4, accesos=10**5):
+    """Reproduce trazas de consultas por ID de proyecto, como las de
+    Empresa.buscar_proyecto_por_id, en un ArbolAVL y en un ArbolSplay de
+    n proyectos insertados por ID secuencial.  Compara, con distintos
+    sesgos de Zipf, el tiempo por consulta y los nodos visitados por
+    consulta, medidos en otra repetición de la traza."""
+    print("Consultas por ID en %d proyectos, %d consultas por traza"
+          % (n, accesos))
+    filas = []
+    for exponente in (0, 0.8, 1.0, 1.2, 1.5):
+        traza = _traza_zipf(n, accesos, exponente)
+        fila = ["%.1f" % exponente]
+        for tipo in (ArbolAVL, ArbolSplay):
+            visitados = 0
+            for medir in (False, True):
+                arbol = tipo()
+                for id_ in range(1, n + 1):
+                    arbol.poner(id_, id_)
+                obtener = arbol.obtener
+                if medir:
+                    for id_ in traza:
+                        visitados += _profundidad(arbol, id_)
+                        obtener(id_)
+                else:
+                    ignorar, t = _cronometrar(
+                        lambda: [obtener(id_) for id_ in traza])
+            fila += ["%.2f" % (t * 1e6 / accesos),
+                     "%.1f" % (visitados / accesos)]
+        filas.append(fila)
+    _imprimir_tabla(("zipf", "AVL (us)", "AVL nodos",
+                     "splay (us)", "splay nodos"), filas)
+
+def medir_arboles(n=10**4, n_binario=2000, busquedas=2 * 10**4):
+    """Compara los tipos de árbol de TIPOS_ARBOL, que se pueden elegir para
+    Empresa.proyectos y Gestor, con claves secuenciales (como los IDs),
+    aleatorias y sesgadas.  Mide la inserción una a una, las búsquedas,
+    el recorrido en orden, la memoria reservada y la remoción de la mitad
+    de las claves.  Con claves sesgadas se insertan primero las populares
+    de una traza de Zipf y se busca según esa traza; con las otras, se
+    busca al azar.
+
+    El ArbolBinario sin balancear degenera en una lista con las claves
+    secuenciales, por lo que allí se mide con 'n_binario' claves."""
+    print("Tipos de árbol: %d claves, %d búsquedas; tiempos en ms, "
+          "memoria en KiB" % (n, busquedas))
+    filas = []
+    for claves in ("secuencial", "aleatoria", "zipf"):
+        for tipo in sorted(TIPOS_ARBOL):
+            cantidad = n
+            if tipo == "binario" and claves == "secuencial":
+                cantidad = n_binario
+            if claves == "zipf":
+                traza = _traza_zipf(cantidad, busquedas, 1.2)
+                populares = dict.fromkeys(traza)
+                orden = list(populares)
+                orden += [clave for clave in range(1, cantidad + 1)
+                          if clave not in populares]
+            else:
+                orden = list(range(1, cantidad + 1))
+                if claves == "aleatoria":
+                    random.shuffle(orden)
+                traza = [random.randint(1, cantidad)
+                         for i in range(busquedas)]
+            arbol = crear_arbol(tipo)
+            poner = arbol.poner
+            ignorar, t_insercion = _cronometrar(
+                lambda: [poner(clave, clave) for clave in orden])
+            arbol = crear_arbol(tipo)
+            poner = arbol.poner
+            ignorar, memoria = _medir_memoria(
+                lambda: [poner(clave, clave) for clave in orden])
+            obtener = arbol.obtener
+            ignorar, t_busqueda = _cronometrar(
+                lambda: [obtener(clave) for clave in traza])
+            ignorar, t_recorrido = _cronometrar(list, arbol)
+            quitar = arbol.quitar
+            ignorar, t_remocion = _cronometrar(
+                lambda: [quitar(clave) for clave in orden[::2]])
+            filas.append((claves, tipo, cantidad,
+                          "%.1f" % (t_insercion * 1e3),
+                          "%.1f" % (t_busqueda * 1e3),
+                          "%.1f" % (t_recorrido * 1e3),
+                          "%.1f" % (t_remocion * 1e3),
+                          "%.0f" % (memoria / 1024)))
+    _imprimir_tabla(("claves", "árbol", "n", "inserción", "búsqueda",
+                     "en orden", "remoción", "memoria"), filas)
+
+def medir_busqueda_por_nivel(principales=200, subtareas=50, busquedas=200):
+    """Busca tareas principales por ID en un árbol como el de un Proyecto,
+    con 'principales' tareas de 'subtareas' subtareas cada una, como
+    Proyecto.buscar_tarea: recorriendo todo el árbol en anchura frente a
+    limitar la profundidad a 1, y buscando una subtarea en profundidad
+    sin poda frente a podando las tareas principales de otro ID."""
+    print("Búsqueda en %d tareas principales con %d subtareas cada una"
+          % (principales, subtareas))
+    arbol = ArbolNario()
+    arbol.insertar_nodo(0)
+    padres = {}
+    for i in range(1, principales + 1):
+        tarea = NodoArbolNario(i)
+        arbol.insertar_nodo(tarea, arbol.raiz)
+        for j in range(subtareas):
+            id_ = principales + 1 + (i - 1) * subtareas + j
+            arbol.insertar_nodo(id_, tarea)
+            padres[id_] = i
+    ids = [random.randint(1, principales) for i in range(busquedas)]
+    ignorar, t_completa = _cronometrar(
+        lambda: [arbol.buscar_por_valor(id_) for id_ in ids])
+    ignorar, t_nivel = _cronometrar(
+        lambda: [arbol.buscar_por_valor(id_, profundidad_maxima=1)
+                 for id_ in ids])
+    ids = random.sample(sorted(padres), busquedas)
+    ignorar, t_sin_poda = _cronometrar(
+        lambda: [arbol.buscar_por_valor(id_, ArbolNario.PREORDEN)
+                 for id_ in ids])
+    ignorar, t_poda = _cronometrar(
+        lambda: [arbol.buscar_por_valor(
+                     id_, ArbolNario.PREORDEN,
+                     podar=lambda nodo: nodo.valor != 0
+                           and nodo.valor <= principales
+                           and nodo.valor != padres[id_])
+                 for id_ in ids])
+    _imprimir_tabla(("búsqueda", "completa (us)", "limitada (us)"),
+                    [("principal, nivel 1",
+                      "%.0f" % (t_completa * 1e6 / busquedas),
+                      "%.0f" % (t_nivel * 1e6 / busquedas)),
+                     ("subtarea, poda",
+                      "%.0f" % (t_sin_poda * 1e6 / busquedas),
+                      "%.0f" % (t_poda * 1e6 / busquedas))])
+
+
+MEDICIONES = {
+    "secuenciales": medir_claves_secuenciales,
+    "pilas_y_colas": medir_pilas_y_colas,
+    "memoria": medir_memoria,
+    "hijos": medir_hijos_indexados,
+    "cadenas": medir_cadenas_profundas,
+    "agregados": medir_agregados,
+    "ancestro_comun": medir_ancestro_comun,
+    "instantaneas": medir_instantaneas,
+    "cola_prioridad": medir_cola_prioridad,
+    "intervalos": medir_intervalos,
+    "nombres": medir_nombres,
+    "paginas": medir_paginas,
+    "ordenar": medir_ordenar,
+    "cola_concurrente": medir_cola_concurrente,
+    "splay": medir_splay,
+    "arboles": medir_arboles,
+    "busqueda_por_nivel": medir_busqueda_por_nivel,
+}
+
+def main(argumentos):
+    global _CSV
+    if "--csv" in argumentos:
+        _CSV = True
+        argumentos = [nombre for nombre in argumentos if nombre != "--csv"]
+    nombres = argumentos if len(argumentos) != 0 else list(MEDICIONES)
+    for nombre in nombres:
+        if nombre not in MEDICIONES:
+            print("Medición desconocida: %s.  Disponibles: %s"
+                  % (nombre, ", ".join(MEDICIONES)))
+            return 1
+    for nombre in nombres:
+        MEDICIONES[nombre]()
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
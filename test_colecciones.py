@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+# Pruebas de las colecciones
+# Autor: Francisco Román, Francisco Unda y Santiago Pinto
+#
+# Uso: python -m unittest test_colecciones
+
+import operator
+import random
+import threading
+import unittest
+
+from colecciones import *
+
+
+class PruebaListas(unittest.TestCase):
+    """Comportamiento común de ListaEnlazada y ListaEnlazadaCompacta.
+
+    Cada prueba se ejecuta con ambas clases, comparándolas con 'list'."""
+
+    TIPOS = (ListaEnlazada, ListaEnlazadaCompacta)
+
+    @staticmethod
+    def valor_de(lista, manejador):
+        if isinstance(lista, ListaEnlazadaCompacta):
+            return lista.valor_en(manejador)
+        return manejador.valor
+
+    def comparar(self, lista, referencia):
+        self.assertEqual(len(lista), len(referencia))
+        self.assertEqual(list(lista.IteradorL2E(lista)), referencia)
+        self.assertEqual(list(lista.IteradorL2E(lista, adelante=False)),
+                         referencia[::-1])
+        self.assertEqual(list(reversed(lista)), referencia[::-1])
+        for i in range(0, len(referencia), 7):
+            self.assertEqual(lista[i], referencia[i])
+
+    def test_operaciones(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                aleatorio = random.Random(25)
+                lista, referencia = tipo(), []
+                for paso in range(2000):
+                    operacion = aleatorio.randrange(6)
+                    valor = aleatorio.randrange(1, 100)
+                    if operacion == 0 or len(referencia) == 0:
+                        lista.anexar(valor)
+                        referencia.append(valor)
+                    elif operacion == 1:
+                        indice = aleatorio.randrange(len(referencia) + 1)
+                        lista.insertar(indice, valor)
+                        referencia.insert(indice, valor)
+                    elif operacion == 2:
+                        indice = aleatorio.randrange(len(referencia))
+                        self.assertEqual(lista.extraer(indice),
+                                         referencia.pop(indice))
+                    elif operacion == 3:
+                        self.assertEqual(lista.extraer(), referencia.pop(0))
+                    elif operacion == 4:
+                        valor = aleatorio.choice(referencia)
+                        lista.remover(valor)
+                        referencia.remove(valor)
+                    else:
+                        indice = aleatorio.randrange(len(referencia))
+                        lista[indice] = valor
+                        referencia[indice] = valor
+                    if paso % 50 == 0:
+                        self.comparar(lista, referencia)
+                self.comparar(lista, referencia)
+                while len(referencia) != 0:
+                    self.assertEqual(lista.extraer_ultimo(), referencia.pop())
+                self.comparar(lista, referencia)
+                self.assertRaises(IndexError, lista.extraer)
+                self.assertRaises(ValueError, lista.remover, 1)
+
+    def test_insertar_al_inicio(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                lista = tipo([2, 3])
+                lista.insertar(1)
+                self.comparar(lista, [1, 2, 3])
+
+    def test_manejadores(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                lista = tipo()
+                primero = lista.anexar(1)
+                tercero = lista.anexar(3)
+                segundo = lista.insertar_despues(primero, 2)
+                self.assertEqual(self.valor_de(lista, segundo), 2)
+                self.assertEqual(lista.remover_nodo(tercero), 3)
+                self.assertRaises(ValueError, lista.remover_nodo, tercero)
+                self.comparar(lista, [1, 2])
+
+    def test_manejadores_extraidos_son_invalidos(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                lista = tipo()
+                manejadores = [lista.anexar(valor) for valor in range(6)]
+                lista.extraer()  # Primero
+                lista.extraer_ultimo()
+                lista.extraer(1)  # Del medio: el valor 2
+                del lista[0]
+                lista.remover(3)
+                for i in (0, 5, 2, 1, 3):
+                    self.assertRaises(ValueError, lista.remover_nodo,
+                                      manejadores[i])
+                self.comparar(lista, [4])
+                lista.vaciar()
+                self.assertRaises(ValueError, lista.remover_nodo,
+                                  manejadores[4])
+                self.assertEqual(len(lista), 0)
+
+    def test_ordenar_conserva_manejadores(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                aleatorio = random.Random(11)
+                valores = [aleatorio.randrange(50) for i in range(300)]
+                lista = tipo()
+                manejadores = [lista.anexar(valor) for valor in valores]
+                lista.ordenar()
+                self.comparar(lista, sorted(valores))
+                for manejador, valor in zip(manejadores, valores):
+                    self.assertEqual(self.valor_de(lista, manejador), valor)
+                # Siguen sirviendo para modificar la lista
+                referencia = sorted(valores)
+                referencia.remove(valores[0])
+                lista.remover_nodo(manejadores[0])
+                posicion = referencia.index(valores[1])
+                referencia.insert(posicion + 1, -1)
+                lista.insertar_despues(manejadores[1], -1)
+                self.comparar(lista, referencia)
+                lista.ordenar(inverso=True)
+                self.comparar(lista, sorted(referencia, reverse=True))
+
+    def test_casillas_liberadas_se_reutilizan(self):
+        lista = ListaEnlazadaCompacta(range(10))
+        casilla = lista.insertar(5, 100)
+        lista.remover_nodo(casilla)
+        self.assertEqual(lista.anexar(200), casilla)
+        # Extraer y anexar alternadamente no hace crecer los arreglos
+        casillas = set()
+        for i in range(1000):
+            lista.extraer(i % len(lista))
+            casillas.add(lista.anexar(i))
+        self.assertEqual(casillas, set(range(11)))
+        self.assertEqual(len(lista), 11)
+
+
+class PruebaListaDeSaltos(unittest.TestCase):
+
+    def comparar(self, lista, referencia):
+        self.assertEqual(len(lista), len(referencia))
+        self.assertEqual(list(lista), referencia)
+        self.assertEqual(list(reversed(lista)), referencia[::-1])
+        for i in range(len(referencia)):
+            self.assertEqual(lista[i], referencia[i])
+
+    def test_operaciones(self):
+        aleatorio = random.Random(8)
+        lista, referencia = ListaDeSaltos(), []
+        for paso in range(2000):
+            operacion = aleatorio.randrange(5)
+            valor = aleatorio.randrange(1, 100)
+            if operacion == 0 or len(referencia) == 0:
+                lista.anexar(valor)
+                referencia.append(valor)
+            elif operacion == 1:
+                indice = aleatorio.randrange(len(referencia) + 1)
+                lista.insertar(indice, valor)
+                referencia.insert(indice, valor)
+            elif operacion == 2:
+                indice = aleatorio.randrange(len(referencia))
+                self.assertEqual(lista.extraer(indice),
+                                 referencia.pop(indice))
+            elif operacion == 3:
+                indice = aleatorio.randrange(len(referencia))
+                lista[indice] = valor
+                referencia[indice] = valor
+            else:
+                valor = aleatorio.choice(referencia)
+                lista.remover(valor)
+                referencia.remove(valor)
+            if paso % 100 == 0:
+                self.comparar(lista, referencia)
+        self.comparar(lista, referencia)
+        while len(referencia) != 0:
+            self.assertEqual(lista.extraer_ultimo(), referencia.pop())
+        self.comparar(lista, referencia)
+        self.assertRaises(IndexError, lista.extraer)
+        self.assertRaises(IndexError, lista.__getitem__, 0)
+
+    def test_como_soporte_de_secuencia(self):
+        pila = Pila(range(10), soporte=ListaDeSaltos)
+        pila.insertar(10)
+        self.assertEqual(pila.cima, 10)
+        self.assertEqual(pila.extraer(), 10)
+        self.assertEqual(list(pila), list(range(9, -1, -1)))
+        union = pila + Pila([20])
+        self.assertIsInstance(union._soporte, ListaDeSaltos)
+        self.assertEqual(union.extraer(), 20)
+
+
+class PruebaArregloCircular(unittest.TestCase):
+
+    def test_operaciones(self):
+        aleatorio = random.Random(9)
+        arreglo, referencia = ArregloCircular(), []
+        for paso in range(3000):
+            operacion = aleatorio.randrange(6)
+            valor = aleatorio.randrange(1, 100)
+            # Los extremos predominan para dar vueltas y crecer
+            if operacion <= 1 or len(referencia) == 0:
+                arreglo.anexar(valor)
+                referencia.append(valor)
+            elif operacion == 2:
+                arreglo.insertar(valor)
+                referencia.insert(0, valor)
+            elif operacion == 3:
+                self.assertEqual(arreglo.extraer(), referencia.pop(0))
+            elif operacion == 4:
+                self.assertEqual(arreglo.extraer_ultimo(), referencia.pop())
+            else:
+                indice = aleatorio.randrange(len(referencia))
+                if aleatorio.randrange(2) == 0:
+                    arreglo.insertar(indice, valor)
+                    referencia.insert(indice, valor)
+                else:
+                    self.assertEqual(arreglo.extraer(indice),
+                                     referencia.pop(indice))
+            self.assertEqual(len(arreglo), len(referencia))
+            if paso % 100 == 0:
+                self.assertEqual(list(arreglo), referencia)
+                self.assertEqual(list(reversed(arreglo)), referencia[::-1])
+        self.assertEqual([arreglo[i] for i in range(len(referencia))],
+                         referencia)
+        arreglo.vaciar()
+        self.assertRaises(IndexError, arreglo.extraer)
+        self.assertRaises(IndexError, arreglo.extraer_ultimo)
+
+    def test_pila_y_cola(self):
+        pila, cola = Pila(), Cola()
+        for valor in range(100):
+            pila.insertar(valor)
+            cola.anexar(valor)
+        self.assertEqual((pila.cima, cola.frente), (99, 0))
+        self.assertEqual(list(pila), list(range(99, -1, -1)))
+        self.assertEqual(list(cola), list(range(100)))
+        self.assertEqual([pila.extraer() for i in range(50)],
+                         list(range(99, 49, -1)))
+        self.assertEqual([cola.extraer() for i in range(50)],
+                         list(range(50)))
+        self.assertEqual((len(pila), len(cola)), (50, 50))
+
+
+class PruebaArbolAVL(unittest.TestCase):
+
+    def comprobar_balance(self, arbol):
+        "Comprueba la altura guardada y el balance de cada nodo."
+        alturas = {None: 0}
+        for nodo in arbol.IteradorArbolBinario(arbol, ArbolBinario.POSTORDEN,
+                                               nodos=True):
+            izquierda = alturas[nodo.izquierdo()]
+            derecha = alturas[nodo.derecho()]
+            self.assertLessEqual(abs(izquierda - derecha), 1)
+            alturas[nodo] = nodo.altura
+            self.assertEqual(nodo.altura, 1 + max(izquierda, derecha))
+
+    def test_insertar_ordenados(self):
+        arbol = ArbolAVL()
+        for valor in range(1023):
+            arbol.insertar(valor)
+        self.comprobar_balance(arbol)
+        self.assertEqual(arbol.altura(), 10)
+        self.assertEqual(list(arbol), list(range(1023)))
+
+    def test_remover(self):
+        aleatorio = random.Random(1)
+        arbol = ArbolAVL()
+        valores = list(range(500))
+        arbol.extender(valores)
+        aleatorio.shuffle(valores)
+        for valor in valores[:400]:
+            self.assertEqual(arbol.remover(valor), valor)
+        self.comprobar_balance(arbol)
+        self.assertEqual(list(arbol), sorted(valores[400:]))
+        self.assertLessEqual(arbol.altura(), 9)
+        self.assertRaises(KeyError, arbol.remover, valores[0])
+
+
+class PruebaArbolIntervalos(unittest.TestCase):
+
+    def test_solapados(self):
+        aleatorio = random.Random(18)
+        arbol, intervalos = ArbolIntervalos(), set()
+        for i in range(300):
+            inicio = aleatorio.randrange(1000)
+            intervalo = (inicio, inicio + aleatorio.randrange(50), i)
+            arbol.poner(intervalo, i)
+            intervalos.add(intervalo)
+        for intervalo in aleatorio.sample(sorted(intervalos), 100):
+            self.assertEqual(arbol.quitar(intervalo), intervalo[2])
+            intervalos.remove(intervalo)
+        for i in range(100):
+            inicio = aleatorio.randrange(-20, 1050)
+            fin = inicio + aleatorio.randrange(30)
+            esperados = sorted(x for x in intervalos
+                               if x[0] <= fin and inicio <= x[1])
+            self.assertEqual(list(arbol.solapados(inicio, fin, pares=True)),
+                             [(x, x[2]) for x in esperados])
+            self.assertEqual(list(arbol.en_punto(inicio)),
+                             [x[2] for x in sorted(intervalos)
+                              if x[0] <= inicio <= x[1]])
+
+    def test_extremos_e_intervalos_invalidos(self):
+        arbol = ArbolIntervalos()
+        arbol.insertar((1, 3))
+        arbol.insertar((3, 3))
+        arbol.insertar((5, 9))
+        self.assertEqual(list(arbol.en_punto(3)), [(1, 3), (3, 3)])
+        self.assertEqual(list(arbol.solapados(4, 4)), [])
+        self.assertEqual(list(arbol.solapados(9, 20)), [(5, 9)])
+        self.assertRaises(ValueError, arbol.insertar, (4, 2))
+        self.assertRaises(ValueError, arbol.poner, (4, 2), "x")
+
+
+class PruebaArbolSplay(unittest.TestCase):
+
+    @staticmethod
+    def raiz(arbol):
+        return next(arbol.IteradorArbolBinario(arbol, ArbolBinario.PREORDEN,
+                                               nodos=True))
+
+    def test_accesos_suben_a_la_raiz(self):
+        arbol = ArbolSplay()
+        for clave in range(1, 64):
+            arbol.poner(clave, clave)
+        self.assertEqual(arbol.obtener(9), 9)
+        self.assertEqual(self.raiz(arbol).clave, 9)
+        self.assertTrue(20 in arbol)
+        self.assertEqual(self.raiz(arbol).clave, 20)
+
+    def test_cambios_suben_a_la_raiz(self):
+        arbol = ArbolSplay()
+        for clave in range(1, 64):
+            arbol.poner(clave, clave)
+        self.assertEqual(arbol.poner(5, "x"), 5)
+        raiz = self.raiz(arbol)
+        self.assertEqual((raiz.clave, raiz.valor), (5, "x"))
+        arbol.insertar(40, cambiar=True)
+        self.assertEqual(self.raiz(arbol).clave, 40)
+        self.assertEqual(list(arbol.claves()),
+                         list(range(1, 64)))
+        self.assertEqual(len(arbol), 63)
+
+
+class PruebaArbolNario(unittest.TestCase):
+
+    @staticmethod
+    def construir(n=30, etiquetar=False):
+        "Árbol de n nodos numerados en el que el padre de i es (i - 1) // 3."
+        arbol = ArbolNario(etiquetar=etiquetar)
+        nodos = [NodoArbolNario(0)]
+        arbol.insertar_nodo(nodos[0])
+        for i in range(1, n):
+            nodos.append(NodoArbolNario(i))
+            arbol.insertar_nodo(nodos[i], nodos[(i - 1) // 3])
+        return arbol, nodos
+
+    def test_en_arbol(self):
+        for etiquetar in (False, True):
+            with self.subTest(etiquetar=etiquetar):
+                arbol, nodos = self.construir(etiquetar=etiquetar)
+                otro, ajenos = self.construir()
+                self.assertTrue(all(arbol.en_arbol(nodo) for nodo in nodos))
+                self.assertFalse(arbol.en_arbol(ajenos[3]))
+                arbol.remover_nodo(nodos[2])
+                self.assertFalse(arbol.en_arbol(nodos[2]))
+                self.assertFalse(arbol.en_arbol(nodos[7]))
+                self.assertTrue(arbol.en_arbol(nodos[4]))
+                # Árbol cuya raíz se inserta luego en otro, como las
+                # subtareas de una tarea
+                raiz = NodoArbolNario("raiz")
+                subarbol = ArbolNario(etiquetar=etiquetar)
+                subarbol.insertar_nodo(raiz)
+                arbol.insertar_nodo(raiz, nodos[4])
+                nuevo = NodoArbolNario("nuevo")
+                subarbol.insertar_nodo(nuevo, raiz)
+                self.assertTrue(subarbol.en_arbol(nuevo))
+                self.assertTrue(arbol.en_arbol(nuevo))
+                self.assertFalse(subarbol.en_arbol(nodos[4]))
+
+    def test_numeracion_por_arbol(self):
+        arbol, nodos = self.construir(etiquetar=True)
+        otro, ajenos = self.construir(etiquetar=True)
+        self.assertTrue(arbol.es_ancestro(nodos[1], nodos[13]))
+        self.assertEqual(arbol.profundidad(nodos[13]), 3)
+        entradas = arbol._ArbolNario__entradas
+        # Los cambios en otro árbol no obligan a renumerar este
+        otro.insertar_nodo(NodoArbolNario("x"), ajenos[5])
+        otro.remover_nodo(ajenos[6])
+        self.assertTrue(arbol.es_ancestro(nodos[0], nodos[29]))
+        self.assertIs(arbol._ArbolNario__entradas, entradas)
+        # Los cambios hechos desde el árbol dueño se ven en el subárbol
+        raiz, hijo = NodoArbolNario("raiz"), NodoArbolNario("hijo")
+        subarbol = ArbolNario(etiquetar=True)
+        subarbol.insertar_nodo(raiz)
+        arbol.insertar_nodo(raiz, nodos[13])
+        subarbol.insertar_nodo(hijo, raiz)
+        self.assertEqual(subarbol.profundidad(hijo), 1)
+        self.assertEqual(arbol.profundidad(hijo), 5)
+        nuevo = NodoArbolNario("nuevo")
+        arbol.insertar_nodo(nuevo, hijo)
+        self.assertTrue(subarbol.es_ancestro(raiz, nuevo))
+        self.assertEqual(subarbol.profundidad(nuevo), 2)
+        arbol.remover_nodo(hijo)
+        self.assertFalse(subarbol.es_ancestro(raiz, nuevo))
+
+    def test_ancestro_comun(self):
+        arbol, nodos = self.construir(100)
+        def camino(nodo):
+            camino = []
+            while nodo is not None:
+                camino.insert(0, nodo)
+                nodo = nodo.padre()
+            return camino
+        aleatorio = random.Random(15)
+        for i in range(200):
+            a, b = aleatorio.choice(nodos), aleatorio.choice(nodos)
+            camino_a, camino_b = camino(a), camino(b)
+            comunes = [x for x, y in zip(camino_a, camino_b) if x is y]
+            self.assertIs(arbol.ancestro_comun(a, b), comunes[-1])
+            self.assertEqual(arbol.camino(a), camino_a)
+            self.assertEqual(arbol.profundidad(a), len(camino_a) - 1)
+        self.assertIs(arbol.ancestro_comun(nodos[4], nodos[40]), nodos[4])
+        # La numeración se rehace después de cambiar el árbol
+        arbol.remover_nodo(nodos[4], huerfanos=False)
+        self.assertIs(arbol.ancestro_comun(nodos[14], nodos[2]), nodos[0])
+        self.assertEqual(arbol.profundidad(nodos[40]), 3)
+        self.assertRaises(ValueError, arbol.profundidad, nodos[4])
+        self.assertRaises(ValueError, arbol.ancestro_comun,
+                          nodos[1], NodoArbolNario(0))
+
+    def test_agregados(self):
+        arbol, nodos = self.construir()
+        arbol.registrar_agregado("suma", lambda valor: valor, operator.add, 0)
+        arbol.registrar_agregado("maximo", lambda valor: valor, max, -1)
+        suma = lambda nodo: sum(arbol.subarbol(nodo))
+        self.assertEqual(arbol.agregado("suma"), sum(range(30)))
+        self.assertEqual(arbol.agregado("suma", nodos[1]), suma(nodos[1]))
+        self.assertEqual(arbol.agregado("maximo", nodos[2]), 29)
+        calculado = nodos[2].agregados
+        arbol.cambiar_nodo(nodos[13], 100)
+        arbol.insertar_nodo(NodoArbolNario(50), nodos[4])
+        arbol.remover_nodo(nodos[5])
+        # Solo se descartan los agregados de los ancestros de los cambios
+        self.assertIs(nodos[2].agregados, calculado)
+        self.assertEqual(arbol.agregado("suma", nodos[1]), suma(nodos[1]))
+        self.assertEqual(arbol.agregado("maximo"), 100)
+        self.assertEqual(arbol.agregado("suma"), suma(nodos[0]))
+        # Los cambios hechos fuera del árbol se avisan con invalidar_agregados
+        nodos[20].valor = 200
+        nodos[20].invalidar_agregados()
+        self.assertEqual(arbol.agregado("maximo", nodos[1]), 200)
+        arbol.quitar_agregado("maximo")
+        self.assertRaises(KeyError, arbol.agregado, "maximo")
+
+
+    def test_filtrar_limitado_y_podado(self):
+        arbol, nodos = self.construir(100)
+        podados = {nodos[2], nodos[13]}
+        def podado(nodo):
+            while nodo is not None:
+                if nodo in podados:
+                    return True
+                nodo = nodo.padre()
+            return False
+        par = lambda nodo: nodo.valor % 2 == 0
+        for orden in (ArbolNario.PREORDEN, ArbolNario.ANCHURA,
+                      ArbolNario.POSTORDEN):
+            with self.subTest(orden=orden):
+                todos = list(arbol.IteradorArbolNario(arbol, orden, True))
+                for profundidad in (0, 2, 10):
+                    self.assertEqual(
+                        list(arbol.filtrar(lambda valor: valor % 2 == 0,
+                                           orden, nodos=False,
+                                           profundidad_maxima=profundidad)),
+                        [nodo.valor for nodo in todos if par(nodo)
+                         and arbol.profundidad(nodo) <= profundidad])
+                visitados = []
+                def podar(nodo):
+                    visitados.append(nodo)
+                    return nodo in podados
+                self.assertEqual(
+                    list(arbol.filtrar(par, orden, podar=podar)),
+                    [nodo for nodo in todos if par(nodo)
+                     and not podado(nodo)])
+                # Los nodos de los subárboles podados no se visitan
+                self.assertEqual(set(visitados),
+                                 {nodo for nodo in todos
+                                  if not podado(nodo.padre())})
+                self.assertEqual(
+                    list(arbol.filtrar(par, orden, raiz=nodos[1],
+                                       profundidad_maxima=1, podar=podar)),
+                    [nodo for nodo in todos if nodo in (nodos[4], nodos[6])])
+        self.assertRaises(ValueError, arbol.filtrar, bool,
+                          profundidad_maxima=-1)
+        self.assertIs(arbol.buscar(lambda nodo: nodo.valor > 20,
+                                   podar=lambda nodo: nodo is nodos[1]),
+                      nodos[22])
+
+
+class PruebaInstantaneasArbolBinario(unittest.TestCase):
+
+    TIPOS = (ArbolBinario, ArbolAVL, ArbolRojinegro, ArbolSplay)
+
+    def test_versiones_independientes(self):
+        for tipo in self.TIPOS:
+            with self.subTest(tipo=tipo.__name__):
+                aleatorio = random.Random(16)
+                arbol, referencia = tipo(), set()
+                versiones = []
+                for paso in range(600):
+                    valor = aleatorio.randrange(300)
+                    if valor in referencia:
+                        arbol.remover(valor)
+                        referencia.remove(valor)
+                    else:
+                        arbol.insertar(valor)
+                        referencia.add(valor)
+                    if paso % 100 == 0:
+                        versiones.append((arbol.instantanea(),
+                                          sorted(referencia)))
+                self.assertEqual(list(arbol), sorted(referencia))
+                for instantanea, valores in versiones:
+                    self.assertEqual(list(instantanea), valores)
+                    self.assertEqual(len(instantanea), len(valores))
+                # Los cambios en una instantánea no se ven en el árbol
+                instantanea, valores = versiones[-1]
+                for valor in valores[::2]:
+                    instantanea.remover(valor)
+                instantanea.insertar(-1)
+                self.assertEqual(list(instantanea), [-1] + valores[1::2])
+                self.assertEqual(list(arbol), sorted(referencia))
+                self.assertEqual(list(versiones[-2][0]), versiones[-2][1])
+
+
+class PruebaInstantaneasArbolNario(unittest.TestCase):
+
+    @staticmethod
+    def historia(nodo):
+        return nodo._NodoArbolNario__historia or []
+
+    def test_instantaneas_descartadas_no_guardan_historia(self):
+        arbol, nodos = PruebaArbolNario.construir(200)
+        otro, ajenos = PruebaArbolNario.construir(200)
+        viva = otro.instantanea()
+        valores = list(viva)
+        for i in range(200):
+            arbol.instantanea()
+            arbol.insertar_nodo(NodoArbolNario(-i), arbol.raiz)
+            # Una instantánea viva de otro árbol no hace guardar estados
+            arbol.insertar_nodo(NodoArbolNario(-i), nodos[1])
+        self.assertLessEqual(len(self.historia(arbol.raiz)), 1)
+        self.assertEqual(self.historia(nodos[1]), [])
+        self.assertEqual(list(viva), valores)
+
+    def test_historia_acotada_con_instantaneas_vivas(self):
+        arbol, nodos = PruebaArbolNario.construir(50)
+        vivas = []
+        for i in range(100):
+            instantanea = arbol.instantanea()
+            if i % 25 == 0:
+                vivas.append((instantanea, list(instantanea)))
+            arbol.insertar_nodo(NodoArbolNario(-i), arbol.raiz)
+        del instantanea
+        arbol.insertar_nodo(NodoArbolNario("y"), arbol.raiz)
+        self.assertLessEqual(len(self.historia(arbol.raiz)), len(vivas))
+        for viva, valores in vivas:
+            self.assertEqual(list(viva), valores)
+        del viva, vivas[:]
+        arbol.insertar_nodo(NodoArbolNario("x"), arbol.raiz)
+        self.assertEqual(self.historia(arbol.raiz), [])
+    def test_solo_lectura(self):
+        arbol, nodos = PruebaArbolNario.construir(30)
+        instantanea = arbol.instantanea()
+        valores = list(instantanea)
+        arbol.cambiar_nodo(nodos[5], "cinco")
+        arbol.remover_nodo(nodos[1])
+        self.assertEqual(list(instantanea), valores)
+        self.assertEqual(len(instantanea), 30)
+        self.assertRaises(TypeError, instantanea.insertar_nodo,
+                          NodoArbolNario("x"), nodos[0])
+        self.assertRaises(TypeError, instantanea.remover_nodo, nodos[2])
+        # Copiar la instantánea permite deshacer los cambios
+        copia = instantanea.copiar()
+        copia.insertar_nodo(NodoArbolNario("nuevo"), copia.raiz)
+        self.assertEqual(list(copia), valores + ["nuevo"])
+        self.assertEqual(list(instantanea), valores)
+
+    def test_nodos_movidos_siguen_en_la_instantanea(self):
+        arbol, nodos = PruebaArbolNario.construir(30)
+        instantanea = arbol.instantanea()
+        valores = list(instantanea)
+        subarbol = list(arbol.subarbol(nodos[2]))
+        recorrido = iter(arbol.instantanea())
+        arbol.remover_nodo(nodos[1])
+        nodos[1].agregar(NodoArbolNario("suelto"))
+        otro = ArbolNario()
+        otro.insertar_nodo(NodoArbolNario("otra raiz"))
+        arbol.remover_nodo(nodos[2])
+        otro.insertar_nodo(nodos[2], otro.raiz)
+        otro.insertar_nodo(NodoArbolNario("movido"), nodos[2])
+        self.assertEqual(list(instantanea), valores)
+        self.assertEqual(list(recorrido), valores)
+        self.assertEqual(list(instantanea.subarbol(nodos[2])), subarbol)
+
+
+class PruebaColaConcurrente(unittest.TestCase):
+
+    def test_consultas_y_cambios_con_productores(self):
+        cola = ColaConcurrente(range(10))
+        cola[3] = "tres"
+        self.assertEqual(cola.obtener(3), "tres")
+        self.assertEqual(cola.indice("tres"), 3)
+        self.assertEqual(cola.buscar(lambda valor: valor == 7), 7)
+        self.assertEqual(cola.buscar_por_atributo("real", 8), 8)
+        self.assertEqual(repr(cola), "ColaConcurrente([0, 1, 2, 'tres', 4, "
+                                     "5, 6, 7, 8, 9])")
+        # Las búsquedas no ven el arreglo a medio crecer o girar
+        errores = []
+        def producir():
+            for i in range(20000):
+                cola.anexar(i)
+                cola.extraer()
+        def consultar():
+            try:
+                for i in range(300):
+                    cola.indice(-1)
+                    cola.buscar(lambda valor: False)
+                    cola[0] = cola[0]
+            except Exception as error:
+                errores.append(error)
+        hilos = [threading.Thread(target=producir),
+                 threading.Thread(target=consultar)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(len(cola), 10)
+
+
+
+class PruebaColaPrioridad(unittest.TestCase):
+
+    def test_operaciones(self):
+        aleatorio = random.Random(17)
+        cola = ColaPrioridad(range(100), clave=lambda valor: valor % 37)
+        claves = {valor: valor % 37 for valor in range(100)}
+        manejadores = {}
+        for valor in range(100, 2000):
+            operacion = aleatorio.randrange(4)
+            if operacion == 0 or len(claves) == 0:
+                claves[valor] = aleatorio.randrange(1000)
+                manejadores[valor] = cola.insertar(valor, claves[valor])
+            elif operacion == 1:
+                minimo = min(claves.values())
+                self.assertEqual(claves[cola.ver_min()], minimo)
+                self.assertEqual(claves.pop(cola.extraer_min()), minimo)
+            elif len(manejadores) != 0:
+                nodo = manejadores[aleatorio.choice(list(manejadores))]
+                if nodo.posicion == -1:
+                    # Ya se extrajo
+                    self.assertRaises(ValueError, cola.remover, nodo)
+                    del manejadores[nodo.valor]
+                elif operacion == 2:
+                    clave = aleatorio.randrange(nodo.clave + 1)
+                    cola.disminuir_clave(nodo, clave)
+                    claves[nodo.valor] = clave
+                    self.assertRaises(ValueError, cola.disminuir_clave,
+                                      nodo, clave + 1)
+                else:
+                    self.assertEqual(cola.remover(nodo), nodo.valor)
+                    del claves[nodo.valor], manejadores[nodo.valor]
+            self.assertEqual(len(cola), len(claves))
+        extraidos = [claves[cola.extraer_min()] for i in range(len(cola))]
+        self.assertEqual(extraidos, sorted(claves.values()))
+        self.assertRaises(IndexError, cola.extraer_min)
+
+    def test_manejador_de_otra_cola(self):
+        cola, otra = ColaPrioridad([3, 1, 2]), ColaPrioridad([5])
+        nodo = otra.insertar(4)
+        self.assertRaises(ValueError, cola.remover, nodo)
+        self.assertRaises(ValueError, cola.disminuir_clave, nodo, 0)
+        cola.extender([0, 7])
+        self.assertEqual([cola.extraer_min() for i in range(5)],
+                         [0, 1, 2, 3, 7])
+        otra.vaciar()
+        self.assertEqual(nodo.posicion, -1)
+
+
+class PruebaTrie(unittest.TestCase):
+
+    def test_buscar_prefijo(self):
+        aleatorio = random.Random(19)
+        trie, pares = Trie(str.casefold), []
+        for i in range(500):
+            clave = "".join(aleatorio.choice("abcAB")
+                            for j in range(aleatorio.randrange(6)))
+            trie.insertar(clave, i)
+            pares.append((clave.casefold(), i))
+        for i, par in enumerate(list(pares)):
+            if i % 3 == 0:
+                trie.remover(par[0].upper(), par[1])
+                pares.remove(par)
+        pares.sort(key=lambda par: par[0])  # Estable: orden de inserción
+        self.assertEqual(len(trie), len(pares))
+        self.assertEqual(list(trie.pares()), pares)
+        for prefijo in ("", "a", "Ab", "cab", "bbb", "d"):
+            esperados = [valor for clave, valor in pares
+                         if clave.startswith(prefijo.casefold())]
+            self.assertEqual(list(trie.buscar_prefijo(prefijo)), esperados)
+            self.assertEqual(list(trie.buscar_prefijo(prefijo, k=3)),
+                             esperados[:3])
+        clave, valor = pares[0]
+        self.assertIn(valor, trie.obtener(clave.upper()))
+        self.assertIn(clave, trie)
+        self.assertRaises(KeyError, trie.remover, clave, -1)
+        self.assertRaises(KeyError, trie.remover, "abcabcabc", valor)
+
+    def test_remover_poda_nodos(self):
+        trie = Trie()
+        trie.insertar("casa", 1)
+        trie.insertar("casa", 2)
+        trie.insertar("cas", 3)
+        trie.remover("casa", 1)
+        self.assertEqual(trie.obtener("casa"), [2])
+        trie.remover("casa", 2)
+        self.assertNotIn("casa", trie)
+        self.assertEqual(list(trie.buscar_prefijo("cas", pares=True)),
+                         [("cas", 3)])
+        trie.remover("cas", 3)
+        self.assertEqual(trie._Trie__raiz.hijos, {})
+        self.assertEqual(len(trie), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Pruebas de la gestión de proyectos
+# Autor: Francisco Román, Francisco Unda y Santiago Pinto
+#
+# Uso: python -m unittest test_proyectos
+
+import operator
+import unittest
+from datetime import date
+
+from proyectos import *
+
+
+class PruebaGestor(unittest.TestCase):
+
+    def setUp(self):
+        self.gestor = Gestor()
+        empresa = self.gestor.agregar_empresa({
+            "nombre": "Empresa", "descripcion": "", "fecha_creacion":
+            date(2024, 1, 1), "direccion": "", "telefono": 1, "correo": "",
+            "gerente": "", "equipo_contacto": ""})
+        self.gestor.gestionar_proyectos(empresa)
+        self.proyecto = self.gestor.agregar_proyecto({
+            "nombre": "Proyecto", "descripcion": "",
+            "fecha_inicio": date(2024, 1, 1),
+            "fecha_vencimiento": date(2024, 12, 31), "estado": "En progreso",
+            "empresa": "Empresa", "gerente": "", "equipo": ""})
+        self.gestor.gestionar_tareas(self.proyecto)
+
+    def agregar_tarea(self, nombre):
+        return self.gestor.agregar_tarea({
+            "nombre": nombre, "descripcion": "",
+            "fecha_inicio": date(2024, 2, 1),
+            "fecha_vencimiento": date(2024, 3, 1), "estado": "No iniciado",
+            "porcentaje": 0.0, "empresa_cliente": ""})
+
+    def test_modificar_tarea_invalida_agregados(self):
+        tarea = self.agregar_tarea("Tarea")
+        self.gestor.gestionar_subtareas(tarea)
+        subtarea = self.agregar_tarea("Subtarea")
+        tareas = self.proyecto.tareas
+        tareas.registrar_agregado(
+            "porcentaje",
+            lambda valor: getattr(valor, "porcentaje", 0.0),
+            operator.add, 0.0)
+        self.assertEqual(tareas.agregado("porcentaje"), 0.0)
+        self.gestor.modificar_tarea({"porcentaje": 50.0}, subtarea)
+        self.assertEqual(tareas.agregado("porcentaje"), 50.0)
+        self.assertEqual(
+            tareas.agregado("porcentaje", tarea.subtareas.raiz), 50.0)
+        self.gestor.modificar_tarea({"porcentaje": 25.0}, tarea)
+        self.assertEqual(tareas.agregado("porcentaje"), 75.0)
+
+    def test_modificar_proyecto_invalida_agregados(self):
+        tareas = self.proyecto.tareas
+        tareas.registrar_agregado(
+            "nombres", lambda valor: len(valor.nombre), operator.add, 0)
+        self.assertEqual(tareas.agregado("nombres"), len("Proyecto"))
+        self.gestor.modificar_proyecto({"nombre": "P"}, self.proyecto)
+        self.assertEqual(tareas.agregado("nombres"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()